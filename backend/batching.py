@@ -0,0 +1,163 @@
+# backend/batching.py
+
+"""
+Micro-batching Module
+
+Gathers concurrent single-item requests into batches of up to
+``max_batch_size`` items, waiting at most ``max_wait_ms`` after the first
+item arrives, and runs each batch through one batched call. Every caller
+awaits its own future and receives its own result.
+
+Used for the BERT stage, where one batched inference call is far cheaper
+than many single-item calls on CPU or against a batch-capable endpoint.
+"""
+
+import asyncio
+import logging
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """
+    Coalesce concurrent ``submit`` calls into batched ``predict_batch`` calls.
+
+    ``predict_batch`` receives a list of items and must return a list of
+    results in the same order. Up to ``max_concurrent_batches`` batches run at
+    once; while they run, new items keep accumulating for the next batch.
+    ``on_batch``, if given, is called with the size of every batch run.
+    """
+
+    def __init__(
+        self,
+        predict_batch: Callable[[List[Any]], Awaitable[List[Any]]],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+        max_concurrent_batches: int = 1,
+        on_batch: Optional[Callable[[int], None]] = None,
+    ):
+        self.predict_batch = predict_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_ms = max_wait_ms
+        self.max_concurrent_batches = max(1, max_concurrent_batches)
+        self.on_batch = on_batch
+
+        self._queue: "asyncio.Queue" = None
+        self._worker: "asyncio.Task" = None
+        self._batch_slots: "asyncio.Semaphore" = None
+        self._running = set()
+
+        self.batches = 0
+        self.items = 0
+        self.batch_size_counts: Counter = Counter()
+
+    def _ensure_worker(self) -> None:
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._batch_slots = asyncio.Semaphore(self.max_concurrent_batches)
+            self._worker = asyncio.create_task(self._collect())
+
+    async def submit(self, item: Any) -> Any:
+        """Queue one item and wait for its result from the next batch"""
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((item, future))
+        return await future
+
+    async def _collect(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait_ms / 1000
+
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            # Also take anything that queued up while we were waiting
+            while len(batch) < self.max_batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            await self._batch_slots.acquire()
+            task = asyncio.create_task(self._run(batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run(self, batch: List[tuple]) -> None:
+        try:
+            # Skip callers that gave up while waiting
+            batch = [(item, future) for item, future in batch if not future.done()]
+            if not batch:
+                return
+
+            self.batches += 1
+            self.items += len(batch)
+            self.batch_size_counts[len(batch)] += 1
+            if self.on_batch is not None:
+                self.on_batch(len(batch))
+
+            try:
+                results = await self.predict_batch([item for item, _ in batch])
+                if len(results) != len(batch):
+                    raise ValueError(
+                        f"Batch returned {len(results)} results for {len(batch)} items"
+                    )
+            except Exception as e:
+                logger.error(f"Micro-batch of {len(batch)} failed: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+        finally:
+            self._batch_slots.release()
+
+    async def close(self) -> None:
+        """Stop collecting and wait for batches already running"""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        if self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
+
+    def queue_depth(self) -> int:
+        """Items waiting to be picked up for a batch"""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def histogram(self) -> Dict[int, int]:
+        """Cumulative batch-size histogram with power-of-two upper bounds"""
+        bounds = []
+        bound = 1
+        while bound < self.max_batch_size:
+            bounds.append(bound)
+            bound *= 2
+        bounds.append(self.max_batch_size)
+
+        return {
+            bound: sum(count for size, count in self.batch_size_counts.items() if size <= bound)
+            for bound in bounds
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms,
+            "batches": self.batches,
+            "items": self.items,
+            "average_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "batch_size_histogram": {f"le_{bound}": count for bound, count in self.histogram().items()},
+        }
@@ -0,0 +1,5 @@
+"""
+Benchmarks for the classification pipeline.
+
+Run from the backend directory, e.g. ``python -m benchmarks.regex_benchmark``.
+"""
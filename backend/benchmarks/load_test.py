@@ -0,0 +1,436 @@
+"""
+HTTP Load Test
+
+Starts the real FastAPI app (``uvicorn main:app``, or ``serve.py`` with
+``--workers``) against the local stand-ins for the BERT Space and the Groq
+API (``benchmarks.stand_ins``), drives one of its classification endpoints
+over HTTP and reports client-side throughput, latency percentiles and error
+rates next to the server-reported ``processing_time_ms``.
+
+Load is either closed-loop (``--concurrency`` clients, each sending its next
+request when the previous one returns) or open-loop (``--rate`` requests per
+second arriving on schedule whether or not earlier ones finished; latency is
+measured from the scheduled arrival, so queueing in the app is counted).
+
+With ``--slo-*`` limits the run exits non-zero when any is missed, for use
+as a gate in CI.
+
+Usage (from backend/):
+    python -m benchmarks.load_test --concurrency 32 --duration 30 --slo-p99-ms 1500
+    python -m benchmarks.load_test --rate 200 --duration 30 --llm-error-rate 0.02 \\
+        --slo-p99-ms 2000 --slo-error-rate 0.01 --json results/load.json
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+import numpy as np
+
+from benchmarks.pipeline_benchmark import DEFAULT_DATASET, git_commit, load_rows
+from benchmarks.stand_ins import add_fault_arguments
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+ENDPOINTS = ("classify", "batch", "stream")
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class Server:
+    """A subprocess serving HTTP, logged to a temporary file"""
+
+    def __init__(self, name, command, env, log_dir):
+        self.name = name
+        self.log_path = Path(log_dir) / f"{name}.log"
+        self._log = open(self.log_path, "w")
+        self.process = subprocess.Popen(
+            command, cwd=BACKEND_DIR, env=env, stdout=self._log, stderr=subprocess.STDOUT
+        )
+
+    def log_tail(self, lines=20):
+        return "\n".join(self.log_path.read_text(errors="replace").splitlines()[-lines:])
+
+    async def wait_until(self, url, ready, timeout):
+        deadline = time.monotonic() + timeout
+        async with httpx.AsyncClient(timeout=2.0) as client:
+            while time.monotonic() < deadline:
+                if self.process.poll() is not None:
+                    break
+                with contextlib.suppress(httpx.HTTPError):
+                    response = await client.get(url)
+                    if response.is_success and ready(response):
+                        return
+                await asyncio.sleep(0.2)
+        raise RuntimeError(f"{self.name} did not become ready:\n{self.log_tail()}")
+
+    def stop(self):
+        if self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        self._log.close()
+
+
+def app_command(args, port):
+    """uvicorn for one process, or the pre-fork server with --workers"""
+    if args.workers:
+        return [
+            sys.executable, "serve.py", "--workers", str(args.workers),
+            "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning",
+        ]
+    return [
+        sys.executable, "-m", "uvicorn", "main:app",
+        "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning",
+    ]
+
+
+def stand_in_command(args, port):
+    command = [
+        sys.executable, "-m", "benchmarks.stand_ins",
+        "--port", str(port),
+        "--dataset", args.dataset,
+        "--jitter", str(args.jitter),
+        "--seed", str(args.seed),
+    ]
+    for service in ("bert", "llm"):
+        for option in ("latency_ms", "slow_rate", "slow_ms", "error_rate"):
+            value = getattr(args, f"{service}_{option}")
+            command += [f"--{service}-{option.replace('_', '-')}", str(value)]
+    return command
+
+
+def app_environment(args, stand_in_url, log_dir):
+    env = dict(os.environ)
+    env.update(
+        {
+            "BERT_BACKEND": "gradio",
+            "BERT_SPACE_URL": stand_in_url,
+            "HF_API_TOKEN": "load-test",
+            "GROQ_API_BASE": f"{stand_in_url}/groq",
+            "GROQ_API_KEY": "load-test",
+            "TEMPLATE_STORE_PATH": "",
+            "GRADIO_ANALYTICS_ENABLED": "False",
+        }
+    )
+    if args.workers:
+        # A fresh store file, through which the workers share results
+        env["TEMPLATE_STORE_PATH"] = str(Path(log_dir) / "template_store.db")
+    for assignment in args.app_env:
+        key, _, value = assignment.partition("=")
+        env[key] = value
+    return env
+
+
+def app_ready(response):
+    """Healthy, with BERT and the LLM loaded and the BERT circuit closed"""
+    health = response.json()
+    return (
+        health.get("status") == "healthy"
+        and all(health.get("models_loaded", {}).values())
+        and (health.get("bert_circuit") or {}).get("state") == "closed"
+    )
+
+
+class RequestFactory:
+    """Builds requests for one endpoint from the dataset logs, in a seeded order"""
+
+    def __init__(self, endpoint, logs, logs_per_request, seed):
+        self.endpoint = endpoint
+        self.logs = list(logs)
+        random.Random(seed).shuffle(self.logs)
+        self.logs_per_request = 1 if endpoint == "classify" else logs_per_request
+        self.position = 0
+
+    def _take(self, count):
+        taken = [self.logs[(self.position + offset) % len(self.logs)] for offset in range(count)]
+        self.position = (self.position + count) % len(self.logs)
+        return taken
+
+    def next(self):
+        logs = self._take(self.logs_per_request)
+        if self.endpoint == "classify":
+            return {"method": "POST", "url": "/api/classify", "json": {"log_message": logs[0]}}
+        if self.endpoint == "batch":
+            return {"method": "POST", "url": "/api/classify/batch", "json": {"log_messages": logs}}
+        return {"method": "POST", "url": "/api/classify/stream", "content": "\n".join(logs).encode()}
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = []
+        self.server_times_ms = []
+        self.status_codes = {}
+        self.failures = 0
+        self.dropped = 0
+        self.started = 0
+
+    async def send(self, client, request, arrival):
+        """Send one request; latency counts from ``arrival`` (its scheduled start)"""
+        self.started += 1
+        status = "exception"
+        try:
+            response = await client.request(**request)
+            status = str(response.status_code)
+            body = response.content
+            if response.is_success and request["url"] != "/api/classify/stream":
+                self.server_times_ms.append(json.loads(body)["processing_time_ms"])
+            ok = response.is_success
+        except httpx.HTTPError:
+            ok = False
+        self.latencies.append(time.perf_counter() - arrival)
+        self.status_codes[status] = self.status_codes.get(status, 0) + 1
+        if not ok:
+            self.failures += 1
+
+
+async def closed_loop(client, factory, recorder, concurrency, duration):
+    stop_at = time.perf_counter() + duration
+
+    async def user():
+        while time.perf_counter() < stop_at:
+            await recorder.send(client, factory.next(), time.perf_counter())
+
+    await asyncio.gather(*(user() for _ in range(concurrency)))
+
+
+async def open_loop(client, factory, recorder, rate, duration, arrivals, max_in_flight, seed):
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    in_flight = set()
+    next_arrival = start
+    while next_arrival < start + duration:
+        delay = next_arrival - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if len(in_flight) >= max_in_flight:
+            # The app is this far behind; count the arrival as failed instead of
+            # letting the client's own backlog grow without bound
+            recorder.dropped += 1
+        else:
+            task = asyncio.create_task(recorder.send(client, factory.next(), next_arrival))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+        gap = rng.expovariate(rate) if arrivals == "poisson" else 1.0 / rate
+        next_arrival += gap
+    if in_flight:
+        await asyncio.gather(*in_flight)
+
+
+def percentiles(values_ms):
+    values_ms = np.asarray(values_ms, dtype=np.float64)
+    if len(values_ms) == 0:
+        return {}
+    p50, p90, p99, p999 = np.percentile(values_ms, [50, 90, 99, 99.9])
+    return {
+        "mean": round(float(values_ms.mean()), 2),
+        "p50": round(float(p50), 2),
+        "p90": round(float(p90), 2),
+        "p99": round(float(p99), 2),
+        "p99_9": round(float(p999), 2),
+        "max": round(float(values_ms.max()), 2),
+    }
+
+
+def summarise(recorder, elapsed, logs_per_request):
+    attempted = recorder.started + recorder.dropped
+    failed = recorder.failures + recorder.dropped
+    succeeded = recorder.started - recorder.failures
+    return {
+        "requests": attempted,
+        "succeeded": succeeded,
+        "failed": failed,
+        "dropped": recorder.dropped,
+        "error_rate": round(failed / attempted, 4) if attempted else 0.0,
+        "status_codes": recorder.status_codes,
+        "elapsed_seconds": round(elapsed, 2),
+        "throughput_rps": round(succeeded / elapsed, 1) if elapsed else 0.0,
+        "logs_per_second": round(succeeded * logs_per_request / elapsed, 1) if elapsed else 0.0,
+        "latency_ms": percentiles(np.asarray(recorder.latencies) * 1000),
+        "server_processing_time_ms": percentiles(recorder.server_times_ms),
+    }
+
+
+def check_slos(result, args):
+    """Return a description of every configured SLO the run missed"""
+    violations = []
+    latency = result["latency_ms"]
+    for name, limit in (("p50", args.slo_p50_ms), ("p99", args.slo_p99_ms)):
+        if limit is not None and latency.get(name, float("inf")) > limit:
+            violations.append(f"{name} latency {latency.get(name)} ms > {limit} ms")
+    if args.slo_error_rate is not None and result["error_rate"] > args.slo_error_rate:
+        violations.append(f"error rate {result['error_rate']:.2%} > {args.slo_error_rate:.2%}")
+    if args.slo_min_rps is not None and result["throughput_rps"] < args.slo_min_rps:
+        violations.append(f"throughput {result['throughput_rps']} req/s < {args.slo_min_rps} req/s")
+    return violations
+
+
+async def pipeline_stages(client):
+    """Per-stage log counts from the app's /api/stats, if it serves them"""
+    try:
+        stats = (await client.get("/api/stats")).json()
+        return {stage: info["count"] for stage, info in stats["stages"].items()}
+    except (httpx.HTTPError, ValueError, KeyError):
+        return None
+
+
+async def run_load(args, base_url):
+    logs = [row["raw_log_text"] for row in load_rows(args.dataset)]
+    factory = RequestFactory(args.endpoint, logs, args.logs_per_request, args.seed)
+    connections = args.concurrency if args.rate is None else args.max_in_flight
+    limits = httpx.Limits(max_connections=connections, max_keepalive_connections=connections)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=args.timeout) as client:
+        warmup = Recorder()
+        for _ in range(args.warmup_requests):
+            await warmup.send(client, factory.next(), time.perf_counter())
+
+        recorder = Recorder()
+        start = time.perf_counter()
+        if args.rate is None:
+            await closed_loop(client, factory, recorder, args.concurrency, args.duration)
+        else:
+            await open_loop(
+                client, factory, recorder, args.rate, args.duration,
+                args.arrivals, args.max_in_flight, args.seed,
+            )
+        elapsed = time.perf_counter() - start
+
+        result = summarise(recorder, elapsed, factory.logs_per_request)
+        result["pipeline_stages"] = await pipeline_stages(client)
+    return result
+
+
+async def run(args):
+    if args.target:
+        return await run_load(args, args.target.rstrip("/")), None
+
+    with tempfile.TemporaryDirectory(prefix="load_test_") as log_dir:
+        stand_in_port, app_port = free_port(), free_port()
+        stand_in_url = f"http://127.0.0.1:{stand_in_port}"
+        app_url = f"http://127.0.0.1:{app_port}"
+
+        servers = []
+        try:
+            stand_ins = Server("stand_ins", stand_in_command(args, stand_in_port), dict(os.environ), log_dir)
+            servers.append(stand_ins)
+            await stand_ins.wait_until(f"{stand_in_url}/config", lambda response: True, args.startup_timeout)
+
+            app = Server("app", app_command(args, app_port), app_environment(args, stand_in_url, log_dir), log_dir)
+            servers.append(app)
+            await app.wait_until(f"{app_url}/health", app_ready, args.startup_timeout)
+
+            result = await run_load(args, app_url)
+            async with httpx.AsyncClient() as client:
+                stand_in_stats = (await client.get(f"{stand_in_url}/stats")).json()
+            return result, stand_in_stats
+        finally:
+            for server in reversed(servers):
+                server.stop()
+
+
+def print_report(report):
+    config, result = report["config"], report["result"]
+    load = f"{config['concurrency']} concurrent clients" if config["rate"] is None else (
+        f"{config['rate']} req/s open-loop ({config['arrivals']})"
+    )
+    print(f"Endpoint {config['endpoint']}: {load} for {config['duration']}s")
+    print(
+        f"  requests {result['requests']:,}, succeeded {result['succeeded']:,}, failed {result['failed']:,} "
+        f"(dropped {result['dropped']:,}), error rate {result['error_rate']:.2%}, status codes {result['status_codes']}"
+    )
+    print(f"  throughput {result['throughput_rps']:,.1f} req/s ({result['logs_per_second']:,.1f} logs/s)")
+    for label, key in (("client latency ms", "latency_ms"), ("server processing_time_ms", "server_processing_time_ms")):
+        values = result[key]
+        if values:
+            print(
+                f"  {label:<26} p50 {values['p50']:>9.1f}  p90 {values['p90']:>9.1f}  "
+                f"p99 {values['p99']:>9.1f}  p99.9 {values['p99_9']:>9.1f}  max {values['max']:>9.1f}"
+            )
+    if result.get("pipeline_stages"):
+        print(f"  pipeline stages (since app start): {result['pipeline_stages']}")
+    if report.get("stand_ins"):
+        print(f"  stand-in calls: {report['stand_ins']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--endpoint", choices=ENDPOINTS, default="classify")
+    parser.add_argument("--logs-per-request", type=int, default=50, help="For batch and stream")
+    load = parser.add_mutually_exclusive_group()
+    load.add_argument("--concurrency", type=int, default=16, help="Closed-loop clients")
+    load.add_argument("--rate", type=float, help="Open-loop arrivals per second")
+    parser.add_argument("--arrivals", choices=("poisson", "uniform"), default="poisson")
+    parser.add_argument("--max-in-flight", type=int, default=1000, help="Open-loop cap before arrivals are dropped")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds of measured load")
+    parser.add_argument("--warmup-requests", type=int, default=20)
+    parser.add_argument("--timeout", type=float, default=60.0, help="Per-request client timeout")
+    parser.add_argument("--dataset", default=str(DEFAULT_DATASET))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--target", help="Load an already running app at this URL instead")
+    parser.add_argument("--workers", type=int, help="Serve the app with serve.py and this many workers")
+    parser.add_argument("--app-env", action="append", default=[], metavar="KEY=VALUE", help="Extra app environment")
+    parser.add_argument("--startup-timeout", type=float, default=60.0)
+    parser.add_argument("--jitter", type=float, default=0.2, help="Stand-in latency spread")
+    add_fault_arguments(parser, "bert", 25.0)
+    add_fault_arguments(parser, "llm", 250.0)
+    parser.add_argument("--slo-p50-ms", type=float)
+    parser.add_argument("--slo-p99-ms", type=float)
+    parser.add_argument("--slo-error-rate", type=float, help="Maximum failed fraction, e.g. 0.01")
+    parser.add_argument("--slo-min-rps", type=float, help="Minimum successful requests per second")
+    parser.add_argument("--json", help="Write the report as JSON to this path ('-' for stdout)")
+    args = parser.parse_args()
+    if args.rate is not None:
+        args.concurrency = None
+
+    result, stand_in_stats = asyncio.run(run(args))
+    violations = check_slos(result, args)
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "config": {
+            key: value
+            for key, value in vars(args).items()
+            if key not in ("json", "dataset", "target")
+        },
+        "result": result,
+        "stand_ins": stand_in_stats,
+        "slo_violations": violations,
+    }
+
+    if args.json == "-":
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+        if args.json:
+            directory = os.path.dirname(args.json)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(args.json, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+            print(f"Report written to {args.json}")
+
+    if violations:
+        for violation in violations:
+            print(f"SLO missed: {violation}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,378 @@
+"""
+Pipeline Stage Benchmark
+
+Replays the logs in ``log_classification_system/data/dataset_sampling.csv``
+through ``LogClassifier`` in-process and reports throughput and
+p50/p95/p99 latency for each stage method (regex, BERT, LLM) and for the
+whole pipeline (``classify_log`` and ``classify_batch``).
+
+The BERT Space and the Groq LLM are replaced by local stand-ins that sleep
+for a configurable latency and answer with the labels recorded in the CSV
+(``bert_label`` / ``bert_confidence`` and ``llm_category`` /
+``llm_confidence``), so runs are reproducible and need no network or API
+keys. Everything between the stand-ins and the endpoints - thresholds,
+caches, batching, packing, semaphores and the executor - is the real code.
+
+Usage (from backend/):
+    python -m benchmarks.pipeline_benchmark --bert-latency-ms 25 --llm-latency-ms 250 \\
+        --json results/bench.json
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import os
+import platform
+import random
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+DEFAULT_DATASET = (
+    Path(__file__).resolve().parents[2]
+    / "log_classification_system"
+    / "data"
+    / "dataset_sampling.csv"
+)
+
+# Confidence the BERT stand-in reports for logs without a recorded BERT label,
+# below the classifier's threshold so they continue to the LLM
+UNRECORDED_BERT_CONFIDENCE = 0.05
+
+
+class Latency:
+    """Seeded latency source: ``base_ms`` +/- ``jitter`` (a fraction of it)"""
+
+    def __init__(self, base_ms, jitter, seed):
+        self.base_ms = base_ms
+        self.jitter = jitter
+        self.random = random.Random(seed)
+
+    def seconds(self):
+        spread = self.base_ms * self.jitter
+        return max(0.0, self.base_ms + self.random.uniform(-spread, spread)) / 1000
+
+
+class RecordedBertSpace:
+    """Stand-in for the Gradio client of the BERT Space (blocking, like the real one)"""
+
+    def __init__(self, recorded, label_ids, latency):
+        self.recorded = recorded
+        self.label_ids = label_ids
+        self.latency = latency
+        self.calls = 0
+
+    def _answer(self, log_text):
+        category, confidence = self.recorded.get(log_text, (None, UNRECORDED_BERT_CONFIDENCE))
+        label = self.label_ids.get(category, "LABEL_0")
+        return {"label": label, "confidences": [{"label": label, "confidence": confidence}]}
+
+    def predict(self, payload, api_name=None):
+        self.calls += 1
+        time.sleep(self.latency.seconds())
+        if isinstance(payload, list):
+            return [self._answer(log_text) for log_text in payload]
+        return self._answer(payload)
+
+
+class _Message:
+    def __init__(self, content):
+        self.content = content
+
+
+class RecordedLlm:
+    """
+    Stand-in for the ChatGroq client. Logs are recovered from the real
+    single and packed prompts, where they appear as ``prompt_log`` renders
+    them; logs without a recorded category get a reply with no JSON, which
+    the classifier reports as a Processing_Error.
+    """
+
+    def __init__(self, recorded, prompt_template, packed_prompt_template, prompt_log, latency):
+        self.recorded = {prompt_log(log_text): answer for log_text, answer in recorded.items()}
+        self.latency = latency
+        self.calls = 0
+        self.single_prefix, self.single_suffix = self._split(prompt_template, "log_message")
+        self.packed_prefix, self.packed_suffix = self._split(packed_prompt_template, "log_messages")
+
+    @staticmethod
+    def _split(template, variable):
+        sentinel = "\x00LOG\x00"
+        prefix, suffix = template.format(**{variable: sentinel}).split(sentinel)
+        return prefix, suffix
+
+    def _entry(self, log_text):
+        answer = self.recorded.get(log_text)
+        if answer is None:
+            return None
+        category, confidence = answer
+        return {"category": category, "confidence": confidence}
+
+    def reply(self, prompt):
+        """Reply text for a single or packed classification prompt"""
+        if prompt.startswith(self.packed_prefix):
+            body = prompt[len(self.packed_prefix) : len(prompt) - len(self.packed_suffix)]
+            entries = []
+            for line in body.split("\n"):
+                match = re.match(r"\[(\d+)\] (.*)", line, re.DOTALL)
+                entry = self._entry(match.group(2)) if match else None
+                if entry:
+                    entries.append(dict(entry, index=int(match.group(1))))
+            return json.dumps({"results": entries})
+
+        log_text = prompt[len(self.single_prefix) : len(prompt) - len(self.single_suffix)]
+        entry = self._entry(log_text)
+        return json.dumps(entry) if entry else "I cannot classify this log."
+
+    async def ainvoke(self, messages, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self.latency.seconds())
+        return _Message(self.reply(messages[-1].content))
+
+
+def load_rows(path, limit=None):
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    return rows[:limit] if limit else rows
+
+
+def recorded_answers(rows, label_column, confidence_column, default_confidence):
+    answers = {}
+    for row in rows:
+        if row[label_column]:
+            confidence = float(row[confidence_column] or default_confidence)
+            answers[row["raw_log_text"]] = (row[label_column], confidence)
+    return answers
+
+
+def summarise(latencies, wall_seconds, items=None):
+    """Throughput and latency percentiles (ms) for one benchmark"""
+    latencies_ms = np.asarray(latencies, dtype=np.float64) * 1000
+    items = len(latencies) if items is None else items
+    if len(latencies_ms) == 0:
+        return {"items": 0, "calls": 0, "wall_seconds": 0.0, "throughput_per_second": 0.0}
+    p50, p95, p99 = np.percentile(latencies_ms, [50, 95, 99])
+    return {
+        "items": items,
+        "calls": len(latencies_ms),
+        "wall_seconds": round(wall_seconds, 4),
+        "throughput_per_second": round(items / wall_seconds, 1) if wall_seconds else 0.0,
+        "latency_ms": {
+            "mean": round(float(latencies_ms.mean()), 3),
+            "p50": round(float(p50), 3),
+            "p95": round(float(p95), 3),
+            "p99": round(float(p99), 3),
+            "max": round(float(latencies_ms.max()), 3),
+        },
+    }
+
+
+async def run_concurrently(func, items, concurrency):
+    """Call ``func`` on every item with at most ``concurrency`` in flight"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = [0.0] * len(items)
+    outputs = [None] * len(items)
+
+    async def timed(index, item):
+        async with semaphore:
+            start = time.perf_counter()
+            outputs[index] = await func(item)
+            latencies[index] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    await asyncio.gather(*(timed(index, item) for index, item in enumerate(items)))
+    return outputs, latencies, time.perf_counter() - start
+
+
+def reset(classifier):
+    """Cold caches and a closed breaker, so each benchmark starts from the same state"""
+    classifier.template_cache.clear()
+    classifier.semantic_cache.clear()
+    classifier.bert_breaker.record_success()
+
+
+async def build_classifier(rows, args):
+    os.environ["BERT_BACKEND"] = "gradio"
+    os.environ["TEMPLATE_STORE_PATH"] = ""
+    os.environ.setdefault("HF_API_TOKEN", "benchmark")
+    os.environ.setdefault("GROQ_API_KEY", "benchmark")
+    if args.bert_batch:
+        os.environ["BERT_BATCH_API_NAME"] = "/predict_batch"
+    else:
+        os.environ.pop("BERT_BATCH_API_NAME", None)
+
+    from classifier import LogClassifier
+
+    classifier = LogClassifier()
+    classifier.llm_pack_size = args.llm_pack_size
+
+    label_ids = {category: label for label, category in classifier.bert_label_mapping.items()}
+    bert_space = RecordedBertSpace(
+        recorded_answers(rows, "bert_label", "bert_confidence", 0.0),
+        label_ids,
+        Latency(args.bert_latency_ms, args.jitter, args.seed),
+    )
+    classifier.gradio_client = bert_space
+
+    await classifier.initialize()
+
+    llm = RecordedLlm(
+        recorded_answers(rows, "llm_category", "llm_confidence", 0.0),
+        classifier.llm_prompt_template,
+        classifier.llm_packed_prompt_template,
+        classifier._prompt_log,
+        Latency(args.llm_latency_ms, args.jitter, args.seed + 1),
+    )
+    classifier.llm_client = llm
+    return classifier, bert_space, llm
+
+
+async def run_benchmarks(args):
+    rows = load_rows(args.dataset, args.limit)
+    logs = [row["raw_log_text"] for row in rows]
+    classifier, bert_space, llm = await build_classifier(rows, args)
+    results = {}
+
+    try:
+        # Stage 3: regex over every log
+        latencies = []
+        start = time.perf_counter()
+        for _ in range(args.regex_repeat):
+            for log_text in logs:
+                call_start = time.perf_counter()
+                classifier._classify_with_regex(log_text)
+                latencies.append(time.perf_counter() - call_start)
+        results["regex"] = summarise(latencies, time.perf_counter() - start)
+
+        # Stage 4: BERT for the logs regex leaves
+        unmatched = [log_text for log_text in logs if not classifier._classify_with_regex(log_text)[0]]
+        reset(classifier)
+        bert_outputs, latencies, wall = await run_concurrently(
+            classifier._classify_with_bert, unmatched, args.concurrency
+        )
+        results["bert"] = summarise(latencies, wall)
+
+        # Stage 5: LLM for the logs BERT leaves, one call per log
+        fallback = [log_text for log_text, (category, _, _) in zip(unmatched, bert_outputs) if not category]
+        reset(classifier)
+        _, latencies, wall = await run_concurrently(
+            classifier._classify_with_llm, fallback, args.concurrency
+        )
+        results["llm"] = summarise(latencies, wall)
+
+        # Whole pipeline, one request per log
+        reset(classifier)
+        outputs, latencies, wall = await run_concurrently(
+            classifier.classify_log, logs, args.concurrency
+        )
+        results["classify_log"] = summarise(latencies, wall)
+        results["classify_log"]["stage_counts"] = {
+            stage: sum(1 for output in outputs if output["stage"] == stage)
+            for stage in ("Regex", "BERT", "LLM")
+        }
+
+        # Whole pipeline, batch requests (latency is per batch)
+        reset(classifier)
+        batches = [logs[start : start + args.batch_size] for start in range(0, len(logs), args.batch_size)]
+        _, latencies, wall = await run_concurrently(classifier.classify_batch, batches, 1)
+        results["classify_batch"] = summarise(latencies, wall, items=len(logs))
+    finally:
+        await classifier.shutdown()
+
+    results["external_calls"] = {"bert": bert_space.calls, "llm": llm.calls}
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(__file__).resolve().parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(report):
+    config = report["config"]
+    print(
+        f"Dataset: {config['dataset']} ({config['logs']:,} logs), concurrency {config['concurrency']}, "
+        f"BERT {config['bert_latency_ms']} ms, LLM {config['llm_latency_ms']} ms (+/-{config['jitter']:.0%})"
+    )
+    print(f"{'benchmark':<16}{'items':>8}{'items/s':>12}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, result in report["results"].items():
+        if "latency_ms" not in result:
+            continue
+        latency = result["latency_ms"]
+        print(
+            f"{name:<16}{result['items']:>8,}{result['throughput_per_second']:>12,.1f}"
+            f"{latency['p50']:>10.3f}{latency['p95']:>10.3f}{latency['p99']:>10.3f}"
+        )
+    print(f"External calls: {report['results']['external_calls']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--dataset", default=str(DEFAULT_DATASET))
+    parser.add_argument("--limit", type=int, help="Only use the first N logs")
+    parser.add_argument("--concurrency", type=int, default=32, help="Requests in flight")
+    parser.add_argument("--bert-latency-ms", type=float, default=25.0)
+    parser.add_argument("--llm-latency-ms", type=float, default=250.0)
+    parser.add_argument("--jitter", type=float, default=0.2, help="Latency spread, fraction of the base")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=100, help="Logs per classify_batch call")
+    parser.add_argument("--bert-batch", action="store_true", help="Use the batch Space endpoint (micro-batching)")
+    parser.add_argument("--llm-pack-size", type=int, default=8)
+    parser.add_argument("--regex-repeat", type=int, default=10)
+    parser.add_argument("--json", help="Write the report as JSON to this path ('-' for stdout)")
+    args = parser.parse_args()
+
+    # Per-log stage logging would dominate the timings
+    logging.basicConfig(level=logging.ERROR)
+
+    results = asyncio.run(run_benchmarks(args))
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "config": {
+            "dataset": Path(args.dataset).name,
+            "logs": len(load_rows(args.dataset, args.limit)),
+            "concurrency": args.concurrency,
+            "bert_latency_ms": args.bert_latency_ms,
+            "llm_latency_ms": args.llm_latency_ms,
+            "jitter": args.jitter,
+            "seed": args.seed,
+            "batch_size": args.batch_size,
+            "bert_batch": args.bert_batch,
+            "llm_pack_size": args.llm_pack_size,
+            "regex_repeat": args.regex_repeat,
+        },
+        "results": results,
+    }
+
+    if args.json == "-":
+        print(json.dumps(report, indent=2))
+        return
+    print_report(report)
+    if args.json:
+        directory = os.path.dirname(args.json)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
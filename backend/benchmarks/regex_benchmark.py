@@ -0,0 +1,144 @@
+"""
+Regex Stage Microbenchmark
+
+Compares the original per-pattern ``re.search`` loop of
+``LogClassifier._classify_with_regex`` against ``CompiledRegexMatcher`` on the
+logs in ``log_classification_system/data/dataset_sampling.csv``, and checks
+that both return identical (category, pattern) pairs. It also times both on
+adversarial lines that pass the literal prefilter but make the plain
+patterns backtrack.
+
+Usage (from backend/):
+    python -m benchmarks.regex_benchmark --repeat 20
+"""
+
+import argparse
+import csv
+import re
+import time
+from pathlib import Path
+
+from regex_engine import CompiledRegexMatcher, DEFAULT_REGEX_PATTERNS
+
+DEFAULT_DATASET = (
+    Path(__file__).resolve().parents[2]
+    / "log_classification_system"
+    / "data"
+    / "dataset_sampling.csv"
+)
+
+
+# re.IGNORECASE matches dotless "ı" against "i"/"I", which str.casefold does not
+NON_ASCII_LINES = [
+    "ERROR fıle not found",
+    "ıNFO nova.compute.manager [req-1] [instance: ab-12] Took 1.5 seconds to spawn",
+]
+
+
+def non_ascii_variants(logs):
+    """Parity cases: the lines above and each log with its i's written as dotless ı"""
+    return NON_ASCII_LINES + [log_text.replace("i", "ı") for log_text in logs]
+
+
+def adversarial_lines(length):
+    """
+    Lines of about ``length`` characters holding every literal of a pattern,
+    but never in matching order, e.g. "plugged VIF INFO network INFO network ..."
+    against ``INFO.*network.*VIF.*plugged``
+    """
+    repeats = {
+        "plugged VIF ": "INFO network ",
+        "[instance: zz] ": "INFO nova.virt.libvirt.driver ",
+        "timeout ": "WARNING _wait_for_boot ",
+    }
+    return [head + tail * (length // len(tail)) for head, tail in repeats.items()]
+
+
+def classify_with_loop(log_text, patterns):
+    """The original Stage 3 loop, kept verbatim as the baseline"""
+    for category, category_patterns in patterns.items():
+        for pattern in category_patterns:
+            if re.search(pattern, log_text, re.IGNORECASE):
+                return category, pattern
+    return None, None
+
+
+def load_logs(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return [row["raw_log_text"] for row in csv.DictReader(f)]
+
+
+def time_run(func, logs, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for log_text in logs:
+            func(log_text)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--dataset", default=str(DEFAULT_DATASET))
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument(
+        "--adversarial-length",
+        type=int,
+        default=2600,
+        help="Length of the adversarial lines (the re.search loop is timed on them too)",
+    )
+    parser.add_argument(
+        "--long-line",
+        type=int,
+        default=0,
+        help="Also append a synthetic line of this many characters",
+    )
+    args = parser.parse_args()
+
+    logs = load_logs(args.dataset)
+    if args.long_line:
+        logs.append("INFO " + "x" * args.long_line)
+
+    matcher = CompiledRegexMatcher(DEFAULT_REGEX_PATTERNS)
+
+    mismatches = [
+        log_text
+        for log_text in logs + non_ascii_variants(logs)
+        if len(log_text) <= matcher.max_line_length
+        and classify_with_loop(log_text, DEFAULT_REGEX_PATTERNS)
+        != matcher.match(log_text)
+    ]
+    if mismatches:
+        raise SystemExit(f"{len(mismatches)} results differ, e.g. {mismatches[0][:120]}")
+
+    total = len(logs) * args.repeat
+    loop_time = time_run(
+        lambda log_text: classify_with_loop(log_text, DEFAULT_REGEX_PATTERNS),
+        logs,
+        args.repeat,
+    )
+    matcher_time = time_run(matcher.match, logs, args.repeat)
+
+    print(f"Logs per run: {len(logs):,} x {args.repeat} repeats = {total:,}")
+    print(f"  re.search loop:      {total / loop_time:12,.0f} logs/s ({loop_time * 1e6 / total:6.2f} us/log)")
+    print(f"  CompiledRegexMatcher:{total / matcher_time:12,.0f} logs/s ({matcher_time * 1e6 / total:6.2f} us/log)")
+    print(f"  Speedup: {loop_time / matcher_time:.2f}x")
+
+    # The loop is only timed at --adversarial-length (it grows much faster than
+    # linearly); the matcher also on lines several times its length cap
+    print(f"Adversarial lines (loop at {args.adversarial_length:,} chars):")
+    long_lines = adversarial_lines(4 * matcher.max_line_length)
+    for log_text, long_text in zip(adversarial_lines(args.adversarial_length), long_lines):
+        if matcher.match(log_text) != classify_with_loop(log_text, DEFAULT_REGEX_PATTERNS):
+            raise SystemExit(f"Adversarial result differs: {log_text[:120]}")
+        loop_time = time_run(
+            lambda line: classify_with_loop(line, DEFAULT_REGEX_PATTERNS), [log_text], 1
+        )
+        matcher_time = time_run(matcher.match, [log_text], 1)
+        long_time = time_run(matcher.match, [long_text], 1)
+        print(
+            f"  {log_text[:30]!r:34} loop {loop_time * 1000:9.1f} ms | matcher {matcher_time * 1000:6.3f} ms,"
+            f" {len(long_text):,} chars {long_time * 1000:6.3f} ms"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Semantic Cache Threshold Benchmark
+
+Measures how the ``SemanticCache`` threshold trades hits against wrong hits
+on ``log_classification_system/data/dataset_sampling.csv``, and checks the
+log pairs the embedding has to get right at the chosen threshold.
+
+The logs (one per masked template, since repeats are answered by the
+template cache first) are replayed in order against a cache holding every
+earlier log with its recorded ``final_category``. For each threshold it
+reports how many lookups would hit and how many of those would return a
+different category. Identical messages are not always labelled alike in
+the CSV, so the wrong-hit rate of near-identical hits (similarity >= 0.99)
+is printed as the noise floor.
+
+Usage (from backend/):
+    python -m benchmarks.semantic_cache_benchmark --threshold 0.75
+"""
+
+import argparse
+import csv
+
+import numpy as np
+
+from benchmarks.regex_benchmark import DEFAULT_DATASET
+from cache import mask_log_template
+from semantic_cache import DEFAULT_THRESHOLD, hashing_embed
+
+# Different events that share most of their text: must stay below the threshold
+DISTINCT_PAIRS = [
+    (
+        "INFO os_vif [None req-f963ff46-211b-44ef-8988-91c46c70690c admin admin] Successfully "
+        "unplugged vif VIFOpenVSwitch(active=False,address=fa:16:3e:70:bb:a1,bridge_name='br-int',"
+        "has_traffic_filtering=True,id=6f675617-afb5-45ff-a332-b5e1d2c3f4a5,network=Network("
+        "4a1f2c3d-0e5b-4c6d-9e8f-1a2b3c4d5e6f),plugin='ovs',port_profile=VIFPortProfileOpenVSwitch,"
+        "preserve_on_delete=False,vif_name='tap6f675617-af')",
+        "INFO os_vif [req-c8862814-e17a-4074-97e5-838df2509f65] Successfully plugged vif "
+        "VIFOpenVSwitch(active=False,address=fa:16:3e:cb:f5:9b,bridge_name='br-int',"
+        "has_traffic_filtering=True,id=54fa3205-e7f4-47c8-8d23-c55d524d7f2d,network=Network("
+        "4a1f2c3d-0e5b-4c6d-9e8f-1a2b3c4d5e6f),plugin='ovs',port_profile=VIFPortProfileOpenVSwitch,"
+        "preserve_on_delete=False,vif_name='tap54fa3205-e7')",
+    ),
+    (
+        "WARNING nova.compute.manager [req-8a28a3f3-5a5e-4c42-bf28-942bb3893c2e] [instance: "
+        "8192614e-4a86-47cc-ae07-2e06dcd54908] Received unexpected event network-vif-unplugged-"
+        "0c4f5e6d-7a8b-4c9d-8e0f-1a2b3c4d5e6f for instance with vm_state building and task_state spawning.",
+        "WARNING nova.compute.manager [req-74085af4-b16b-4663-afec-550c7fae6213] [instance: "
+        "6dfd7677-44fc-4473-8e3b-c80c9afedb95] Received unexpected event network-vif-plugged-"
+        "5d1e5e6d-7a8b-4c9d-8e0f-1a2b3c4d5e6f for instance with vm_state building and task_state spawning.",
+    ),
+]
+
+# The same failure worded differently by different agents: must reach it
+SAME_EVENT_PAIRS = [
+    (
+        "ERROR neutron.plugins.ml2.managers [req-3b8f1c2d-4e5f-4a6b-8c7d-9e0f1a2b3c4d] Failed to "
+        "bind port 0c4f5e6d-7a8b-4c9d-8e0f-1a2b3c4d5e6f on host compute-01 for vnic_type normal "
+        "using segments [{'id': 'e1d2c3b4-a5f6-4e7d-8c9b-0a1f2e3d4c5b', 'network_type': 'vxlan', "
+        "'physical_network': None, 'segmentation_id': 1042}]",
+        "ERROR neutron.plugins.ml2.drivers.openvswitch.agent.ovs_neutron_agent "
+        "[req-77aa1c2d-4e5f-4a6b-8c7d-9e0f1a2b3c4d] Port 5d1e5e6d-7a8b-4c9d-8e0f-1a2b3c4d5e6f "
+        "binding failed on host compute-02: could not bind port for vnic_type normal on segments "
+        "[{'id': '9f3ac3b4-a5f6-4e7d-8c9b-0a1f2e3d4c5b', 'network_type': 'vxlan', "
+        "'physical_network': None, 'segmentation_id': 1077}]",
+    ),
+]
+
+
+def similarity(first, second, dim):
+    vectors = hashing_embed([first, second], dim)
+    return float(vectors[0] @ vectors[1])
+
+
+def check_pairs(threshold, dim):
+    """Print the similarity of each pair; returns the pairs on the wrong side"""
+    failures = []
+    for pairs, should_hit in ((DISTINCT_PAIRS, False), (SAME_EVENT_PAIRS, True)):
+        for first, second in pairs:
+            score = similarity(first, second, dim)
+            ok = (score >= threshold) == should_hit
+            label = "same event" if should_hit else "distinct  "
+            print(f"  {label} {score:.3f} {'ok' if ok else 'WRONG'}  {first[:60]}")
+            if not ok:
+                failures.append(first)
+    return failures
+
+
+def load_rows(path):
+    """One (log, final_category) per masked template, in file order"""
+    seen = set()
+    rows = []
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            if row["final_category"] == "Unclassified":
+                continue
+            template = mask_log_template(row["raw_log_text"])
+            if template not in seen:
+                seen.add(template)
+                rows.append((row["raw_log_text"], row["final_category"]))
+    return rows
+
+
+def replay(rows, dim):
+    """Best similarity to an earlier log, and whether its category agrees, per log"""
+    vectors = hashing_embed([log_text for log_text, _ in rows], dim)
+    categories = [category for _, category in rows]
+    similarities, agrees = [], []
+    for index in range(1, len(rows)):
+        scores = vectors[:index] @ vectors[index]
+        best = int(scores.argmax())
+        similarities.append(float(scores[best]))
+        agrees.append(categories[best] == categories[index])
+    return np.array(similarities), np.array(agrees)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--dataset", default=str(DEFAULT_DATASET))
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--dim", type=int, default=1024)
+    args = parser.parse_args()
+
+    print(f"Pairs at threshold {args.threshold}:")
+    failures = check_pairs(args.threshold, args.dim)
+
+    rows = load_rows(args.dataset)
+    similarities, agrees = replay(rows, args.dim)
+    print(f"Lookups: {len(similarities):,} distinct templates after the first")
+    for threshold in [0.99] + [round(value, 2) for value in np.arange(0.60, 0.951, 0.05)]:
+        hits = similarities >= threshold
+        wrong = int((hits & ~agrees).sum())
+        rate = wrong / hits.sum() if hits.any() else 0.0
+        note = "  (noise floor)" if threshold == 0.99 else ""
+        note = "  <- threshold" if threshold == args.threshold else note
+        print(f"  >= {threshold:.2f}: {int(hits.sum()):4d} hits, {wrong:3d} wrong ({rate:.1%}){note}")
+
+    if failures:
+        raise SystemExit(f"{len(failures)} pairs on the wrong side of {args.threshold}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+"""
+Stand-in External Services
+
+One local HTTP server that impersonates both external dependencies of the
+classifier, for load tests of the real app:
+
+- the BERT Hugging Face Space, speaking enough of the Gradio queue protocol
+  for ``gradio_client.Client`` (``/predict`` and ``/predict_batch``), under
+  at the root - point ``BERT_SPACE_URL`` at it
+- the Groq chat completions API (OpenAI-compatible), under ``/groq`` - point
+  ``GROQ_API_BASE`` at it
+
+Answers are the labels recorded in ``dataset_sampling.csv`` (as in
+``pipeline_benchmark``). Each service has a configurable latency, jitter,
+slow-call tail and error rate.
+
+Usage (from backend/):
+    python -m benchmarks.stand_ins --port 8600 --bert-latency-ms 25 --llm-latency-ms 250
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import time
+import uuid
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from benchmarks.pipeline_benchmark import (
+    DEFAULT_DATASET,
+    Latency,
+    RecordedBertSpace,
+    RecordedLlm,
+    load_rows,
+    recorded_answers,
+)
+
+# Gradio app description for gradio_client: the v0 SSE queue protocol keeps
+# the handshake to one streamed GET plus one POST per prediction
+GRADIO_CONFIG = {
+    "version": "3.50.2",
+    "protocol": "sse",
+    "connect_heartbeat": False,
+    "components": [
+        {"id": 1, "type": "textbox", "props": {}},
+        {"id": 2, "type": "label", "props": {}},
+        {"id": 3, "type": "json", "props": {}},
+        {"id": 4, "type": "json", "props": {}},
+    ],
+    "dependencies": [
+        {"api_name": "predict", "inputs": [1], "outputs": [2], "backend_fn": True, "cancels": []},
+        {"api_name": "predict_batch", "inputs": [3], "outputs": [4], "backend_fn": True, "cancels": []},
+    ],
+}
+
+
+def _parameter(name, python_type):
+    return {
+        "label": name,
+        "parameter_name": name,
+        "parameter_has_default": False,
+        "parameter_default": None,
+        "type": {},
+        "python_type": {"type": python_type, "description": ""},
+        "component": "Textbox",
+        "example_input": "",
+    }
+
+
+GRADIO_INFO = {
+    "named_endpoints": {
+        "/predict": {"parameters": [_parameter("log_text", "str")], "returns": []},
+        "/predict_batch": {"parameters": [_parameter("log_texts", "List[str]")], "returns": []},
+    },
+    "unnamed_endpoints": {},
+}
+
+
+class Fault:
+    """Latency with a slow tail and random failures for one stand-in service"""
+
+    def __init__(self, latency_ms, jitter, slow_rate, slow_ms, error_rate, seed):
+        self.latency = Latency(latency_ms, jitter, seed)
+        self.slow_rate = slow_rate
+        self.slow_ms = slow_ms
+        self.error_rate = error_rate
+        self.random = random.Random(seed + 1000)
+        self.calls = 0
+        self.errors = 0
+
+    async def delay(self):
+        """Sleep for one call; returns False if the call should fail"""
+        self.calls += 1
+        seconds = self.latency.seconds()
+        if self.slow_rate and self.random.random() < self.slow_rate:
+            seconds = self.slow_ms / 1000
+        await asyncio.sleep(seconds)
+        if self.error_rate and self.random.random() < self.error_rate:
+            self.errors += 1
+            return False
+        return True
+
+
+def create_app(bert_space, llm, bert_fault, llm_fault):
+    app = FastAPI(title="Stand-in BERT Space and Groq API")
+    # event_id -> future resolved with the POSTed prediction payload
+    pending = {}
+
+    @app.get("/config")
+    async def gradio_config():
+        return GRADIO_CONFIG
+
+    @app.get("/info")
+    async def gradio_info():
+        return GRADIO_INFO
+
+    @app.get("/queue/join")
+    async def gradio_join(fn_index: int, session_hash: str = ""):
+        event_id = uuid.uuid4().hex
+        payload = asyncio.get_running_loop().create_future()
+        pending[event_id] = payload
+
+        async def events():
+            try:
+                yield f"data: {json.dumps({'msg': 'send_data', 'event_id': event_id})}\n\n"
+                data = (await payload)["data"]
+                if not await bert_fault.delay():
+                    output = {"error": "Stand-in Space error"}
+                    message = {"msg": "process_completed", "output": output, "success": False}
+                else:
+                    answer = bert_space.predict(data[0])
+                    message = {"msg": "process_completed", "output": {"data": [answer]}, "success": True}
+                yield f"data: {json.dumps(message)}\n\n"
+            finally:
+                pending.pop(event_id, None)
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.post("/queue/data")
+    async def gradio_data(request: Request):
+        body = await request.json()
+        payload = pending.get(body.get("event_id"))
+        if payload is None or payload.done():
+            return JSONResponse({"detail": "Unknown event"}, status_code=404)
+        payload.set_result(body)
+        return {"msg": "ok"}
+
+    @app.post("/reset")
+    async def gradio_reset():
+        return {"success": True}
+
+    completion_ids = itertools.count()
+
+    @app.post("/groq/openai/v1/chat/completions")
+    async def groq_chat(request: Request):
+        body = await request.json()
+        if not await llm_fault.delay():
+            return JSONResponse(
+                {"error": {"message": "Stand-in Groq error", "type": "internal_server_error"}},
+                status_code=500,
+            )
+        content = llm.reply(body["messages"][-1]["content"])
+        return {
+            "id": f"chatcmpl-{next(completion_ids)}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "stand-in"),
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                    "logprobs": None,
+                }
+            ],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        }
+
+    @app.get("/stats")
+    async def stats():
+        return {
+            "bert": {"calls": bert_fault.calls, "errors": bert_fault.errors},
+            "llm": {"calls": llm_fault.calls, "errors": llm_fault.errors},
+        }
+
+    return app
+
+
+def prompt_templates():
+    """The classifier's single and packed LLM prompt templates"""
+    os.environ.setdefault("GROQ_API_KEY", "stand-in")
+    from classifier import LogClassifier
+
+    classifier = LogClassifier()
+    asyncio.run(classifier._load_llm_client())
+    return classifier.llm_prompt_template, classifier.llm_packed_prompt_template, classifier
+
+
+def add_fault_arguments(parser, service, latency_ms):
+    parser.add_argument(f"--{service}-latency-ms", type=float, default=latency_ms)
+    parser.add_argument(f"--{service}-slow-rate", type=float, default=0.0, help="Fraction of slow calls")
+    parser.add_argument(f"--{service}-slow-ms", type=float, default=2000.0)
+    parser.add_argument(f"--{service}-error-rate", type=float, default=0.0, help="Fraction of failed calls")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8600)
+    parser.add_argument("--dataset", default=str(DEFAULT_DATASET))
+    parser.add_argument("--jitter", type=float, default=0.2, help="Latency spread, fraction of the base")
+    parser.add_argument("--seed", type=int, default=42)
+    add_fault_arguments(parser, "bert", 25.0)
+    add_fault_arguments(parser, "llm", 250.0)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    rows = load_rows(args.dataset)
+    prompt_template, packed_prompt_template, classifier = prompt_templates()
+    label_ids = {category: label for label, category in classifier.bert_label_mapping.items()}
+
+    bert_space = RecordedBertSpace(
+        recorded_answers(rows, "bert_label", "bert_confidence", 0.0), label_ids, Latency(0, 0, 0)
+    )
+    llm = RecordedLlm(
+        recorded_answers(rows, "llm_category", "llm_confidence", 0.0),
+        prompt_template,
+        packed_prompt_template,
+        classifier._prompt_log,
+        Latency(0, 0, 0),
+    )
+    bert_fault = Fault(
+        args.bert_latency_ms, args.jitter, args.bert_slow_rate, args.bert_slow_ms, args.bert_error_rate, args.seed
+    )
+    llm_fault = Fault(
+        args.llm_latency_ms, args.jitter, args.llm_slow_rate, args.llm_slow_ms, args.llm_error_rate, args.seed + 1
+    )
+
+    app = create_app(bert_space, llm, bert_fault, llm_fault)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
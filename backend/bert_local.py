@@ -0,0 +1,259 @@
+# backend/bert_local.py
+
+"""
+Local BERT Inference Module
+
+In-process CPU inference for the fine-tuned DistilBERT exported by
+notebooks/model_export.ipynb (``save_pretrained`` model + tokenizer), as an
+alternative to calling the Hugging Face Space. Two runtimes are supported:
+
+- ``torch``: loads the exported directory with transformers
+- ``onnx``:  runs ``model.onnx`` from the same directory with ONNX Runtime
+  (see ``export_onnx``)
+
+Inputs are tokenized without padding, grouped into length buckets and padded
+only up to their bucket, so short log lines do not pay for the longest one
+in the batch.
+
+torch, transformers and onnxruntime are optional dependencies and are only
+imported when a local engine is loaded.
+"""
+
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LENGTH_BUCKETS = (16, 32, 64, 128, 256)
+ONNX_MODEL_FILE = "model.onnx"
+
+
+class LocalBertEngine:
+    """
+    Sequence classifier returning (label, confidence) per input text.
+
+    Labels come from the model config's ``id2label`` (either the category
+    names written by model_export.ipynb or ``LABEL_<n>``), so callers can keep
+    mapping them through ``bert_label_mapping``.
+    """
+
+    def __init__(
+        self,
+        model_path: str,
+        runtime: str = "torch",
+        max_length: int = 128,
+        length_buckets: Sequence[int] = DEFAULT_LENGTH_BUCKETS,
+        batch_size: int = 32,
+        num_threads: Optional[int] = None,
+    ):
+        if runtime not in ("torch", "onnx"):
+            raise ValueError(f"Unsupported BERT runtime: {runtime}")
+
+        self.model_path = Path(model_path)
+        self.runtime = runtime
+        self.max_length = max_length
+        self.length_buckets = sorted(
+            {bucket for bucket in length_buckets if bucket < max_length} | {max_length}
+        )
+        self.batch_size = batch_size
+        self.num_threads = num_threads
+
+        self.tokenizer = None
+        self.model = None
+        self.session = None
+        self.id2label: Dict[int, str] = {}
+
+    def load(self, start_session: bool = True) -> None:
+        """
+        Load the tokenizer and model (blocking - run in a worker thread).
+
+        With ``start_session=False`` the ONNX Runtime session, whose thread
+        pools do not survive a fork, is left to ``after_fork``.
+        """
+        from transformers import AutoConfig, AutoTokenizer
+
+        self.tokenizer = AutoTokenizer.from_pretrained(self.model_path)
+        config = AutoConfig.from_pretrained(self.model_path)
+        self.id2label = {int(i): label for i, label in config.id2label.items()}
+
+        if self.runtime == "onnx":
+            if start_session:
+                self._start_session()
+        else:
+            import torch
+            from transformers import AutoModelForSequenceClassification
+
+            if self.num_threads:
+                torch.set_num_threads(self.num_threads)
+            self.model = AutoModelForSequenceClassification.from_pretrained(self.model_path)
+            self.model.eval()
+
+        logger.info(f"Local BERT engine loaded ({self.runtime}) from {self.model_path}")
+
+    def _start_session(self) -> None:
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        if self.num_threads:
+            options.intra_op_num_threads = self.num_threads
+        self.session = ort.InferenceSession(
+            str(self.model_path / ONNX_MODEL_FILE),
+            sess_options=options,
+            providers=["CPUExecutionProvider"],
+        )
+
+    def after_fork(self) -> None:
+        """
+        Finish an engine loaded before fork in a worker process (blocking).
+        The torch weights are shared copy-on-write; the ONNX session is
+        created here, per worker.
+        """
+        if self.runtime == "onnx":
+            if self.session is None:
+                self._start_session()
+        elif self.num_threads:
+            import torch
+
+            torch.set_num_threads(self.num_threads)
+
+    def _bucket_for(self, length: int) -> int:
+        for bucket in self.length_buckets:
+            if length <= bucket:
+                return bucket
+        return self.length_buckets[-1]
+
+    def _logits(self, input_ids: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        if self.runtime == "onnx":
+            input_names = {item.name for item in self.session.get_inputs()}
+            feed = {"input_ids": input_ids, "attention_mask": attention_mask}
+            return self.session.run(
+                None, {name: value for name, value in feed.items() if name in input_names}
+            )[0]
+
+        import torch
+
+        with torch.inference_mode():
+            outputs = self.model(
+                input_ids=torch.from_numpy(input_ids),
+                attention_mask=torch.from_numpy(attention_mask),
+            )
+        return outputs.logits.numpy()
+
+    def predict_batch(self, texts: List[str]) -> List[Tuple[str, float]]:
+        """Classify texts, returning (label, softmax confidence) in input order"""
+        if not texts:
+            return []
+
+        encoded = self.tokenizer(
+            list(texts), truncation=True, max_length=self.max_length, padding=False
+        )["input_ids"]
+
+        buckets: Dict[int, List[int]] = {}
+        for index, ids in enumerate(encoded):
+            buckets.setdefault(self._bucket_for(len(ids)), []).append(index)
+
+        predictions: List[Optional[Tuple[str, float]]] = [None] * len(texts)
+        pad_id = self.tokenizer.pad_token_id or 0
+
+        for bucket, indices in buckets.items():
+            for start in range(0, len(indices), self.batch_size):
+                chunk = indices[start : start + self.batch_size]
+                input_ids = np.full((len(chunk), bucket), pad_id, dtype=np.int64)
+                attention_mask = np.zeros((len(chunk), bucket), dtype=np.int64)
+                for row, index in enumerate(chunk):
+                    ids = encoded[index]
+                    input_ids[row, : len(ids)] = ids
+                    attention_mask[row, : len(ids)] = 1
+
+                logits = self._logits(input_ids, attention_mask).astype(np.float64)
+                logits -= logits.max(axis=1, keepdims=True)
+                probabilities = np.exp(logits)
+                probabilities /= probabilities.sum(axis=1, keepdims=True)
+
+                best = probabilities.argmax(axis=1)
+                for row, index in enumerate(chunk):
+                    class_id = int(best[row])
+                    predictions[index] = (
+                        self.id2label.get(class_id, f"LABEL_{class_id}"),
+                        float(probabilities[row, class_id]),
+                    )
+
+        return predictions
+
+
+def export_onnx(model_path: str, output_path: Optional[str] = None, opset: int = 17) -> Path:
+    """Export a saved sequence-classification model to ONNX for the onnx runtime"""
+    import torch
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+    model_dir = Path(model_path)
+    output = Path(output_path) if output_path else model_dir / ONNX_MODEL_FILE
+
+    tokenizer = AutoTokenizer.from_pretrained(model_dir)
+    model = AutoModelForSequenceClassification.from_pretrained(model_dir)
+    model.eval()
+
+    sample = tokenizer(["INFO nova.compute.manager sample"], return_tensors="pt")
+    torch.onnx.export(
+        model,
+        (sample["input_ids"], sample["attention_mask"]),
+        str(output),
+        input_names=["input_ids", "attention_mask"],
+        output_names=["logits"],
+        dynamic_axes={
+            "input_ids": {0: "batch", 1: "sequence"},
+            "attention_mask": {0: "batch", 1: "sequence"},
+            "logits": {0: "batch"},
+        },
+        opset_version=opset,
+        dynamo=False,
+    )
+    return output
+
+
+def save_random_model(
+    output_path: str, labels: Optional[Sequence[str]] = None, seed: int = 0
+) -> Path:
+    """
+    Save a tiny randomly initialised DistilBERT classifier and tokenizer.
+
+    Useful for exercising the local backend offline: nothing is downloaded,
+    and the result loads exactly like the exported fine-tuned model.
+    """
+    import torch
+    from transformers import (
+        DistilBertConfig,
+        DistilBertForSequenceClassification,
+        DistilBertTokenizerFast,
+    )
+
+    labels = list(labels or [f"LABEL_{i}" for i in range(6)])
+    output = Path(output_path)
+    output.mkdir(parents=True, exist_ok=True)
+
+    vocab = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"]
+    vocab += list("abcdefghijklmnopqrstuvwxyz0123456789.-_:[]()")
+    vocab += ["info", "warning", "error", "nova", "compute", "manager", "instance", "vif", "port"]
+    vocab_file = output / "vocab.txt"
+    vocab_file.write_text("\n".join(vocab) + "\n")
+
+    tokenizer = DistilBertTokenizerFast(vocab_file=str(vocab_file))
+    tokenizer.save_pretrained(output)
+
+    torch.manual_seed(seed)
+    config = DistilBertConfig(
+        vocab_size=len(vocab),
+        dim=32,
+        hidden_dim=64,
+        n_layers=2,
+        n_heads=2,
+        max_position_embeddings=512,
+        num_labels=len(labels),
+        id2label=dict(enumerate(labels)),
+        label2id={label: i for i, label in enumerate(labels)},
+    )
+    DistilBertForSequenceClassification(config).save_pretrained(output)
+    return output
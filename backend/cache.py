@@ -0,0 +1,113 @@
+# backend/cache.py
+
+"""
+Classification Cache Module
+
+OpenStack logs repeat the same message with different request IDs, instance
+UUIDs, IPs, timestamps and counters. ``mask_log_template`` reduces a log to a
+canonical template with those variable fields masked, and ``TemplateCache``
+keeps BERT/LLM results keyed on that template so repeats skip the external
+calls.
+"""
+
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+# Applied in order - specific formats before the generic number mask
+TEMPLATE_MASKS = [
+    (re.compile(r"\breq-[0-9a-f]{8}(?:-[0-9a-f]{4}){3}-[0-9a-f]{12}\b", re.IGNORECASE), "req-<ID>"),
+    (re.compile(r"\b[0-9a-f]{8}(?:-[0-9a-f]{4}){3}-[0-9a-f]{12}\b", re.IGNORECASE), "<UUID>"),
+    (re.compile(r"\b[0-9a-f]{32}\b", re.IGNORECASE), "<ID>"),
+    (re.compile(r"\b(tap|qvo|qvb|qbr)[0-9a-f]{8}-[0-9a-f]{2}\b", re.IGNORECASE), r"\1<DEV>"),
+    (
+        re.compile(r"\b\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?(?:Z|[+-]\d{2}:?\d{2})?\b"),
+        "<TS>",
+    ),
+    (re.compile(r"\b\d{1,3}(?:\.\d{1,3}){3}(?::\d+)?\b"), "<IP>"),
+    (re.compile(r"\b(?:[0-9a-f]{2}:){5}[0-9a-f]{2}\b", re.IGNORECASE), "<MAC>"),
+    (re.compile(r"\b0x[0-9a-f]+\b", re.IGNORECASE), "<HEX>"),
+    (re.compile(r"\b\d+(?:\.\d+)?\b"), "<NUM>"),
+]
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def mask_log_template(log_text: str) -> str:
+    """Return the canonical template of a log line with variable fields masked"""
+    template = log_text
+    for pattern, replacement in TEMPLATE_MASKS:
+        template = pattern.sub(replacement, template)
+    return _WHITESPACE.sub(" ", template).strip()
+
+
+class TemplateCache:
+    """
+    Bounded LRU cache with per-entry TTL for classification results.
+
+    Values are the result dicts produced by the classifier stages
+    ({"category", "confidence", "stage"}).
+    """
+
+    def __init__(self, max_size: int = 10000, ttl_seconds: float = 3600.0):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, template: str) -> Optional[Dict[str, Any]]:
+        """Return the cached value for a template, or None"""
+        entry = self._entries.get(template)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        stored_at, value = entry
+        if time.monotonic() - stored_at > self.ttl_seconds:
+            del self._entries[template]
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(template)
+        self.hits += 1
+        return value
+
+    def put(self, template: str, value: Dict[str, Any], age_seconds: float = 0.0) -> None:
+        """
+        Store a value, evicting the least recently used entry when full.
+        ``age_seconds`` counts against the TTL, for values stored earlier
+        elsewhere (e.g. loaded from the template store).
+        """
+        if self.max_size <= 0:
+            return
+
+        self._entries[template] = (time.monotonic() - age_seconds, value)
+        self._entries.move_to_end(template)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
@@ -0,0 +1,99 @@
+# backend/circuit.py
+
+"""
+Circuit Breaker Module
+
+Guards calls to an external stage that can go away (the BERT Space sleeping
+or down). After ``failure_threshold`` consecutive failures the breaker opens
+and callers skip the stage immediately instead of each waiting for the same
+failure. Once ``reset_timeout_seconds`` have passed it turns half-open and
+lets a single probe call through: success closes it again, failure re-opens
+it for another timeout. A probe cancelled before it reports back (a lost
+hedge, a caller's deadline) releases the slot for the next caller.
+"""
+
+import time
+from typing import Any, Dict
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with single-probe half-open recovery"""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout_seconds: float = 30.0):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout_seconds = reset_timeout_seconds
+
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_started_at = None
+
+        self.opens = 0
+        self.rejected = 0
+
+    def allow(self) -> bool:
+        """Return True if a call may go ahead now"""
+        if self.state == CLOSED:
+            return True
+
+        now = time.monotonic()
+        if self.state == OPEN:
+            if now - self._opened_at < self.reset_timeout_seconds:
+                self.rejected += 1
+                return False
+            self.state = HALF_OPEN
+            self._probe_started_at = None
+
+        # Half-open: one probe at a time; a probe that never reported back
+        # is given up on after another reset timeout
+        if (
+            self._probe_started_at is not None
+            and now - self._probe_started_at < self.reset_timeout_seconds
+        ):
+            self.rejected += 1
+            return False
+        self._probe_started_at = now
+        return True
+
+    def release_probe(self) -> None:
+        """Free the half-open probe slot of a call cancelled before it reported back"""
+        if self.state == HALF_OPEN:
+            self._probe_started_at = None
+
+    def record_success(self) -> None:
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self._probe_started_at = None
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            self.trip()
+
+    def trip(self) -> None:
+        """Open the breaker now, e.g. when the stage is known to be down"""
+        if self.state != OPEN:
+            self.opens += 1
+        self.state = OPEN
+        self._opened_at = time.monotonic()
+        self._probe_started_at = None
+
+    def retry_in_seconds(self) -> float:
+        """Seconds until an open breaker lets a probe through"""
+        if self.state != OPEN:
+            return 0.0
+        return max(0.0, self.reset_timeout_seconds - (time.monotonic() - self._opened_at))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "failure_threshold": self.failure_threshold,
+            "reset_timeout_seconds": self.reset_timeout_seconds,
+            "opens": self.opens,
+            "rejected": self.rejected,
+        }
@@ -15,22 +15,65 @@ import os
 import re
 import json
 import asyncio
+import inspect
 import random
+import time
 import logging
-from typing import Dict, Any, Optional, Tuple
+import threading
+from typing import Dict, Any, List, Optional, Tuple
 
+import httpx
 from langchain_groq import ChatGroq
 from langchain.schema import HumanMessage
 from langchain.prompts import PromptTemplate
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, ValidationError
 from dotenv import load_dotenv
+from batching import MicroBatcher
+from bert_local import LocalBertEngine
+from circuit import CircuitBreaker, HALF_OPEN
+from compaction import compact_log
+from metrics import ClassifierMetrics
+from cache import TemplateCache, mask_log_template
+from semantic_cache import SemanticCache
+from singleflight import SingleFlight
+from stats import StatsAggregator
+from store import TemplateStore
+from worker_snapshots import WorkerSnapshots
+from regex_engine import (
+    CompiledRegexMatcher,
+    DEFAULT_MAX_LINE_LENGTH,
+    DEFAULT_REGEX_PATTERNS,
+)
 import warnings
 
 warnings.filterwarnings("ignore")
 logger = logging.getLogger(__name__)
 
+BERT_SPACE_URL = "https://kxshrx-infrnce-private-api.hf.space"
+
+# Map abbreviated LLM categories to full names
+LLM_CATEGORY_MAPPING = {
+    "SysOps": "System_Operations",
+    "InstMgmt": "Instance_Management",
+    "NetOps": "Network_Operations",
+    "ResMgmt": "Resource_Management",
+    "SchedOps": "Scheduler_Operations",
+    "BootErr": "Boot_Timeout_Errors",
+    "NetErr": "Network_Connection_Errors",
+    "FileErr": "File_System_Errors",
+    "ConfigErr": "Configuration_Errors",
+    "ResErr": "Resource_Allocation_Errors",
+    "SvcErr": "Service_Communication_Errors",
+}
+
+# Where a JSON object or array may start inside a chatty LLM reply
+JSON_START = re.compile(r"[{\[]")
+
+
 class JourneyStep:
     """Represents a step in the classification journey"""
+    __slots__ = ("stage", "status", "details")
+
     def __init__(self, stage: str, status: str, details: str):
         self.stage = stage
         self.status = status
@@ -43,13 +86,15 @@ class LogClassification(BaseModel):
     """Pydantic model for LLM log classification"""
     category: str = Field(..., description="Classification category")
     confidence: float = Field(..., ge=0.0, le=1.0, description="Confidence score")
-    reasoning: str = Field(..., description="Brief explanation")
+    reasoning: str = Field("Classified by LLM", description="Brief explanation")
 
 class LogClassifier:
     """
     Hybrid Log Classifier implementing the 3-stage pipeline
     """
     def __init__(self):
+        load_dotenv()
+
         self.is_initialized = False
         self.regex_loaded = False
         self.bert_loaded = False
@@ -57,14 +102,31 @@ class LogClassifier:
 
         # Model components
         self.regex_patterns = {}
+        self.regex_matcher = None
+        self.bert_engine = None
+        self.bert_batcher = None
+        self.gradio_client = None
+        self._gradio_client_lock = threading.Lock()
         self.llm_client = None
+        self.llm_http_client = None
         self.llm_prompt_template = None
+        self.llm_packed_prompt_template = None
 
         # Configuration - based on your notebook
         self.bert_confidence_threshold = 0.4
-        self.llm_max_tokens = 120
+        self.regex_max_line_length = DEFAULT_MAX_LINE_LENGTH
         self.llm_temperature = 0.3
 
+        # LLM classification replies are a two-field JSON object, so a tight
+        # output cap; log generation still needs room for a full log line
+        self.llm_max_tokens = int(os.getenv("LLM_MAX_TOKENS", "40"))
+        self.llm_generation_max_tokens = 120
+        # Approximate token budget of a compacted log in the prompt; 0 keeps
+        # the raw log cut at 400 characters
+        self.llm_prompt_token_budget = int(os.getenv("LLM_PROMPT_TOKEN_BUDGET", "96"))
+        # Ask the provider for JSON mode, so replies parse without scraping
+        self.llm_structured_output = os.getenv("LLM_STRUCTURED_OUTPUT", "true").lower() not in ("0", "false", "no")
+
         # BERT Label mapping from your notebook - exact mapping from training
         self.bert_label_mapping = {
             "LABEL_0": "Error_Handling",
@@ -75,7 +137,102 @@ class LogClassifier:
             "LABEL_5": "System_Operations"
         }
 
-        load_dotenv()
+        # BERT backend: "gradio" (Hugging Face Space) or "local" (in-process CPU)
+        self.bert_backend = os.getenv("BERT_BACKEND", "gradio").lower()
+        # Space URL, overridable e.g. to point at a local stand-in for load tests
+        self.bert_space_url = os.getenv("BERT_SPACE_URL", BERT_SPACE_URL)
+        # Optional batch-capable Space endpoint, e.g. "/predict_batch"
+        self.bert_batch_api_name = os.getenv("BERT_BATCH_API_NAME")
+
+        # Space calls: hard per-call deadline, and a breaker that skips BERT
+        # while the Space keeps failing
+        self.bert_timeout_seconds = float(os.getenv("BERT_TIMEOUT_SECONDS", "5"))
+        self.bert_warmup_timeout_seconds = float(os.getenv("BERT_WARMUP_TIMEOUT_SECONDS", "30"))
+        self.bert_breaker = CircuitBreaker(
+            failure_threshold=int(os.getenv("BERT_BREAKER_FAILURES", "5")),
+            reset_timeout_seconds=float(os.getenv("BERT_BREAKER_RESET_SECONDS", "30")),
+        )
+
+        # Batch classification - bounded fan-out to the external stages
+        self.bert_max_concurrency = int(os.getenv("BERT_MAX_CONCURRENCY", "8"))
+        self.bert_semaphore = asyncio.Semaphore(self.bert_max_concurrency)
+
+        # LLM calls - async client, at most llm_max_concurrency requests in flight
+        self.llm_max_concurrency = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+        self.llm_timeout_seconds = float(os.getenv("LLM_TIMEOUT_SECONDS", "20"))
+        self.llm_keepalive_seconds = float(os.getenv("LLM_KEEPALIVE_SECONDS", "60"))
+        self.llm_semaphore = asyncio.Semaphore(self.llm_max_concurrency)
+        # Up to this many fallback logs share one packed LLM prompt (1 disables packing)
+        self.llm_pack_size = int(os.getenv("LLM_PACK_SIZE", "8"))
+
+        # Requests with a deadline_ms start the LLM speculatively if BERT has
+        # not answered after this long (or half the deadline, if sooner)
+        self.hedge_delay_ms = float(os.getenv("HEDGE_DELAY_MS", "300"))
+
+        # Template-keyed cache in front of the BERT and LLM stages
+        self.template_cache = TemplateCache(
+            max_size=int(os.getenv("TEMPLATE_CACHE_SIZE", "10000")),
+            ttl_seconds=float(os.getenv("TEMPLATE_CACHE_TTL_SECONDS", "3600")),
+        )
+        # Template cache persisted across restarts ("" disables), optionally
+        # seeded from a labelled CSV such as dataset_sampling.csv
+        self.template_store = None
+        self.template_cache_warmed = False
+        self.template_store_path = os.getenv("TEMPLATE_STORE_PATH", "data/template_store.db")
+        self.template_store_seed_csv = os.getenv("TEMPLATE_STORE_SEED_CSV")
+
+        # Similarity cache of LLM verdicts for logs worded differently
+        self.semantic_cache = SemanticCache(
+            max_size=int(os.getenv("SEMANTIC_CACHE_SIZE", "5000")),
+            threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.75")),
+            dim=int(os.getenv("SEMANTIC_CACHE_DIM", "1024")),
+        )
+
+        # Concurrent requests for the same log template share one BERT/LLM run
+        self.single_flight = SingleFlight()
+
+        # Running statistics over every classified log (GET /api/stats)
+        self.stats = StatsAggregator()
+
+        # Prometheus-style latency, outcome and saturation metrics (GET /metrics)
+        self.metrics = ClassifierMetrics(
+            executor_queue_depth=self._executor_queue_depth,
+            bert_queue_depth=lambda: self.bert_batcher.queue_depth() if self.bert_batcher else 0,
+            single_flight_in_flight=lambda: len(self.single_flight),
+        )
+
+        # Under serve.py, stats and metrics published for the other workers
+        self.worker_snapshots = None
+        self.worker_snapshot_dir = os.getenv("WORKER_SNAPSHOT_DIR")
+        self.worker_snapshot_seconds = float(os.getenv("WORKER_SNAPSHOT_SECONDS", "2"))
+
+    def preload(self):
+        """
+        Load the fork-safe components before forking workers (blocking)
+
+        Compiles the regex patterns, loads the local BERT weights and warms
+        the template cache from the template store, so worker processes
+        forked afterwards share them copy-on-write. ``initialize`` in each
+        worker then skips these and only opens its own clients, threads
+        and connections.
+        """
+        self._compile_regex_patterns()
+        if self.bert_backend == "local":
+            engine = self._create_local_bert_engine()
+            if engine:
+                try:
+                    engine.load(start_session=False)
+                    self.bert_engine = engine
+                except Exception as e:
+                    logger.error(f"Failed to preload local BERT engine: {e}")
+        if self.template_store_path:
+            try:
+                store = self._create_template_store()
+                store.open()
+                self._warm_template_cache(store)
+                store.disconnect()
+            except Exception as e:
+                logger.error(f"Failed to preload template store: {e}")
 
     async def initialize(self):
         """Initialize all models and components"""
@@ -84,40 +241,70 @@ class LogClassifier:
                 self._load_regex_patterns(),
                 self._load_bert_api_client(),
                 self._load_llm_client(),
+                self._load_template_store(),
             )
+            if self.worker_snapshot_dir:
+                self.worker_snapshots = WorkerSnapshots(
+                    self.worker_snapshot_dir,
+                    self._worker_snapshot,
+                    interval_seconds=self.worker_snapshot_seconds,
+                )
+                self.worker_snapshots.start()
             self.is_initialized = True
             logger.info("Classifier initialized successfully.")
         except Exception as e:
             logger.error(f"Failed to initialize classifier: {e}")
             raise
 
+    async def shutdown(self):
+        """Release background resources"""
+        if self.bert_batcher:
+            await self.bert_batcher.close()
+        if self.llm_http_client:
+            await self.llm_http_client.aclose()
+        if self.template_store:
+            await self.template_store.close()
+        if self.worker_snapshots:
+            await self.worker_snapshots.close()
+
+    def _worker_snapshot(self) -> Dict[str, Any]:
+        return {"metrics": self.metrics.registry.samples(), "stats": self.stats.state()}
+
+    async def _other_worker_snapshots(self) -> List[Dict[str, Any]]:
+        if not self.worker_snapshots:
+            return []
+        return await asyncio.to_thread(self.worker_snapshots.others)
+
+    async def stats_report(self, top_n: int = 15) -> Dict[str, Any]:
+        """``GET /api/stats``: this worker's statistics plus the other workers' latest"""
+        others = await self._other_worker_snapshots()
+        if not others:
+            return self.stats.report(top_n=top_n)
+        combined = StatsAggregator(self.stats.histogram_bins)
+        for state in [self.stats.state()] + [snapshot["stats"] for snapshot in others]:
+            combined.merge(state)
+        return combined.report(top_n=top_n)
+
+    async def render_metrics(self) -> str:
+        """``GET /metrics``: this worker's samples plus the other workers' latest"""
+        others = await self._other_worker_snapshots()
+        return self.metrics.render(snapshot["metrics"] for snapshot in others)
+
     async def _load_regex_patterns(self):
         """Load regex patterns for Stage 3 classification"""
+        if not self.regex_loaded:
+            self._compile_regex_patterns()
+
+    def _compile_regex_patterns(self):
         try:
             # Based on your notebook's regex patterns
             self.regex_patterns = {
-                "System_Operations": [
-                    r"INFO nova\.virt\.libvirt\.driver.*?\[instance: [a-f0-9\-]+\].*",
-                ],
-                "Instance_Management": [
-                    r"INFO nova\.compute\.manager.*?\[instance: [a-f0-9\-]+\].*",
-                ],
-                "Instance_Management_System": [
-                    r"INFO nova\.compute\.manager \[None req-.*?\].*?\[instance: [a-f0-9\-]+\].*",
-                ],
-                "Network_Operations": [
-                    r"INFO.*network.*VIF.*plugged.*",
-                    r"INFO.*neutron.*port.*",
-                ],
-                "Boot_Timeout_Errors": [
-                    r"WARNING.*_wait_for_boot.*timeout",
-                    r"ERROR.*boot.*timeout",
-                ],
-                "File_System_Errors": [
-                    r"ERROR.*file not found",
-                    r"ERROR.*No such file or directory",
-                ],
+                category: list(patterns)
+                for category, patterns in DEFAULT_REGEX_PATTERNS.items()
             }
+            self.regex_matcher = CompiledRegexMatcher(
+                self.regex_patterns, max_line_length=self.regex_max_line_length
+            )
             self.regex_loaded = True
             logger.info("Regex patterns loaded successfully.")
         except Exception as e:
@@ -125,10 +312,12 @@ class LogClassifier:
             raise
 
     async def _load_bert_api_client(self):
-        """Initialize the BERT Gradio client"""
+        """Initialize the BERT Gradio client, or the local engine if configured"""
+        if self.bert_backend == "local":
+            await self._load_local_bert_engine()
+            return
+
         try:
-            # We'll initialize the client lazily in _classify_with_bert
-            # Just check that we have the token
             hf_token = os.getenv("HF_API_TOKEN")
             if not hf_token:
                 logger.warning("HF_API_TOKEN not found. BERT classification will be unavailable.")
@@ -136,11 +325,72 @@ class LogClassifier:
                 return
             
             self.bert_loaded = True
-            logger.info("BERT Gradio client ready to initialize.")
-            
+            if self.bert_batch_api_name:
+                self.bert_batcher = self._create_bert_batcher(
+                    max_concurrent_batches=self.bert_max_concurrency
+                )
+
         except Exception as e:
             logger.error(f"Failed to prepare BERT client: {e}")
             self.bert_loaded = False
+            return
+
+        # Connect now so the first request does not pay for it
+        try:
+            await asyncio.wait_for(
+                asyncio.to_thread(self._get_gradio_client),
+                timeout=self.bert_warmup_timeout_seconds,
+            )
+            logger.info("BERT Gradio client connected.")
+        except Exception as e:
+            # Requests skip BERT until the breaker's half-open probe reconnects
+            logger.warning(f"BERT Space unreachable at startup, opening circuit: {e!r}")
+            self.bert_breaker.trip()
+
+    def _create_bert_batcher(self, max_concurrent_batches: int) -> MicroBatcher:
+        """Micro-batcher that groups concurrent BERT requests into one inference call"""
+        return MicroBatcher(
+            self._predict_bert_batch,
+            max_batch_size=int(os.getenv("BERT_MICROBATCH_SIZE", "32")),
+            max_wait_ms=float(os.getenv("BERT_MICROBATCH_WAIT_MS", "5")),
+            max_concurrent_batches=max_concurrent_batches,
+            on_batch=lambda size: self.metrics.bert_batch_size.observe(size),
+        )
+
+    def _create_local_bert_engine(self) -> Optional[LocalBertEngine]:
+        model_path = os.getenv("BERT_MODEL_PATH")
+        if not model_path:
+            logger.warning("BERT_MODEL_PATH not found. BERT classification will be unavailable.")
+            return None
+
+        return LocalBertEngine(
+            model_path,
+            runtime=os.getenv("BERT_RUNTIME", "torch"),
+            max_length=int(os.getenv("BERT_MAX_LENGTH", "128")),
+            batch_size=int(os.getenv("BERT_BATCH_SIZE", "32")),
+            num_threads=int(os.getenv("BERT_NUM_THREADS", "0")) or None,
+        )
+
+    async def _load_local_bert_engine(self):
+        """Load the exported DistilBERT for in-process CPU inference"""
+        try:
+            if self.bert_engine:
+                # Preloaded before fork
+                await asyncio.to_thread(self.bert_engine.after_fork)
+            else:
+                self.bert_engine = self._create_local_bert_engine()
+                if not self.bert_engine:
+                    self.bert_loaded = False
+                    return
+                await asyncio.to_thread(self.bert_engine.load)
+
+            self.bert_batcher = self._create_bert_batcher(max_concurrent_batches=1)
+            self.bert_loaded = True
+            logger.info("Local BERT engine loaded successfully.")
+
+        except Exception as e:
+            logger.error(f"Failed to load local BERT engine: {e}")
+            self.bert_loaded = False
 
     async def _load_llm_client(self):
         """Load LLM client for Stage 5 classification"""
@@ -151,11 +401,22 @@ class LogClassifier:
                 self.llm_loaded = False
                 return
 
+            # One pooled async HTTP client, so calls reuse kept-alive connections
+            self.llm_http_client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self.llm_max_concurrency,
+                    max_keepalive_connections=self.llm_max_concurrency,
+                    keepalive_expiry=self.llm_keepalive_seconds,
+                ),
+                timeout=self.llm_timeout_seconds,
+            )
             self.llm_client = ChatGroq(
                 groq_api_key=api_key,
                 model_name="llama-3.1-8b-instant",
                 temperature=self.llm_temperature,
                 max_tokens=self.llm_max_tokens,
+                request_timeout=self.llm_timeout_seconds,
+                http_async_client=self.llm_http_client,
             )
 
             self.llm_prompt_template = PromptTemplate(
@@ -172,8 +433,28 @@ EXAMPLES:
 
 LOG: {log_message}
 
-Respond ONLY with a valid JSON object in the next line. Do NOT include any explanation, markdown, or formatting.
-EXAMPLE RESPONSE: {{"category": "FileErr", "confidence": 0.8, "reasoning": "brief"}}
+Respond ONLY with a JSON object: {{"category": "<category>", "confidence": <0-1>}}
+""",
+            )
+
+            # Packed variant: several logs share one prompt and one call
+            self.llm_packed_prompt_template = PromptTemplate(
+                input_variables=["log_messages"],
+                template="""Classify each OpenStack log:
+
+CATEGORIES:
+SysOps, InstMgmt, NetOps, ResMgmt, SchedOps, BootErr, NetErr, FileErr, ConfigErr, ResErr, SvcErr
+
+EXAMPLES:
+- "WARNING _wait_for_boot timeout" → BootErr
+- "INFO VIF plugged successfully" → NetOps
+- "ERROR file not found" → FileErr
+
+LOGS:
+{log_messages}
+
+Respond ONLY with a JSON object, one result per log:
+{{"results": [{{"index": <index>, "category": "<category>", "confidence": <0-1>}}]}}
 """,
             )
             self.llm_loaded = True
@@ -182,198 +463,934 @@ EXAMPLE RESPONSE: {{"category": "FileErr", "confidence": 0.8, "reasoning": "brie
             logger.error(f"Failed to load LLM client: {e}")
             self.llm_loaded = False
 
+    async def _invoke_llm(self, messages: List[HumanMessage], **kwargs) -> Any:
+        """Call the LLM without blocking a thread, bounded and with a hard deadline"""
+        async with self.llm_semaphore:
+            with self.metrics.external_call("llm"):
+                return await asyncio.wait_for(
+                    self.llm_client.ainvoke(messages, **kwargs),
+                    timeout=self.llm_timeout_seconds,
+                )
+
+    def _prompt_log(self, log_text: str) -> str:
+        """The form of a log put into an LLM classification prompt"""
+        if self.llm_prompt_token_budget <= 0:
+            return log_text[:400]
+        return compact_log(log_text, self.llm_prompt_token_budget)
+
+    def _llm_output_options(self, max_tokens: int) -> Dict[str, Any]:
+        """Per-call options for an LLM classification request"""
+        options: Dict[str, Any] = {"max_tokens": max_tokens}
+        if self.llm_structured_output:
+            options["response_format"] = {"type": "json_object"}
+        return options
+
+    @staticmethod
+    def _parse_llm_json(response_text: str) -> Any:
+        """Parse an LLM reply as JSON, falling back to the first JSON value embedded in it"""
+        try:
+            return json.loads(response_text)
+        except json.JSONDecodeError as e:
+            error = e
+
+        # Decode one value from each opening bracket in turn; raw_decode stops at
+        # the end of that value, so trailing prose or a second object is ignored
+        decoder = json.JSONDecoder()
+        start = JSON_START.search(response_text)
+        while start:
+            try:
+                return decoder.raw_decode(response_text, start.start())[0]
+            except json.JSONDecodeError:
+                start = JSON_START.search(response_text, start.start() + 1)
+        raise error
+
+    async def _load_template_store(self):
+        """Open the persistent template store and warm the template cache from it"""
+        if not self.template_store_path:
+            return
+
+        try:
+            store = self._create_template_store()
+            await asyncio.to_thread(store.open)
+            if not self.template_cache_warmed:
+                await asyncio.to_thread(self._warm_template_cache, store)
+            self.template_store = store
+        except Exception as e:
+            # The service still works without persistence, just starts cold
+            logger.error(f"Failed to load template store: {e}")
+
+    def _create_template_store(self) -> TemplateStore:
+        return TemplateStore(
+            self.template_store_path,
+            flush_interval_seconds=float(os.getenv("TEMPLATE_STORE_FLUSH_SECONDS", "2")),
+            batch_size=int(os.getenv("TEMPLATE_STORE_BATCH_SIZE", "500")),
+        )
+
+    def _warm_template_cache(self, store: TemplateStore) -> None:
+        """Seed the store if configured and load it into the template cache - blocking"""
+        if self.template_store_seed_csv:
+            seeded = store.seed_from_csv(self.template_store_seed_csv)
+            logger.info(f"Seeded {seeded} templates from {self.template_store_seed_csv}.")
+
+        # Entries keep what is left of their TTL, as in _cached
+        entries = store.load(
+            self.template_cache.max_size, max_age_seconds=self.template_cache.ttl_seconds
+        )
+        for template, value, age_seconds in entries:
+            self.template_cache.put(template, value, age_seconds=age_seconds)
+
+        self.template_cache_warmed = True
+        logger.info(f"Loaded {len(entries)} templates from {self.template_store_path}.")
+
+    async def _cached(self, template: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a template in the template cache, then in the template store,
+        where other worker processes' results land once flushed
+        """
+        cached = self.template_cache.get(template)
+        if cached or not self.template_store:
+            return cached
+        return (await self._read_template_store([template])).get(template)
+
+    async def _read_template_store(self, templates: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Results in the template store for templates missing from the template
+        cache, added to the cache; read in a worker thread, since another
+        process's write or checkpoint can hold the read up
+        """
+        try:
+            stored = await asyncio.to_thread(
+                self.template_store.get_many,
+                templates,
+                self.template_cache.ttl_seconds,
+            )
+        except Exception as e:
+            logger.error(f"Template store read failed: {e}")
+            return {}
+
+        found = {}
+        for template, (value, age_seconds) in stored.items():
+            self.template_cache.put(template, value, age_seconds=age_seconds)
+            found[template] = value
+        return found
+
+    def _executor_queue_depth(self) -> int:
+        """Blocking calls (Space predictions, to_thread work) waiting for an executor thread"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return 0
+        # ThreadPoolExecutor has no public queue size; read its work queue
+        work_queue = getattr(getattr(loop, "_default_executor", None), "_work_queue", None)
+        return work_queue.qsize() if work_queue is not None else 0
+
     def _classify_with_regex(self, log_text: str) -> Tuple[Optional[str], Optional[str]]:
         """Stage 3: Classify log using regex patterns"""
-        for category, patterns in self.regex_patterns.items():
-            for pattern in patterns:
-                if re.search(pattern, log_text, re.IGNORECASE):
-                    return category, pattern
-        return None, None
+        start = time.perf_counter()
+        match = self.regex_matcher.match(log_text)
+        self.metrics.stage_latency.observe(time.perf_counter() - start, stage="regex")
+        return match
+
+    def _apply_bert_threshold(
+        self, best_label: str, confidence_score: float
+    ) -> Tuple[Optional[str], float]:
+        """Map a raw BERT label to its category and apply the confidence threshold"""
+        # Map LABEL_X to meaningful category names using your exact mapping
+        predicted_category = self.bert_label_mapping.get(best_label, best_label)
+
+        if confidence_score >= self.bert_confidence_threshold:
+            return predicted_category, confidence_score
+        return None, confidence_score
 
-    async def _classify_with_bert(self, log_text: str) -> Tuple[Optional[str], float]:
+    def _get_gradio_client(self):
+        """Return the Gradio client for the Hugging Face Space, connecting if needed (blocking)"""
+        from gradio_client import Client
+
+        with self._gradio_client_lock:
+            if self.gradio_client is None:
+                hf_token = os.getenv("HF_API_TOKEN")
+                # gradio_client 2.x renamed the hf_token argument to token
+                token_argument = (
+                    "token" if "token" in inspect.signature(Client).parameters else "hf_token"
+                )
+                self.gradio_client = Client(self.bert_space_url, **{token_argument: hf_token})
+        return self.gradio_client
+
+    async def _call_bert_space(self, payload: Any, api_name: str) -> Any:
+        """One Space prediction under the per-call deadline, reported to the breaker"""
+        loop = asyncio.get_running_loop()
+        try:
+            with self.metrics.external_call("bert"):
+                result = await asyncio.wait_for(
+                    loop.run_in_executor(
+                        None,
+                        lambda: self._get_gradio_client().predict(payload, api_name=api_name),
+                    ),
+                    timeout=self.bert_timeout_seconds,
+                )
+        except Exception:
+            self.bert_breaker.record_failure()
+            raise
+        self.bert_breaker.record_success()
+        return result
+
+    def _parse_bert_api_result(self, result: Any) -> Tuple[Optional[str], float]:
+        """Extract (label, confidence) from a Space /predict response"""
+        # Parse the result based on your actual API response format
+        if not result or not isinstance(result, dict):
+            return None, 0.0
+
+        # Get the best prediction from the 'label' field
+        best_label = result.get('label', 'LABEL_0')
+
+        # Get confidence from the confidences list
+        confidences = result.get('confidences', [])
+        confidence_score = 0.0
+
+        if confidences:
+            # Find the confidence for the best label
+            for conf_item in confidences:
+                if conf_item['label'] == best_label:
+                    confidence_score = conf_item['confidence']
+                    break
+
+        return best_label, confidence_score
+
+    async def _predict_bert_batch(self, log_texts: List[str]) -> List[Tuple[Optional[str], float]]:
+        """Raw (label, confidence) for many logs in one batched inference call"""
+        if self.bert_backend == "local":
+            return await asyncio.to_thread(self.bert_engine.predict_batch, log_texts)
+
+        # Batch-capable Space endpoint: takes a list of logs, returns a list of results
+        results = await self._call_bert_space(log_texts, api_name=self.bert_batch_api_name)
+        return [self._parse_bert_api_result(result) for result in results]
+
+    async def _classify_with_bert(self, log_text: str) -> Tuple[Optional[str], float, bool]:
+        """
+        Stage 4, timed into the stage latency histogram. Returns (category,
+        confidence, rejected): rejected is True when the circuit breaker
+        skipped the call.
+        """
+        # Skip straight to the next stage while the Space keeps failing
+        if self.bert_loaded and not self.bert_breaker.allow():
+            return None, 0.0, True
+
+        probing = self.bert_breaker.state == HALF_OPEN
+        try:
+            with self.metrics.stage_latency.time(stage="bert"):
+                bert_category, bert_confidence = await self._run_bert_stage(log_text)
+        except asyncio.CancelledError:
+            # A probe cancelled by a lost hedge or a deadline never reports
+            # back; free its slot rather than block probes for a reset timeout
+            if probing:
+                self.bert_breaker.release_probe()
+            raise
+        return bert_category, bert_confidence, False
+
+    async def _run_bert_stage(self, log_text: str) -> Tuple[Optional[str], float]:
         """Stage 4: Classify log using the Gradio client for your Hugging Face Space"""
         if not self.bert_loaded:
             return None, 0.0
 
         try:
-            from gradio_client import Client
-            
-            # Initialize client if not already done
-            if not hasattr(self, 'gradio_client'):
-                hf_token = os.getenv("HF_API_TOKEN") 
-                self.gradio_client = Client("https://kxshrx-infrnce-private-api.hf.space", hf_token=hf_token)
-            
-            # Make async call using gradio client
-            loop = asyncio.get_event_loop()
-            result = await loop.run_in_executor(
-                None,
-                lambda: self.gradio_client.predict(log_text, api_name="/predict")
+            if self.bert_batcher:
+                # Concurrent callers share one batched inference call
+                best_label, confidence_score = await self.bert_batcher.submit(log_text)
+            else:
+                result = await self._call_bert_space(log_text, api_name="/predict")
+
+                logger.info(f"Raw BERT API result: {result}")
+                best_label, confidence_score = self._parse_bert_api_result(result)
+
+            if best_label is None:
+                return None, 0.0
+
+            logger.warning(
+                f"BERT classification: {self.bert_label_mapping.get(best_label, best_label)} (confidence: {confidence_score:.3f})"
             )
-            
-            logger.info(f"Raw BERT API result: {result}")
-            
-            # Parse the result based on your actual API response format
-            if result and isinstance(result, dict):
-                # Get the best prediction from the 'label' field
-                best_label = result.get('label', 'LABEL_0')
-                
-                # Get confidence from the confidences list
-                confidences = result.get('confidences', [])
-                confidence_score = 0.0
-                
-                if confidences:
-                    # Find the confidence for the best label
-                    for conf_item in confidences:
-                        if conf_item['label'] == best_label:
-                            confidence_score = conf_item['confidence']
-                            break
-                
-                # Map LABEL_X to meaningful category names using your exact mapping
-                predicted_category = self.bert_label_mapping.get(best_label, best_label)
-                
-                logger.warning(f"BERT classification: {predicted_category} (confidence: {confidence_score:.3f})")
-                
-                # Check confidence threshold
-                if confidence_score >= self.bert_confidence_threshold:
-                    return predicted_category, confidence_score
-                else:
-                    return None, confidence_score
-            
+
+            return self._apply_bert_threshold(best_label, confidence_score)
+
+        except asyncio.TimeoutError:
+            logger.error(f"BERT classification timed out after {self.bert_timeout_seconds}s")
             return None, 0.0
-            
         except Exception as e:
             logger.error(f"BERT classification error: {e}")
             return None, 0.0
 
     async def _classify_with_llm(self, log_text: str) -> Tuple[str, float, str]:
+        """Stage 5, timed into the stage latency histogram"""
+        with self.metrics.stage_latency.time(stage="llm"):
+            return await self._run_llm_stage(log_text)
+
+    async def _run_llm_stage(self, log_text: str) -> Tuple[str, float, str]:
         """Stage 5: Classify log using LLM"""
         if not self.llm_loaded:
             return "Processing_Error", 0.0, "LLM not available"
 
         try:
             # Format prompt
-            formatted_prompt = self.llm_prompt_template.format(log_message=log_text[:400])
+            formatted_prompt = self.llm_prompt_template.format(
+                log_message=self._prompt_log(log_text)
+            )
             messages = [HumanMessage(content=formatted_prompt)]
 
             # Get LLM response
-            response = await asyncio.to_thread(self.llm_client.invoke, messages)
+            response = await self._invoke_llm(
+                messages, **self._llm_output_options(self.llm_max_tokens)
+            )
             response_text = response.content.strip()
 
-            # Parse JSON response
-            json_match = re.search(r"\{.*\}", response_text, re.DOTALL)
-            if json_match:
-                try:
-                    result_data = json.loads(json_match.group())
-                except:
-                    return "Processing_Error", 0.0, "Failed to parse LLM response"
-            else:
+            # Parse and validate JSON response
+            try:
+                result = LogClassification.model_validate(self._parse_llm_json(response_text))
+            except json.JSONDecodeError:
                 return "Processing_Error", 0.0, "No JSON found in LLM response"
+            except ValidationError:
+                return "Processing_Error", 0.0, "Failed to parse LLM response"
 
             # Map abbreviated categories to full names
-            category_mapping = {
-                "SysOps": "System_Operations",
-                "InstMgmt": "Instance_Management",
-                "NetOps": "Network_Operations",
-                "ResMgmt": "Resource_Management",
-                "SchedOps": "Scheduler_Operations",
-                "BootErr": "Boot_Timeout_Errors",
-                "NetErr": "Network_Connection_Errors",
-                "FileErr": "File_System_Errors",
-                "ConfigErr": "Configuration_Errors",
-                "ResErr": "Resource_Allocation_Errors",
-                "SvcErr": "Service_Communication_Errors",
-            }
-
-            category = result_data.get("category", "Unknown")
-            category = category_mapping.get(category, category)
-            confidence = result_data.get("confidence", 0.0)
-            reasoning = result_data.get("reasoning", "Classified by LLM")
+            category = LLM_CATEGORY_MAPPING.get(result.category, result.category)
+            confidence = result.confidence
+            reasoning = result.reasoning
 
             return category, confidence, reasoning
 
+        except asyncio.TimeoutError:
+            logger.error(f"LLM classification timed out after {self.llm_timeout_seconds}s")
+            return "Processing_Error", 0.0, "LLM call timed out"
         except Exception as e:
             logger.error(f"LLM classification error: {e}")
             return "Processing_Error", 0.0, f"Error: {str(e)[:50]}"
 
-    async def classify_log(self, log_text: str) -> Dict[str, Any]:
-        """Main classification function implementing the 3-stage pipeline"""
-        journey = []
+    async def _classify_with_llm_cached(
+        self, log_text: str
+    ) -> Tuple[str, float, str, Optional[float]]:
+        """
+        Stage 5 behind the semantic cache.
+
+        Returns (category, confidence, reasoning, similarity); similarity is
+        None when the LLM was actually called.
+        """
+        hit = self.semantic_cache.get(log_text)
+        if hit:
+            verdict, similarity = hit
+            return verdict["category"], verdict["confidence"], verdict["reasoning"], similarity
+
+        category, confidence, reasoning = await self._classify_with_llm(log_text)
+        self._remember_verdict(log_text, category, confidence, reasoning)
+        return category, confidence, reasoning, None
+
+    def _remember_verdict(
+        self, log_text: str, category: str, confidence: float, reasoning: str
+    ) -> None:
+        """Add an LLM verdict to the semantic cache unless the call failed"""
+        if category == "Processing_Error":
+            return
+        self.semantic_cache.put(
+            log_text, {"category": category, "confidence": confidence, "reasoning": reasoning}
+        )
+
+    async def _classify_with_bert_batch(
+        self, log_texts: List[str]
+    ) -> List[Tuple[Optional[str], float, bool]]:
+        """Stage 4 over many logs, with at most bert_max_concurrency calls in flight"""
+        if self.bert_batcher:
+            # The micro-batcher already groups these into batched inference calls
+            return await asyncio.gather(
+                *(self._classify_with_bert(log_text) for log_text in log_texts)
+            )
+
+        async def bounded(log_text: str) -> Tuple[Optional[str], float, bool]:
+            async with self.bert_semaphore:
+                return await self._classify_with_bert(log_text)
 
+        return await asyncio.gather(*(bounded(log_text) for log_text in log_texts))
+
+    async def _classify_with_llm_packed(
+        self, log_texts: List[str]
+    ) -> List[Optional[Tuple[str, float, str]]]:
+        """Packed Stage 5, timed into the stage latency histogram"""
+        with self.metrics.stage_latency.time(stage="llm_packed"):
+            return await self._run_llm_packed_stage(log_texts)
+
+    async def _run_llm_packed_stage(
+        self, log_texts: List[str]
+    ) -> List[Optional[Tuple[str, float, str]]]:
+        """
+        Stage 5 for several logs in one packed prompt.
+
+        Returns one (category, confidence, reasoning) per log, or None for logs
+        whose entry was missing or malformed in the model's JSON reply.
+        """
+        if not self.llm_loaded:
+            return [("Processing_Error", 0.0, "LLM not available")] * len(log_texts)
+
+        try:
+            formatted_prompt = self.llm_packed_prompt_template.format(
+                log_messages="\n".join(
+                    f"[{index}] {self._prompt_log(log_text)}"
+                    for index, log_text in enumerate(log_texts)
+                )
+            )
+            messages = [HumanMessage(content=formatted_prompt)]
+
+            # Get LLM response, with room for one answer per log
+            response = await self._invoke_llm(
+                messages, **self._llm_output_options(self.llm_max_tokens * len(log_texts))
+            )
+            response_text = response.content.strip()
+
+            # JSON mode replies {"results": [...]}; a bare array is accepted too
+            parsed = self._parse_llm_json(response_text)
+            entries = parsed.get("results", []) if isinstance(parsed, dict) else parsed
+            if not isinstance(entries, list):
+                entries = []
+        except Exception as e:
+            logger.error(f"Packed LLM classification error: {e}")
+            return [None] * len(log_texts)
+
+        results: List[Optional[Tuple[str, float, str]]] = [None] * len(log_texts)
+        for entry in entries:
+            try:
+                index = int(entry["index"])
+                result = LogClassification.model_validate(entry)
+            except (KeyError, TypeError, ValueError):
+                continue
+            if not 0 <= index < len(log_texts):
+                continue
+            results[index] = (
+                LLM_CATEGORY_MAPPING.get(result.category, result.category),
+                result.confidence,
+                result.reasoning,
+            )
+        return results
+
+    async def _classify_with_llm_batch(
+        self, log_texts: List[str]
+    ) -> List[Tuple[str, float, str]]:
+        """
+        Stage 5 over many logs, with at most llm_max_concurrency calls in flight.
+
+        Logs are packed llm_pack_size to a prompt; only the items a packed
+        response fails to cover fall back to single-item calls.
+        """
+        if self.llm_pack_size <= 1 or len(log_texts) <= 1:
+            return await asyncio.gather(
+                *(self._classify_with_llm(log_text) for log_text in log_texts)
+            )
+
+        async def pack(pack_texts: List[str]) -> List[Tuple[str, float, str]]:
+            results = await self._classify_with_llm_packed(pack_texts)
+            missing = [index for index, result in enumerate(results) if result is None]
+            if missing:
+                logger.warning(
+                    f"Packed LLM response covered {len(pack_texts) - len(missing)}/{len(pack_texts)} logs; retrying the rest individually"
+                )
+                retried = await asyncio.gather(
+                    *(self._classify_with_llm(pack_texts[index]) for index in missing)
+                )
+                for index, result in zip(missing, retried):
+                    results[index] = result
+            return results
+
+        packs = await asyncio.gather(
+            *(
+                pack(log_texts[start : start + self.llm_pack_size])
+                for start in range(0, len(log_texts), self.llm_pack_size)
+            )
+        )
+        return [result for pack_results in packs for result in pack_results]
+
+    def _add_step(
+        self,
+        journey: Optional[List[Dict[str, str]]],
+        stage: str,
+        status: str,
+        details: str,
+        *args: Any,
+    ) -> None:
+        """
+        Count a journey step outcome and, for verbose results, add the step
+
+        ``details`` is a format string filled in with ``args`` only when there
+        is a journey (``journey`` is None for compact results).
+        """
+        self.metrics.stage_outcomes.inc(step=stage, status=status)
+        if journey is not None:
+            journey.append(JourneyStep(stage, status, details.format(*args)).to_dict())
+
+    def _regex_result(self, regex_category: str, verbose: bool = True) -> Dict[str, Any]:
+        """Build the result for a log classified by the regex stage"""
+        journey = [] if verbose else None
+        self._add_step(
+            journey, "Regex Engine", "Classified", "Matched pattern for {}", regex_category
+        )
+        return {
+            "category": regex_category,
+            "confidence": 1.0,  # Regex matches have 100% confidence
+            "stage": "Regex",
+            "journey": journey,
+        }
+
+    @staticmethod
+    def _skipped_journey(verbose: bool = True) -> Optional[List[Dict[str, str]]]:
+        """Journey of a log the regex stage did not match, so far (None if not verbose)"""
+        if not verbose:
+            return None
+        return [JourneyStep("Regex Engine", "Skipped", "No pattern matched.").to_dict()]
+
+    def _add_bert_step(
+        self,
+        journey: Optional[List[Dict[str, str]]],
+        bert_category: Optional[str],
+        bert_confidence: float,
+        rejected: bool = False,
+    ) -> None:
+        """Record the outcome of the BERT stage (rejected: skipped by the circuit breaker)"""
+        if bert_category:
+            self._add_step(
+                journey,
+                "BERT API",
+                "Classified",
+                "High confidence classification: {:.3f}",
+                bert_confidence,
+            )
+        elif rejected:
+            self._add_step(
+                journey,
+                "BERT API",
+                "Circuit Open",
+                "Skipped after repeated failures; retrying in {:.0f}s.",
+                self.bert_breaker.retry_in_seconds(),
+            )
+        elif self.bert_loaded:
+            self._add_step(
+                journey,
+                "BERT API",
+                "Low Confidence",
+                "Confidence was {:.3f}, below the {} threshold.",
+                bert_confidence,
+                self.bert_confidence_threshold,
+            )
+        else:
+            self._add_step(journey, "BERT API", "Unavailable", "BERT API client not loaded.")
+
+    def _add_llm_step(
+        self,
+        journey: Optional[List[Dict[str, str]]],
+        llm_category: str,
+        llm_reasoning: str,
+        similarity: Optional[float] = None,
+    ) -> None:
+        """Record the outcome of the LLM stage"""
+        if similarity is not None:
+            self._add_step(
+                journey,
+                "Semantic Cache",
+                "Classified",
+                "Reused the LLM verdict for a similar log (cosine similarity {:.3f}). {}",
+                similarity,
+                llm_reasoning,
+            )
+        else:
+            self._add_step(
+                journey,
+                "LLM Fallback",
+                "Classified" if llm_category != "Processing_Error" else "Failed",
+                "Classified into enhanced categories. {}",
+                llm_reasoning,
+            )
+
+    async def classify_log(
+        self, log_text: str, deadline_ms: Optional[int] = None, verbose: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Main classification function implementing the 3-stage pipeline
+
+        With ``deadline_ms`` the BERT and LLM stages are hedged instead of run
+        strictly in sequence (see ``_classify_hedged``). With ``verbose=False``
+        no journey is built (it is None); step outcomes are still counted.
+        """
         # Stage 3: Regex Classification
         regex_category, regex_pattern = self._classify_with_regex(log_text)
 
         if regex_category:
-            journey.append(
-                JourneyStep(
-                    "Regex Engine",
-                    "Classified",
-                    f"Matched pattern for {regex_category}",
-                ).to_dict()
-            )
-
-            return {
-                "category": regex_category,
-                "confidence": 1.0,  # Regex matches have 100% confidence
-                "stage": "Regex",
-                "journey": journey,
-            }
+            result = self._regex_result(regex_category, verbose=verbose)
         else:
-            journey.append(
-                JourneyStep("Regex Engine", "Skipped", "No pattern matched.").to_dict()
+            result = await self._classify_unmatched(
+                log_text, deadline_ms=deadline_ms, verbose=verbose
             )
 
+        self._record_result(result)
+        return result
+
+    def _record_result(self, result: Dict[str, Any]) -> None:
+        """Add a finished result to the running statistics"""
+        self.stats.record_result(result)
+
+    def _cached_result(
+        self, cached: Dict[str, Any], journey: Optional[List[Dict[str, str]]]
+    ) -> Dict[str, Any]:
+        """Build the result for a log whose template is already cached"""
+        self._add_step(
+            journey,
+            "Template Cache",
+            "Classified",
+            "Reused {} result for a matching log template.",
+            cached["stage"],
+        )
+        return {
+            "category": cached["category"],
+            "confidence": cached["confidence"],
+            "stage": cached["stage"],
+            "journey": journey,
+        }
+
+    def _remember(self, template: str, result: Dict[str, Any]) -> None:
+        """Cache a BERT/LLM result unless the stage failed"""
+        if result["category"] == "Processing_Error":
+            return
+        value = {
+            "category": result["category"],
+            "confidence": result["confidence"],
+            "stage": result["stage"],
+        }
+        self.template_cache.put(template, value)
+        if self.template_store:
+            self.template_store.record(template, value)
+
+    async def _classify_unmatched(
+        self, log_text: str, deadline_ms: Optional[int] = None, verbose: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Run Stages 4 and 5 for a log the regex stage did not match
+
+        With ``verbose=False`` the result has no journey.
+        """
+        self.metrics.stage_outcomes.inc(step="Regex Engine", status="Skipped")
+        journey = self._skipped_journey(verbose)
+
+        # Repeats of a known template skip the external stages
+        template = mask_log_template(log_text)
+        cached = await self._cached(template)
+        if cached:
+            return self._cached_result(cached, journey)
+
+        # Identical templates already being classified share that call; the
+        # deadline is part of the key since it changes how the stages run, and
+        # verbosity since a compact call builds no journey to share
+        result, coalesced = await self.single_flight.run(
+            (template, deadline_ms, verbose),
+            lambda: self._classify_uncached(log_text, template, journey, deadline_ms),
+        )
+        if not coalesced:
+            return result
+
+        # The leader already counted the outcomes of the stages it ran
+        self.metrics.coalesced.inc()
+        journey = None if result["journey"] is None else list(result["journey"])
+        self._add_step(
+            journey,
+            "Single Flight",
+            "Coalesced",
+            "Shared the in-flight classification of an identical log template.",
+        )
+        return dict(result, journey=journey)
+
+    async def _classify_uncached(
+        self,
+        log_text: str,
+        template: str,
+        journey: Optional[List[Dict[str, str]]],
+        deadline_ms: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """Stages 4 and 5 for a log whose template is not cached"""
+        if deadline_ms:
+            result = await self._classify_hedged(log_text, journey, deadline_ms)
+            self._remember(template, result)
+            return result
+
         # Stage 4: BERT Classification
-        bert_category, bert_confidence = await self._classify_with_bert(log_text)
+        bert_category, bert_confidence, bert_rejected = await self._classify_with_bert(log_text)
+        self._add_bert_step(journey, bert_category, bert_confidence, bert_rejected)
 
         if bert_category:
-            journey.append(
-                JourneyStep(
-                    "BERT API",
-                    "Classified",
-                    f"High confidence classification: {bert_confidence:.3f}",
-                ).to_dict()
-            )
-
-            return {
+            result = {
                 "category": bert_category,
                 "confidence": bert_confidence,
                 "stage": "BERT",
                 "journey": journey,
             }
+            self._remember(template, result)
+            return result
+
+        # Stage 5: LLM Classification
+        llm_category, llm_confidence, llm_reasoning, similarity = (
+            await self._classify_with_llm_cached(log_text)
+        )
+        self._add_llm_step(journey, llm_category, llm_reasoning, similarity)
+
+        result = {
+            "category": llm_category,
+            "confidence": llm_confidence,
+            "stage": "LLM",
+            "journey": journey,
+        }
+        self._remember(template, result)
+        return result
+
+    async def _classify_hedged(
+        self,
+        log_text: str,
+        journey: Optional[List[Dict[str, str]]],
+        deadline_ms: int,
+    ) -> Dict[str, Any]:
+        """
+        Stages 4 and 5 under a latency budget.
+
+        BERT starts first; if it has not answered within the hedge delay (or
+        answers with low confidence) the LLM starts too. The first acceptable
+        answer wins and the other call is cancelled. Anything still running
+        at the deadline is cancelled and the log is reported as a
+        Processing_Error.
+        """
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        deadline = start + deadline_ms / 1000
+        hedge_at = start + min(self.hedge_delay_ms, deadline_ms / 2) / 1000
+
+        bert_task = asyncio.create_task(self._classify_with_bert(log_text))
+        llm_task = None
+        llm_started = None
+        bert_result = llm_result = None
+        bert_ms = llm_ms = None
+        winner = None
+
+        pending = {bert_task}
+        while pending:
+            now = loop.time()
+            if now >= deadline:
+                break
+            wake_at = deadline if llm_task else min(hedge_at, deadline)
+            done, pending = await asyncio.wait(
+                pending, timeout=wake_at - now, return_when=asyncio.FIRST_COMPLETED
+            )
+
+            if bert_task in done:
+                bert_result = bert_task.result()
+                bert_ms = (loop.time() - start) * 1000
+                if bert_result[0]:
+                    winner = "BERT"
+                    break
+            if llm_task in done:
+                llm_result = llm_task.result()
+                llm_ms = (loop.time() - llm_started) * 1000
+                if llm_result[0] != "Processing_Error":
+                    winner = "LLM"
+                    break
+
+            # Low-confidence BERT answer, or BERT is slow - start the LLM
+            if llm_task is None and (bert_result is not None or loop.time() >= hedge_at):
+                llm_started = loop.time()
+                llm_task = asyncio.create_task(self._classify_with_llm_cached(log_text))
+                pending.add(llm_task)
+
+        # Cancel the losing or overdue calls
+        elapsed_ms = (loop.time() - start) * 1000
+        wasted_ms = 0.0
+        for task in pending:
+            task.cancel()
+
+        if bert_result is not None:
+            self._add_bert_step(journey, *bert_result)
         else:
-            if self.bert_loaded:
-                journey.append(
-                    JourneyStep(
-                        "BERT API",
-                        "Low Confidence",
-                        f"Confidence was {bert_confidence:.3f}, below the {self.bert_confidence_threshold} threshold.",
-                    ).to_dict()
-                )
+            wasted_ms += elapsed_ms
+            self._add_step(
+                journey, "BERT API", "Cancelled", "No answer after {:.0f} ms.", elapsed_ms
+            )
+
+        if llm_task is not None:
+            llm_elapsed_ms = (loop.time() - llm_started) * 1000
+            if llm_result is not None:
+                llm_category, _, llm_reasoning, similarity = llm_result
+                self._add_llm_step(journey, llm_category, llm_reasoning, similarity)
             else:
-                journey.append(
-                    JourneyStep(
-                        "BERT API", "Unavailable", "BERT API client not loaded."
-                    ).to_dict()
+                self._add_step(
+                    journey,
+                    "LLM Fallback",
+                    "Cancelled",
+                    "Speculative call cancelled after {:.0f} ms.",
+                    llm_elapsed_ms,
                 )
+            if winner == "BERT" or llm_result is None:
+                wasted_ms += llm_ms if llm_ms is not None else llm_elapsed_ms
+            hedge_ms = (llm_started - start) * 1000
+        else:
+            hedge_ms = None
 
-        # Stage 5: LLM Classification
-        llm_category, llm_confidence, llm_reasoning = await self._classify_with_llm(log_text)
+        if winner == "BERT":
+            category, confidence, _ = bert_result
+            status = "BERT Won"
+        elif winner == "LLM":
+            category, confidence, _, _ = llm_result
+            status = "LLM Won"
+        elif llm_result is not None and not pending:
+            # Both stages answered, neither acceptably - same as the sequential path
+            category, confidence, _, _ = llm_result
+            status = "Failed"
+        else:
+            category, confidence = "Processing_Error", 0.0
+            status = "Deadline Exceeded"
 
-        journey.append(
-            JourneyStep(
-                "LLM Fallback",
-                "Classified" if llm_category != "Processing_Error" else "Failed",
-                f"Classified into enhanced categories. {llm_reasoning}",
-            ).to_dict()
+        self._add_step(
+            journey,
+            "Hedged Routing",
+            status,
+            "Budget {} ms, finished in {:.0f} ms; {}; wasted speculative work {:.0f} ms.",
+            deadline_ms,
+            elapsed_ms,
+            "LLM not needed" if hedge_ms is None else f"LLM started after {hedge_ms:.0f} ms",
+            wasted_ms,
         )
 
         return {
-            "category": llm_category,
-            "confidence": llm_confidence,
-            "stage": "LLM",
+            "category": category,
+            "confidence": confidence,
+            "stage": winner or "LLM",
             "journey": journey,
         }
 
+    async def classify_batch(self, log_texts: List[str], verbose: bool = True) -> Dict[str, Any]:
+        """
+        Classify many logs with stage-wise fan-out.
+
+        The regex stage runs over the whole batch first. The leftovers are
+        grouped by log template: cached templates are answered directly, and
+        one representative per remaining template is sent to BERT, with only
+        the low-confidence remainder reaching the LLM. Results are returned in
+        input order alongside per-stage timings. With ``verbose=False`` no
+        journeys are built. A BERT or LLM step outcome is counted once per
+        template, however many logs share its result.
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(log_texts)
+        timings_ms = {}
+
+        # Stage 3: Regex Classification over the whole batch
+        stage_start = time.perf_counter()
+        unmatched = []
+        for index, log_text in enumerate(log_texts):
+            regex_category, _ = self._classify_with_regex(log_text)
+            if regex_category:
+                results[index] = self._regex_result(regex_category, verbose=verbose)
+            else:
+                unmatched.append(index)
+        if unmatched:
+            self.metrics.stage_outcomes.inc(
+                len(unmatched), step="Regex Engine", status="Skipped"
+            )
+        timings_ms["regex"] = (time.perf_counter() - stage_start) * 1000
+
+        # Group the leftovers by template and answer cached templates
+        stage_start = time.perf_counter()
+        groups: Dict[str, List[int]] = {}
+        for index in unmatched:
+            groups.setdefault(mask_log_template(log_texts[index]), []).append(index)
+
+        cached_results = {}
+        for template in groups:
+            cached = self.template_cache.get(template)
+            if cached:
+                cached_results[template] = cached
+        missing = [template for template in groups if template not in cached_results]
+        if missing and self.template_store:
+            # Results other worker processes have written to the store
+            cached_results.update(await self._read_template_store(missing))
+
+        cache_hits = 0
+        bert_pending = []
+        for template, indices in groups.items():
+            cached = cached_results.get(template)
+            if cached:
+                for index in indices:
+                    results[index] = self._cached_result(cached, self._skipped_journey(verbose))
+                cache_hits += len(indices)
+            else:
+                bert_pending.append(template)
+        timings_ms["cache"] = (time.perf_counter() - stage_start) * 1000
+
+        def fan_out(template: str, result: Dict[str, Any]) -> None:
+            self._remember(template, result)
+            for index in groups[template]:
+                journey = result["journey"]
+                results[index] = dict(result, journey=None if journey is None else list(journey))
+
+        # Stage 4: BERT Classification for one log per uncached template
+        stage_start = time.perf_counter()
+        bert_outputs = await self._classify_with_bert_batch(
+            [log_texts[groups[template][0]] for template in bert_pending]
+        )
+        llm_pending = []
+        for template, (bert_category, bert_confidence, bert_rejected) in zip(
+            bert_pending, bert_outputs
+        ):
+            journey = self._skipped_journey(verbose)
+            self._add_bert_step(journey, bert_category, bert_confidence, bert_rejected)
+            if bert_category:
+                fan_out(
+                    template,
+                    {
+                        "category": bert_category,
+                        "confidence": bert_confidence,
+                        "stage": "BERT",
+                        "journey": journey,
+                    },
+                )
+            else:
+                llm_pending.append((template, journey))
+        timings_ms["bert"] = (time.perf_counter() - stage_start) * 1000
+
+        # Stage 5: LLM Classification for the low-confidence remainder, with
+        # logs similar to earlier verdicts answered by the semantic cache
+        stage_start = time.perf_counter()
+        llm_texts = [log_texts[groups[template][0]] for template, _ in llm_pending]
+        llm_outputs: List[Optional[Tuple[str, float, str, Optional[float]]]] = [
+            (hit[0]["category"], hit[0]["confidence"], hit[0]["reasoning"], hit[1]) if hit else None
+            for hit in self.semantic_cache.get_many(llm_texts)
+        ]
+        llm_calls = [index for index, output in enumerate(llm_outputs) if output is None]
+        called = await self._classify_with_llm_batch([llm_texts[index] for index in llm_calls])
+        for index, (llm_category, llm_confidence, llm_reasoning) in zip(llm_calls, called):
+            self._remember_verdict(llm_texts[index], llm_category, llm_confidence, llm_reasoning)
+            llm_outputs[index] = (llm_category, llm_confidence, llm_reasoning, None)
+
+        for (template, journey), (llm_category, llm_confidence, llm_reasoning, similarity) in zip(
+            llm_pending, llm_outputs
+        ):
+            self._add_llm_step(journey, llm_category, llm_reasoning, similarity)
+            fan_out(
+                template,
+                {
+                    "category": llm_category,
+                    "confidence": llm_confidence,
+                    "stage": "LLM",
+                    "journey": journey,
+                },
+            )
+        timings_ms["llm"] = (time.perf_counter() - stage_start) * 1000
+
+        stage_counts = {"Regex": 0, "BERT": 0, "LLM": 0}
+        for result in results:
+            stage_counts[result["stage"]] += 1
+            self._record_result(result)
+
+        return {
+            "results": results,
+            "stage_counts": stage_counts,
+            "cache_hits": cache_hits,
+            "timings_ms": timings_ms,
+        }
+
     async def generate_log(self) -> str:
         """Generate synthetic OpenStack log using random topic selection"""
         if not self.llm_loaded:
@@ -422,7 +1439,9 @@ Log:"""
             messages = [HumanMessage(content=formatted_prompt)]
 
             # Get LLM response
-            response = await asyncio.to_thread(self.llm_client.invoke, messages)
+            response = await self._invoke_llm(
+                messages, max_tokens=self.llm_generation_max_tokens
+            )
             synthetic_log = response.content.strip()
 
             # Clean up the response
@@ -0,0 +1,58 @@
+# backend/compaction.py
+
+"""
+Prompt Compaction Module
+
+Shrinks a log line before it is put into an LLM prompt. The file/timestamp/
+PID prefix and the request/instance context brackets are dropped, the
+remaining variable fields (UUIDs, IPs, numbers, ...) are masked as in the
+template cache, and a line still over the token budget keeps its head
+(level, module, start of the message) and its tail rather than being cut
+off at a fixed character count.
+"""
+
+import re
+
+from cache import mask_log_template
+
+LOG_LEVELS = ("CRITICAL", "ERROR", "WARNING", "INFO", "DEBUG", "TRACE")
+
+# Anything before the level (log file name, timestamp, PID) when the level
+# appears near the start of the line
+_PREFIX = re.compile(r"^.{0,120}?\b(?=(?:%s)\b)" % "|".join(LOG_LEVELS))
+_CONTEXT = re.compile(r"\[(?:None )?req-[^\]]*\]|\[instance: [^\]]*\]")
+_INSTANCE_NAME = re.compile(r"\binstance-[0-9a-f]{8}\b")
+_WHITESPACE = re.compile(r"\s+")
+
+# Rough LLM token boundaries: short word pieces, short digit runs, punctuation
+_TOKEN = re.compile(r"[A-Za-z]{1,6}|\d{1,3}|[^\sA-Za-z\d]")
+
+# Share of a truncated line's budget kept from the start; the rest is its tail
+HEAD_SHARE = 0.6
+
+ELLIPSIS = " … "
+
+
+def approx_tokens(text: str) -> int:
+    """Approximate LLM token count of ``text``"""
+    return len(_TOKEN.findall(text))
+
+
+def compact_log(log_text: str, token_budget: int = 96) -> str:
+    """Compact ``log_text`` for an LLM prompt, to about ``token_budget`` tokens"""
+    text = _PREFIX.sub("", log_text, count=1)
+    text = _CONTEXT.sub(" ", text)
+    text = _INSTANCE_NAME.sub("instance-<ID>", text)
+    text = _WHITESPACE.sub(" ", mask_log_template(text)).strip()
+
+    tokens = list(_TOKEN.finditer(text))
+    if len(tokens) <= token_budget:
+        return text
+
+    head = max(1, int(token_budget * HEAD_SHARE))
+    tail = max(1, token_budget - head)
+    return (
+        text[: tokens[head - 1].end()].rstrip()
+        + ELLIPSIS
+        + text[tokens[-tail].start() :].lstrip()
+    )
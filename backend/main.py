@@ -5,15 +5,20 @@ This module provides REST API endpoints for log classification and synthetic log
 Uses a 3-stage pipeline: Regex -> BERT -> LLM with confidence-based routing.
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import PlainTextResponse, Response
+from pydantic import BaseModel, Field
 from contextlib import asynccontextmanager
+from dataclasses import dataclass
 import time
 import logging
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
+
+import orjson
 
 from classifier import LogClassifier
+from streaming import DuplexStreamingResponse, classify_stream, iter_log_lines
 
 # Configure logging - minimal and clean
 logging.basicConfig(level=logging.WARNING, format="%(levelname)s: %(message)s")
@@ -22,13 +27,18 @@ logger = logging.getLogger(__name__)
 # Global classifier instance
 classifier = None
 
+# Upper bound on logs accepted by a single batch request
+MAX_BATCH_SIZE = 10000
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager for loading models at startup"""
     global classifier
     try:
-        classifier = LogClassifier()
+        # serve.py creates and preloads the classifier before forking workers
+        if classifier is None:
+            classifier = LogClassifier()
         await classifier.initialize()
     except Exception as e:
         logger.error(f"Failed to initialize classifier: {e}")
@@ -37,7 +47,15 @@ async def lifespan(app: FastAPI):
     yield
 
     # Cleanup on shutdown
-    pass
+    if classifier:
+        await classifier.shutdown()
+
+
+def preload_classifier() -> None:
+    """Create the classifier and load its fork-safe parts, before forking workers"""
+    global classifier
+    classifier = LogClassifier()
+    classifier.preload()
 
 
 # Initialize FastAPI app with lifespan manager
@@ -61,6 +79,8 @@ app.add_middleware(
 # Request/Response Models
 class LogClassificationRequest(BaseModel):
     log_message: str
+    # Optional latency budget; BERT and LLM are hedged to meet it
+    deadline_ms: Optional[int] = Field(None, gt=0)
 
 
 class JourneyStep(BaseModel):
@@ -78,10 +98,72 @@ class LogClassificationResponse(BaseModel):
     journey: List[JourneyStep]
 
 
+class LogBatchClassificationRequest(BaseModel):
+    log_messages: List[str]
+
+
+class BatchClassificationItem(BaseModel):
+    index: int
+    final_category: str
+    pipeline_stage: str
+    final_confidence: float
+    journey: List[JourneyStep]
+
+
+class LogBatchClassificationResponse(BaseModel):
+    total_logs: int
+    results: List[BatchClassificationItem]
+    stage_counts: Dict[str, int]
+    cache_hits: int
+    stage_timings_ms: Dict[str, int]
+    processing_time_ms: int
+
+
 class LogGenerationResponse(BaseModel):
     synthetic_log: str
 
 
+# Compact responses (?verbose=false or "Prefer: return=minimal"): no journey
+# and no echoed log, as slotted records serialised straight to JSON bytes
+# with orjson instead of being validated into the pydantic models above
+@dataclass(slots=True)
+class CompactClassificationResponse:
+    final_category: str
+    pipeline_stage: str
+    final_confidence: float
+    processing_time_ms: int
+
+
+@dataclass(slots=True)
+class CompactBatchClassificationItem:
+    index: int
+    final_category: str
+    pipeline_stage: str
+    final_confidence: float
+
+
+@dataclass(slots=True)
+class CompactBatchClassificationResponse:
+    total_logs: int
+    results: List[CompactBatchClassificationItem]
+    stage_counts: Dict[str, int]
+    cache_hits: int
+    stage_timings_ms: Dict[str, int]
+    processing_time_ms: int
+
+
+def is_verbose(verbose: bool, prefer: Optional[str]) -> bool:
+    """Whether a classification response should carry the full journey"""
+    return verbose and not (prefer and "return=minimal" in prefer.lower())
+
+
+def orjson_response(content: Any) -> Response:
+    return Response(
+        orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY),
+        media_type="application/json",
+    )
+
+
 # API Endpoints
 @app.get("/")
 async def root():
@@ -107,16 +189,78 @@ async def health_check():
             "bert_model": classifier.bert_loaded if classifier else False,
             "llm_client": classifier.llm_loaded if classifier else False,
         },
+        "template_cache": classifier.template_cache.stats() if classifier else None,
+        "semantic_cache": classifier.semantic_cache.stats() if classifier else None,
+        "single_flight": classifier.single_flight.stats() if classifier else None,
+        "template_store": (
+            classifier.template_store.stats()
+            if classifier and classifier.template_store
+            else None
+        ),
+        "bert_batching": (
+            classifier.bert_batcher.stats()
+            if classifier and classifier.bert_batcher
+            else None
+        ),
+        "bert_circuit": classifier.bert_breaker.stats() if classifier else None,
     }
 
 
+@app.get("/api/stats")
+async def classification_stats(top_n: int = 15):
+    """
+    Running statistics over every log classified since startup
+
+    Stage distribution, top categories, error subcategories, confidence bands
+    and histogram - the same report the offline analyser produces. Under
+    serve.py it covers every worker.
+    """
+    global classifier
+
+    if not classifier or not classifier.is_initialized:
+        raise HTTPException(
+            status_code=503,
+            detail="Classifier not initialized. Please check server logs.",
+        )
+
+    return await classifier.stats_report(top_n=top_n)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """
+    Prometheus text-format metrics
+
+    Per-stage latency histograms, journey step outcomes, in-flight external
+    calls, external errors and timeouts, and executor / BERT batch queue depth.
+    Every sample is labelled with the worker it came from.
+    """
+    global classifier
+
+    if not classifier:
+        raise HTTPException(
+            status_code=503,
+            detail="Classifier not initialized. Please check server logs.",
+        )
+
+    return PlainTextResponse(
+        await classifier.render_metrics(), media_type="text/plain; version=0.0.4"
+    )
+
+
 @app.post("/api/classify", response_model=LogClassificationResponse)
-async def classify_log(request: LogClassificationRequest):
+async def classify_log(
+    request: LogClassificationRequest,
+    verbose: bool = True,
+    prefer: Optional[str] = Header(None),
+):
     """
     Classify a log message using the hybrid 3-stage pipeline
 
     Args:
         request: LogClassificationRequest containing the log message
+        verbose: False (or a "Prefer: return=minimal" header) for a compact
+            response without the journey and the echoed log
 
     Returns:
         LogClassificationResponse with classification results and journey details
@@ -134,12 +278,25 @@ async def classify_log(request: LogClassificationRequest):
 
     try:
         start_time = time.time()
+        verbose = is_verbose(verbose, prefer)
 
         # Perform classification
-        result = await classifier.classify_log(request.log_message)
+        result = await classifier.classify_log(
+            request.log_message, deadline_ms=request.deadline_ms, verbose=verbose
+        )
 
         processing_time_ms = int((time.time() - start_time) * 1000)
 
+        if not verbose:
+            return orjson_response(
+                CompactClassificationResponse(
+                    final_category=result["category"],
+                    pipeline_stage=result["stage"],
+                    final_confidence=result["confidence"],
+                    processing_time_ms=processing_time_ms,
+                )
+            )
+
         # Build response
         response = LogClassificationResponse(
             log_analyzed=request.log_message,
@@ -157,6 +314,143 @@ async def classify_log(request: LogClassificationRequest):
         raise HTTPException(status_code=500, detail=f"Classification failed: {str(e)}")
 
 
+@app.post("/api/classify/batch", response_model=LogBatchClassificationResponse)
+async def classify_log_batch(
+    request: LogBatchClassificationRequest,
+    verbose: bool = True,
+    prefer: Optional[str] = Header(None),
+):
+    """
+    Classify a list of log messages with stage-wise fan-out
+
+    Regex runs across the whole batch first, the leftovers go to BERT, and only
+    the low-confidence remainder reaches the LLM under bounded concurrency.
+
+    Args:
+        request: LogBatchClassificationRequest containing the log messages
+        verbose: False (or a "Prefer: return=minimal" header) for compact
+            per-log results without the journey
+
+    Returns:
+        LogBatchClassificationResponse with per-log results in input order
+    """
+    global classifier
+
+    if not classifier or not classifier.is_initialized:
+        raise HTTPException(
+            status_code=503,
+            detail="Classifier not initialized. Please check server logs.",
+        )
+
+    if not request.log_messages:
+        raise HTTPException(status_code=400, detail="Log messages cannot be empty")
+
+    if len(request.log_messages) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large: {len(request.log_messages)} logs (maximum {MAX_BATCH_SIZE})",
+        )
+
+    for index, log_message in enumerate(request.log_messages):
+        if not log_message.strip():
+            raise HTTPException(
+                status_code=400, detail=f"Log message at index {index} cannot be empty"
+            )
+
+    try:
+        start_time = time.time()
+        verbose = is_verbose(verbose, prefer)
+
+        # Perform stage-wise batch classification
+        batch = await classifier.classify_batch(request.log_messages, verbose=verbose)
+
+        processing_time_ms = int((time.time() - start_time) * 1000)
+        stage_timings_ms = {
+            stage: int(elapsed) for stage, elapsed in batch["timings_ms"].items()
+        }
+
+        if not verbose:
+            return orjson_response(
+                CompactBatchClassificationResponse(
+                    total_logs=len(request.log_messages),
+                    results=[
+                        CompactBatchClassificationItem(
+                            index=index,
+                            final_category=result["category"],
+                            pipeline_stage=result["stage"],
+                            final_confidence=result["confidence"],
+                        )
+                        for index, result in enumerate(batch["results"])
+                    ],
+                    stage_counts=batch["stage_counts"],
+                    cache_hits=batch["cache_hits"],
+                    stage_timings_ms=stage_timings_ms,
+                    processing_time_ms=processing_time_ms,
+                )
+            )
+
+        return LogBatchClassificationResponse(
+            total_logs=len(request.log_messages),
+            results=[
+                BatchClassificationItem(
+                    index=index,
+                    final_category=result["category"],
+                    pipeline_stage=result["stage"],
+                    final_confidence=result["confidence"],
+                    journey=result["journey"],
+                )
+                for index, result in enumerate(batch["results"])
+            ],
+            stage_counts=batch["stage_counts"],
+            cache_hits=batch["cache_hits"],
+            stage_timings_ms=stage_timings_ms,
+            processing_time_ms=processing_time_ms,
+        )
+
+    except Exception as e:
+        logger.error(f"Batch classification error: {e}")
+        raise HTTPException(
+            status_code=500, detail=f"Batch classification failed: {str(e)}"
+        )
+
+
+@app.post("/api/classify/stream")
+async def classify_log_stream(request: Request, preserve_order: bool = False):
+    """
+    Classify a chunked upload of raw log lines, streaming NDJSON results
+
+    Each non-blank input line produces one JSON object per output line with
+    its 1-based line number. Regex hits are emitted immediately; BERT and LLM
+    results follow as they complete unless preserve_order is set.
+
+    Args:
+        request: Raw request whose body is newline-delimited log text
+        preserve_order: Emit results strictly in input order
+
+    Returns:
+        DuplexStreamingResponse of application/x-ndjson records
+    """
+    global classifier
+
+    if not classifier or not classifier.is_initialized:
+        raise HTTPException(
+            status_code=503,
+            detail="Classifier not initialized. Please check server logs.",
+        )
+
+    records = classify_stream(
+        classifier,
+        iter_log_lines(request.stream()),
+        preserve_order=preserve_order,
+    )
+
+    async def ndjson():
+        async for record in records:
+            yield orjson.dumps(record) + b"\n"
+
+    return DuplexStreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+
 @app.post("/api/generate", response_model=LogGenerationResponse)
 async def generate_synthetic_log():
     """
@@ -0,0 +1,350 @@
+# backend/metrics.py
+
+"""
+Metrics Module
+
+Minimal Prometheus-style counters, gauges and histograms rendered in the
+text exposition format for ``GET /metrics``, so the service can be scraped
+without an extra client library.
+
+``ClassifierMetrics`` holds the metrics the classifier reports:
+
+- per-stage latency histograms (regex, bert, llm)
+- stage outcomes by journey step and status (Classified, Low Confidence,
+  Unavailable, Failed, ...)
+- in-flight external calls, errors and timeouts (BERT Space, Groq)
+- executor and BERT micro-batch queue depth, sampled at scrape time
+- BERT micro-batch sizes
+- requests coalesced onto an identical in-flight classification
+
+Every sample carries a ``worker`` label (the process id). Under ``serve.py``
+a scrape reaches one worker, which renders its own samples together with
+the other workers' latest published samples (see ``worker_snapshots.py``),
+so each worker's series is present in every scrape.
+"""
+
+import asyncio
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+# Seconds; covers sub-millisecond regex hits up to LLM calls near their timeout
+DEFAULT_LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+    0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0,
+)
+
+# Items per batch; powers of two up to well past BERT_MICROBATCH_SIZE's default
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], *extra: str) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs.extend(label for label in extra if label)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def samples(self, const_labels: str = "") -> List[str]:
+        """Sample lines, each with ``const_labels`` (e.g. ``worker="12"``) added"""
+        raise NotImplementedError
+
+    def render(self, const_labels: str = "", other_samples: Sequence[str] = ()) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+            *self.samples(const_labels),
+            *other_samples,
+        ]
+
+
+class Counter(_Metric):
+    """Monotonic count, optionally labelled"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self, const_labels: str = "") -> List[str]:
+        if not self.labelnames and not self._values:
+            return [f"{self.name}{_format_labels((), (), const_labels)} 0"]
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key, const_labels)} {_format_value(value)}"
+            for key, value in sorted(self._values.items())
+        ]
+
+
+class Gauge(_Metric):
+    """Current value, set directly or read from a callback at scrape time"""
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        callback: Optional[Callable[[], float]] = None,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self.callback = callback
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self, const_labels: str = "") -> List[str]:
+        if self.callback is not None:
+            return [f"{self.name}{_format_labels((), (), const_labels)} {_format_value(self.callback())}"]
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key, const_labels)} {_format_value(value)}"
+            for key, value in sorted(self._values.items())
+        ]
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram, optionally labelled"""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key -> (per-bucket counts with a final +Inf bucket, sum)
+        self._series: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._series.setdefault(
+                key, ([0] * (len(self.buckets) + 1), [0.0])
+            )
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            else:
+                counts[-1] += 1
+            total[0] += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """Observe the duration of the ``with`` block, in seconds"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels: str) -> int:
+        series = self._series.get(self._key(labels))
+        return sum(series[0]) if series else 0
+
+    def samples(self, const_labels: str = "") -> List[str]:
+        samples = []
+        for key, (counts, total) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                samples.append(
+                    f"{self.name}_bucket{_format_labels(self.labelnames, key, const_labels, le)} {cumulative}"
+                )
+            labels = _format_labels(self.labelnames, key, const_labels)
+            samples.append(f"{self.name}_sum{labels} {_format_value(total[0])}")
+            samples.append(f"{self.name}_count{labels} {cumulative}")
+        return samples
+
+
+class MetricsRegistry:
+    """
+    Ordered collection of metrics rendered together
+
+    ``const_labels`` is called at render time for labels added to every
+    sample, so a registry created before ``fork`` labels each worker with
+    its own process id.
+    """
+
+    def __init__(self, const_labels: Optional[Callable[[], Dict[str, str]]] = None):
+        self.metrics: List[_Metric] = []
+        self.const_labels = const_labels
+
+    def register(self, metric: _Metric) -> _Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def _const_labels(self) -> str:
+        labels = self.const_labels() if self.const_labels else {}
+        return _format_labels(list(labels), list(labels.values()))[1:-1]
+
+    def samples(self) -> Dict[str, List[str]]:
+        """Sample lines per metric name, e.g. to publish for another process"""
+        const_labels = self._const_labels()
+        return {metric.name: metric.samples(const_labels) for metric in self.metrics}
+
+    def render(self, others: Iterable[Dict[str, List[str]]] = ()) -> str:
+        """Text exposition of these metrics, plus samples other processes published"""
+        others = list(others)
+        const_labels = self._const_labels()
+        lines = []
+        for metric in self.metrics:
+            other_samples = [line for samples in others for line in samples.get(metric.name, ())]
+            lines.extend(metric.render(const_labels, other_samples))
+        return "\n".join(lines) + "\n"
+
+
+class ClassifierMetrics:
+    """The metrics ``LogClassifier`` records, in one registry"""
+
+    def __init__(
+        self,
+        executor_queue_depth: Optional[Callable[[], float]] = None,
+        bert_queue_depth: Optional[Callable[[], float]] = None,
+        single_flight_in_flight: Optional[Callable[[], float]] = None,
+    ):
+        self.registry = MetricsRegistry(const_labels=lambda: {"worker": str(os.getpid())})
+        self.stage_latency = self.registry.register(
+            Histogram(
+                "log_classifier_stage_latency_seconds",
+                "Time spent in a pipeline stage per call.",
+                ["stage"],
+            )
+        )
+        self.stage_outcomes = self.registry.register(
+            Counter(
+                "log_classifier_stage_outcomes_total",
+                "Journey step outcomes by step and status, counted with or without a journey.",
+                ["step", "status"],
+            )
+        )
+        self.external_in_flight = self.registry.register(
+            Gauge(
+                "log_classifier_external_calls_in_flight",
+                "External calls (BERT Space, Groq) currently in progress.",
+                ["service"],
+            )
+        )
+        self.external_errors = self.registry.register(
+            Counter(
+                "log_classifier_external_errors_total",
+                "External calls that failed for a reason other than a timeout.",
+                ["service"],
+            )
+        )
+        self.external_timeouts = self.registry.register(
+            Counter(
+                "log_classifier_external_timeouts_total",
+                "External calls that hit their deadline.",
+                ["service"],
+            )
+        )
+        self.executor_queue_depth = self.registry.register(
+            Gauge(
+                "log_classifier_executor_queue_depth",
+                "Blocking calls waiting for a thread in the event loop's default executor.",
+                callback=executor_queue_depth or (lambda: 0),
+            )
+        )
+        self.bert_queue_depth = self.registry.register(
+            Gauge(
+                "log_classifier_bert_batch_queue_depth",
+                "Logs waiting to join a BERT micro-batch.",
+                callback=bert_queue_depth or (lambda: 0),
+            )
+        )
+        self.bert_batch_size = self.registry.register(
+            Histogram(
+                "log_classifier_bert_batch_size",
+                "Logs per BERT micro-batch inference call.",
+                buckets=BATCH_SIZE_BUCKETS,
+            )
+        )
+        self.coalesced = self.registry.register(
+            Counter(
+                "log_classifier_coalesced_requests_total",
+                "Classifications that awaited an identical in-flight classification instead of calling BERT/LLM.",
+            )
+        )
+        self.single_flight_in_flight = self.registry.register(
+            Gauge(
+                "log_classifier_single_flight_in_flight",
+                "Distinct log templates currently being classified by BERT/LLM.",
+                callback=single_flight_in_flight or (lambda: 0),
+            )
+        )
+        for service in ("bert", "llm"):
+            self.external_in_flight.set(0, service=service)
+
+    @contextmanager
+    def external_call(self, service: str) -> Iterator[None]:
+        """Track an external call: in-flight gauge, errors and timeouts"""
+        self.external_in_flight.inc(service=service)
+        try:
+            yield
+        except (asyncio.TimeoutError, TimeoutError):
+            self.external_timeouts.inc(service=service)
+            raise
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.external_errors.inc(service=service)
+            raise
+        finally:
+            self.external_in_flight.dec(service=service)
+
+    def render(self, others: Iterable[Dict[str, List[str]]] = ()) -> str:
+        return self.registry.render(others)
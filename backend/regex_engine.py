@@ -0,0 +1,371 @@
+# backend/regex_engine.py
+
+"""
+Regex Engine Module
+
+Compiled matcher for the Stage 3 regex patterns. Patterns are compiled once
+when the classifier loads, and each log line is handled in a single pass:
+
+1. A literal-token prefilter rules out patterns whose required literal text
+   (e.g. "nova.compute.manager", "VIF", "_wait_for_boot") is absent.
+2. The surviving patterns are tried through one combined alternation whose
+   named groups report which pattern matched, preserving first-match-wins
+   order across categories.
+
+Patterns built from simple segments joined by ``.*`` (all the defaults, e.g.
+``INFO.*network.*VIF.*plugged``) are rewritten into a chain of atomic groups
+(see ``chain_form``) matched from the start of the line. Each segment is
+then found by one forward scan that never backtracks, so a line costs time
+linear in its length even when it repeats the segments without matching -
+the plain pattern backtracks over every combination of occurrences. Lines
+longer than ``max_line_length`` are truncated before matching, which caps
+that linear cost. Other patterns are matched as written.
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple
+
+# Based on the refined patterns from notebooks/regex.ipynb, in priority order
+DEFAULT_REGEX_PATTERNS = {
+    "System_Operations": [
+        r"INFO nova\.virt\.libvirt\.driver.*?\[instance: [a-f0-9\-]+\].*",
+    ],
+    "Instance_Management": [
+        r"INFO nova\.compute\.manager.*?\[instance: [a-f0-9\-]+\].*",
+    ],
+    "Instance_Management_System": [
+        r"INFO nova\.compute\.manager \[None req-.*?\].*?\[instance: [a-f0-9\-]+\].*",
+    ],
+    "Network_Operations": [
+        r"INFO.*network.*VIF.*plugged.*",
+        r"INFO.*neutron.*port.*",
+    ],
+    "Boot_Timeout_Errors": [
+        r"WARNING.*_wait_for_boot.*timeout",
+        r"ERROR.*boot.*timeout",
+    ],
+    "File_System_Errors": [
+        r"ERROR.*file not found",
+        r"ERROR.*No such file or directory",
+    ],
+}
+
+DEFAULT_MAX_LINE_LENGTH = 8192
+
+_QUANTIFIERS_OPTIONAL = "*?{"
+_BREAKING_CHARS = ".^$"
+
+
+def extract_required_literals(pattern: str, min_length: int = 3) -> List[str]:
+    """
+    Return literal substrings that every match of ``pattern`` must contain.
+
+    The scan is deliberately conservative: character classes, groups and
+    escapes like ``\\d`` end the current literal run, and a top-level
+    alternation means nothing is required. The returned tokens are casefolded
+    so they can be tested against a casefolded line for IGNORECASE patterns.
+    """
+    literals = []
+    run = []
+    last_atom_literal = False
+    i = 0
+
+    def flush():
+        if len(run) >= min_length:
+            literals.append("".join(run).casefold())
+        run.clear()
+
+    while i < len(pattern):
+        char = pattern[i]
+
+        if char == "\\" and i + 1 < len(pattern):
+            escaped = pattern[i + 1]
+            i += 2
+            if escaped.isalnum():
+                # \d, \s, \w, \b ... are classes or assertions, not literals
+                flush()
+                last_atom_literal = False
+            else:
+                run.append(escaped)
+                last_atom_literal = True
+            continue
+
+        if char == "[":
+            # Skip the whole character class
+            flush()
+            i += 1
+            if i < len(pattern) and pattern[i] == "^":
+                i += 1
+            if i < len(pattern) and pattern[i] == "]":
+                i += 1
+            while i < len(pattern) and pattern[i] != "]":
+                i += 2 if pattern[i] == "\\" else 1
+            i += 1
+            last_atom_literal = False
+            continue
+
+        if char == "(":
+            # Groups may be optional or alternations; skip their contents
+            flush()
+            depth = 1
+            i += 1
+            while i < len(pattern) and depth:
+                if pattern[i] == "\\":
+                    i += 2
+                    continue
+                if pattern[i] == "(":
+                    depth += 1
+                elif pattern[i] == ")":
+                    depth -= 1
+                i += 1
+            last_atom_literal = False
+            continue
+
+        if char == "|":
+            # Top-level alternation: no single literal is required
+            return []
+
+        if char in _QUANTIFIERS_OPTIONAL:
+            # The preceding atom may be absent (or repeated) - drop it
+            if last_atom_literal and run:
+                run.pop()
+            flush()
+            if char == "{":
+                while i < len(pattern) and pattern[i] != "}":
+                    i += 1
+            i += 1
+            last_atom_literal = False
+            continue
+
+        if char == "+":
+            # The preceding atom is required at least once
+            flush()
+            i += 1
+            last_atom_literal = False
+            continue
+
+        if char in _BREAKING_CHARS:
+            flush()
+            i += 1
+            last_atom_literal = False
+            continue
+
+        run.append(char)
+        last_atom_literal = True
+        i += 1
+
+    flush()
+    return literals
+
+
+def _class_end(pattern: str, start: int) -> int:
+    """Index just past the character class opening at ``pattern[start]``"""
+    i = start + 1
+    if i < len(pattern) and pattern[i] == "^":
+        i += 1
+    if i < len(pattern) and pattern[i] == "]":
+        i += 1
+    while i < len(pattern) and pattern[i] != "]":
+        i += 2 if pattern[i] == "\\" else 1
+    return i + 1
+
+
+def chain_form(pattern: str, flags: int = re.IGNORECASE) -> Optional[str]:
+    """
+    Rewrite ``pattern`` as a backtracking-free chain of atomic groups, or None.
+
+    A pattern qualifies when it is a sequence of segments joined by ``.*`` /
+    ``.*?``, and each segment is literal text plus character classes, where a
+    class repeated with ``+`` must be followed by a literal it cannot match
+    (so the run has only one possible end). For such a segment the earliest
+    occurrence also ends earliest, which leaves the most room for the rest,
+    so committing to it never loses a match. ``A.*B.*C`` becomes
+    ``(?>.*?A)(?>.*?B)(?>.*?C)``: used with ``re.match``, it matches a
+    newline-free line exactly when ``re.search(pattern, line)`` does.
+    """
+    segments: List[List[Tuple[str, str, bool]]] = [[]]
+    pattern = search_form(pattern)
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if pattern.startswith(".*", i):
+            i += 3 if pattern.startswith(".*?", i) else 2
+            segments.append([])
+        elif char == "\\" and i + 1 < len(pattern):
+            if pattern[i + 1].isalnum():
+                return None
+            segments[-1].append(("literal", pattern[i : i + 2], False))
+            i += 2
+        elif char == "[":
+            end = _class_end(pattern, i)
+            repeated = pattern[end : end + 1] == "+"
+            segments[-1].append(("class", pattern[i:end], repeated))
+            i = end + repeated
+        elif char in "()|?*+{}^$.":
+            return None
+        else:
+            segments[-1].append(("literal", re.escape(char), False))
+            i += 1
+
+    for segment in segments:
+        for position, (kind, text, repeated) in enumerate(segment):
+            if not repeated:
+                continue
+            following = segment[position + 1] if position + 1 < len(segment) else None
+            if following is None or following[0] != "literal":
+                return None
+            if re.fullmatch(text, re.sub(r"\\(.)", r"\1", following[1]), flags):
+                return None
+
+    return "".join(
+        "(?>.*?" + "".join(text + ("+" if repeated else "") for _, text, repeated in segment) + ")"
+        for segment in segments
+        if segment
+    )
+
+
+def search_form(pattern: str) -> str:
+    """
+    Drop a trailing unescaped ``.*`` / ``.*?`` from ``pattern``.
+
+    A trailing "anything" can always match the empty string, so removing it
+    does not change whether ``re.search`` finds a match - it only saves the
+    scan to the end of the line.
+    """
+    for suffix in (".*?", ".*"):
+        if pattern.endswith(suffix):
+            head = pattern[: -len(suffix)]
+            backslashes = len(head) - len(head.rstrip("\\"))
+            if backslashes % 2 == 0:
+                return head
+    return pattern
+
+
+class CompiledRegexMatcher:
+    """
+    Single-pass matcher over an ordered {category: [patterns]} mapping.
+
+    ``match`` returns the same (category, pattern) pair as looping over the
+    mapping with ``re.search(pattern, log_text, re.IGNORECASE)`` and stopping
+    at the first hit, or (None, None) when nothing matches.
+    """
+
+    def __init__(
+        self,
+        patterns: Dict[str, List[str]],
+        max_line_length: int = DEFAULT_MAX_LINE_LENGTH,
+        flags: int = re.IGNORECASE,
+        max_cached_combinations: int = 256,
+    ):
+        self.max_line_length = max_line_length
+        self.flags = flags
+        self.max_cached_combinations = max_cached_combinations
+
+        # Flatten into priority order: (group name, category, pattern)
+        self.rules: List[Tuple[str, str, str]] = []
+        for category, category_patterns in patterns.items():
+            for pattern in category_patterns:
+                self.rules.append((f"r{len(self.rules)}", category, pattern))
+
+        self.compiled = [
+            re.compile(search_form(pattern), flags) for _, _, pattern in self.rules
+        ]
+        # Backtracking-free forms, matched from the start of each line
+        self.chains = [chain_form(pattern, flags) for _, _, pattern in self.rules]
+        self._compiled_chains = [
+            re.compile(chain, flags) if chain is not None else None for chain in self.chains
+        ]
+
+        # Each distinct literal gets one bit; a rule is a candidate for a line
+        # when all of its literal bits are present in the line's bitmask.
+        self.rule_literals = [
+            tuple(extract_required_literals(pattern)) for _, _, pattern in self.rules
+        ]
+        literal_bits: Dict[str, int] = {}
+        for literals in self.rule_literals:
+            for literal in literals:
+                literal_bits.setdefault(literal, 1 << len(literal_bits))
+        self._literal_bits = list(literal_bits.items())
+        self._rule_masks = [
+            sum(literal_bits[literal] for literal in set(literals))
+            for literals in self.rule_literals
+        ]
+
+        # re.IGNORECASE folds some non-ASCII characters (e.g. dotless "ı" to
+        # "i") that str.casefold leaves alone, so such lines skip the prefilter
+        self._all_rules = tuple(range(len(self.rules)))
+        self._candidates_cache: Dict[int, Tuple[int, ...]] = {}
+        self._combined_cache: Dict[Tuple[int, ...], "re.Pattern[str]"] = {}
+
+    def _combined_for(self, candidates: Tuple[int, ...]) -> "re.Pattern[str]":
+        """Compile (and cache) the ordered alternation for a candidate set"""
+        combined = self._combined_cache.get(candidates)
+        if combined is None:
+            # Anchored lookaheads are tried left to right at position 0, so the
+            # first alternative that can match anywhere in the line wins -
+            # exactly the priority order of the original loop.
+            alternatives = "|".join(
+                rf"(?=(?P<{self.rules[i][0]}>{self.chains[i]}))"
+                if self.chains[i] is not None
+                else rf"(?=[\s\S]*?(?P<{self.rules[i][0]}>{search_form(self.rules[i][2])}))"
+                for i in candidates
+            )
+            combined = re.compile(alternatives, self.flags)
+            if len(self._combined_cache) < self.max_cached_combinations:
+                self._combined_cache[candidates] = combined
+        return combined
+
+    def _rule_matches(self, index: int, log_text: str) -> bool:
+        chain = self._compiled_chains[index]
+        if chain is None:
+            return self.compiled[index].search(log_text) is not None
+        if "\n" not in log_text:
+            return chain.match(log_text) is not None
+        return any(chain.match(line) for line in log_text.split("\n"))
+
+    def candidates(self, log_text: str) -> Tuple[int, ...]:
+        """Indices of rules whose required literals all occur in the line"""
+        if not log_text.isascii():
+            return self._all_rules
+
+        folded = log_text.casefold()
+        present = 0
+        for literal, bit in self._literal_bits:
+            if literal in folded:
+                present |= bit
+
+        candidates = self._candidates_cache.get(present)
+        if candidates is None:
+            candidates = tuple(
+                index
+                for index, mask in enumerate(self._rule_masks)
+                if mask & present == mask
+            )
+            self._candidates_cache[present] = candidates
+        return candidates
+
+    def match(self, log_text: str) -> Tuple[Optional[str], Optional[str]]:
+        """Return (category, pattern) of the first matching rule"""
+        if len(log_text) > self.max_line_length:
+            log_text = log_text[: self.max_line_length]
+
+        candidates = self.candidates(log_text)
+        if not candidates:
+            return None, None
+
+        if len(candidates) == 1 or "\n" in log_text:
+            # Chains only scan within a line, so multi-line text goes rule by rule
+            for index in candidates:
+                if self._rule_matches(index, log_text):
+                    return self.rules[index][1], self.rules[index][2]
+            return None, None
+
+        match = self._combined_for(candidates).match(log_text)
+        if not match:
+            return None, None
+
+        for index in candidates:
+            name, category, pattern = self.rules[index]
+            if match.group(name) is not None:
+                return category, pattern
+        return None, None
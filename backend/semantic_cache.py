@@ -0,0 +1,228 @@
+# backend/semantic_cache.py
+
+"""
+Semantic Cache Module
+
+The template cache only helps when two logs mask to the same template. Logs
+that reach the LLM often differ in wording instead, e.g. the same neutron
+port-binding failure reported by different agents. ``SemanticCache`` embeds
+each log with a weighted, hashed bag of features over its masked template
+and reuses a prior LLM verdict when the cosine similarity to a cached log
+passes a threshold.
+
+A plain bag of words scores a log by everything it shares with another, so
+"Successfully unplugged vif VIFOpenVSwitch(...)" matched the "plugged" line
+on its long shared detail. The features are therefore weighted by where
+they occur (see ``_features``):
+
+- the log level, weighted so an ERROR does not reuse an INFO verdict;
+- the logger's module name, by leading components ("neutron",
+  "neutron.plugins", ...), so different agents of one service stay close;
+- the event - the message up to its first ``(``, ``:``, ``[``, ``{`` or
+  ``=`` - at full weight and the detail after it at a quarter;
+- words with a negating prefix ("unplugged", "disconnected") count
+  against their base word, and words after "not"/"no" are separate,
+  heavier features, so opposite events pull apart. Hyphenated names such
+  as ``network-vif-unplugged`` stay one word.
+
+Request context such as ``[None req-<ID> admin admin]`` is dropped, and word
+endings (-ing, -ed, -s) are stripped so "binding failed" meets "Failed to
+bind". The default threshold of 0.75 was measured with
+``benchmarks/semantic_cache_benchmark.py`` on dataset_sampling.csv.
+
+Embeddings are L2-normalised NumPy vectors in a preallocated matrix, so a
+lookup is one matrix-vector product and memory is fixed by ``max_size`` and
+``dim``. When full, the least recently used entry is overwritten.
+"""
+
+import re
+import zlib
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from cache import mask_log_template
+
+_TOKEN = re.compile(r"[a-z_][a-z0-9_]+(?:-[a-z_][a-z0-9_]+)*")
+_HEADER = re.compile(r"\b(TRACE|DEBUG|INFO|WARNING|WARN|ERROR|CRITICAL)\s+([A-Za-z_][\w.]*)")
+_CONTEXT = re.compile(r"^(?:\s*\[[^\]]*\])+")
+_EVENT_END = re.compile(r"[(:\[{=]")
+_NEGATING_PREFIX = re.compile(r"(?:^|-)(un|dis|non)(?=[a-z]{4})")
+_NEGATIONS = {"not", "no", "never", "cannot"}
+_ENDING = re.compile(r"(?<=[a-z]{3})(?:ing|ed|es|s)$")
+
+DEFAULT_THRESHOLD = 0.75
+
+# Feature weights (see the module docstring)
+LEVEL_WEIGHT = 2.0
+MODULE_WEIGHT = 0.5
+MODULE_DEPTH = 3
+EVENT_WEIGHT = 1.0
+DETAIL_WEIGHT = 0.25
+PAIR_WEIGHT = 0.5
+NEGATION_WEIGHT = 4.0
+
+
+def _add_words(features: Dict[str, float], text: str, weight: float) -> None:
+    """Add the words and word pairs of ``text``, with negations pulling apart"""
+    words = [_ENDING.sub("", word) for word in _TOKEN.findall(text.lower())]
+    previous = None
+    for word in words:
+        if previous in _NEGATIONS:
+            feature, word_weight = f"not {word}", weight * NEGATION_WEIGHT
+        elif _NEGATING_PREFIX.search(word):
+            # "unplugged" counts against "plugged" as well as for itself
+            base = _NEGATING_PREFIX.sub(lambda prefix: prefix.group()[:-len(prefix.group(1))], word)
+            features[base] = features.get(base, 0.0) - weight * NEGATION_WEIGHT
+            feature, word_weight = word, weight
+        else:
+            feature, word_weight = word, weight
+        features[feature] = features.get(feature, 0.0) + word_weight
+        previous = word
+    for first, second in zip(words, words[1:]):
+        pair = f"{first} {second}"
+        features[pair] = features.get(pair, 0.0) + weight * PAIR_WEIGHT
+
+
+def _features(log_text: str) -> Dict[str, float]:
+    """Weighted features of a log's masked template"""
+    template = mask_log_template(log_text)
+    features: Dict[str, float] = {}
+
+    message = template
+    header = _HEADER.search(template)
+    if header:
+        level, module = header.groups()
+        features[f"level:{level}"] = LEVEL_WEIGHT
+        components = module.lower().split(".")
+        for depth in range(1, min(len(components), MODULE_DEPTH) + 1):
+            features["module:" + ".".join(components[:depth])] = MODULE_WEIGHT
+        message = _CONTEXT.sub("", template[header.end():])
+
+    event_end = _EVENT_END.search(message)
+    if event_end:
+        _add_words(features, message[: event_end.start()], EVENT_WEIGHT)
+        _add_words(features, message[event_end.start():], DETAIL_WEIGHT)
+    else:
+        _add_words(features, message, EVENT_WEIGHT)
+    return features
+
+
+def hashing_embed(log_texts: Sequence[str], dim: int = 1024) -> np.ndarray:
+    """
+    Embed logs as rows of an (n, dim) float32 matrix.
+
+    Weighted features are hashed into ``dim`` buckets with a stable hash and
+    L2-normalised, so a dot product between rows is their cosine similarity.
+    """
+    rows, columns, weights = [], [], []
+    for row, log_text in enumerate(log_texts):
+        for feature, weight in _features(log_text).items():
+            rows.append(row)
+            columns.append(zlib.crc32(feature.encode("utf-8")) % dim)
+            weights.append(weight)
+
+    vectors = np.zeros((len(log_texts), dim), dtype=np.float32)
+    np.add.at(
+        vectors,
+        (np.array(rows, dtype=np.intp), np.array(columns, dtype=np.intp)),
+        np.array(weights, dtype=np.float32),
+    )
+
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class SemanticCache:
+    """
+    Bounded nearest-neighbour cache of LLM verdicts.
+
+    Values are the dicts stored with ``put`` ({"category", "confidence",
+    "reasoning"}); lookups return the value with its cosine similarity.
+    """
+
+    def __init__(
+        self, max_size: int = 5000, threshold: float = DEFAULT_THRESHOLD, dim: int = 1024
+    ):
+        self.max_size = max(0, max_size)
+        self.threshold = threshold
+        self.dim = dim
+
+        self._vectors = np.zeros((self.max_size, dim), dtype=np.float32)
+        self._values: List[Optional[Dict[str, Any]]] = [None] * self.max_size
+        self._last_used = np.zeros(self.max_size, dtype=np.int64)
+        self._size = 0
+        self._clock = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def get(self, log_text: str) -> Optional[Tuple[Dict[str, Any], float]]:
+        """Return (value, similarity) for the closest cached log, or None"""
+        return self.get_many([log_text])[0]
+
+    def get_many(
+        self, log_texts: Sequence[str]
+    ) -> List[Optional[Tuple[Dict[str, Any], float]]]:
+        """Vectorised ``get`` over several logs"""
+        if not log_texts:
+            return []
+        if self._size == 0:
+            self.misses += len(log_texts)
+            return [None] * len(log_texts)
+
+        similarities = hashing_embed(log_texts, self.dim) @ self._vectors[: self._size].T
+        best = similarities.argmax(axis=1)
+
+        results: List[Optional[Tuple[Dict[str, Any], float]]] = []
+        for row, slot in enumerate(best):
+            similarity = float(similarities[row, slot])
+            if similarity > 0 and similarity >= self.threshold:
+                self._clock += 1
+                self._last_used[slot] = self._clock
+                self.hits += 1
+                results.append((self._values[slot], similarity))
+            else:
+                self.misses += 1
+                results.append(None)
+        return results
+
+    def put(self, log_text: str, value: Dict[str, Any]) -> None:
+        """Store a verdict, overwriting the least recently used entry when full"""
+        if self.max_size == 0:
+            return
+
+        if self._size < self.max_size:
+            slot = self._size
+            self._size += 1
+        else:
+            slot = int(self._last_used.argmin())
+            self.evictions += 1
+
+        self._clock += 1
+        self._vectors[slot] = hashing_embed([log_text], self.dim)[0]
+        self._values[slot] = value
+        self._last_used[slot] = self._clock
+
+    def clear(self) -> None:
+        self._values = [None] * self.max_size
+        self._last_used[:] = 0
+        self._size = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": self._size,
+            "max_size": self.max_size,
+            "threshold": self.threshold,
+            "dim": self.dim,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+        }
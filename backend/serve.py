@@ -0,0 +1,167 @@
+# backend/serve.py
+
+"""
+Multi-worker Server Module
+
+Serves the API from several worker processes that share one listening
+socket, so every core is used. The classifier's fork-safe parts (compiled
+regex patterns, local BERT weights, the template cache warmed from the
+template store) are loaded once in this parent process and shared by the
+forked workers copy-on-write. Each worker then opens its own Space/LLM
+clients and store connections in the app's lifespan.
+
+BERT/LLM results reach the other workers through the template store, a
+SQLite file in WAL mode: a worker that misses its in-memory template cache
+checks the store before calling BERT or the LLM. Statistics and metrics are
+combined across workers through snapshots in a directory created per run
+(``WORKER_SNAPSHOT_DIR``, see ``worker_snapshots.py``).
+
+The parent restarts workers that exit unexpectedly and passes SIGTERM /
+SIGINT on to them for a graceful shutdown.
+
+Usage (from backend/):
+    python serve.py --host 0.0.0.0 --port 8000 --workers 4
+"""
+
+import argparse
+import logging
+import os
+import shutil
+import signal
+import socket
+import tempfile
+import time
+
+import uvicorn
+
+import main
+from worker_snapshots import remove_snapshot
+
+logger = logging.getLogger(__name__)
+# main.py's logging config is WARNING; the parent's lifecycle messages show regardless
+logger.setLevel(logging.INFO)
+
+# Pause before replacing a worker that died, so a crash at startup does not spin
+RESTART_DELAY_SECONDS = 1.0
+
+
+def available_cpus() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def default_workers() -> int:
+    """WEB_CONCURRENCY if set, otherwise one worker per available CPU"""
+    return int(os.getenv("WEB_CONCURRENCY", "0")) or available_cpus()
+
+
+def bind_socket(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def spawn_worker(sock: socket.socket, args: argparse.Namespace) -> int:
+    """Fork a worker serving the app on ``sock``; returns its pid"""
+    pid = os.fork()
+    if pid:
+        return pid
+
+    # Own process group, so a terminal Ctrl-C reaches only the parent, which
+    # then stops each worker exactly once
+    os.setpgid(0, 0)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+
+    code = 0
+    try:
+        config = uvicorn.Config(
+            main.app,
+            log_level=args.log_level,
+            timeout_keep_alive=args.timeout_keep_alive,
+        )
+        uvicorn.Server(config).run(sockets=[sock])
+    except BaseException as e:
+        logger.error(f"Worker {os.getpid()} failed: {e}")
+        code = 1
+    finally:
+        os._exit(code)
+
+
+def serve(args: argparse.Namespace) -> None:
+    sock = bind_socket(args.host, args.port)
+
+    # Split the cores between the workers' local BERT inference threads
+    os.environ.setdefault("BERT_NUM_THREADS", str(max(1, available_cpus() // args.workers)))
+    # Where the workers publish their stats and metrics for one another
+    snapshot_dir = tempfile.mkdtemp(prefix="log-classifier-workers-")
+    os.environ["WORKER_SNAPSHOT_DIR"] = snapshot_dir
+    main.preload_classifier()
+
+    workers = set()
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for _ in range(args.workers):
+        workers.add(spawn_worker(sock, args))
+    logger.info(f"Serving on http://{args.host}:{args.port} with {args.workers} workers")
+
+    while workers:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        workers.discard(pid)
+        remove_snapshot(snapshot_dir, pid)
+        if stopping:
+            continue
+
+        logger.warning(
+            f"Worker {pid} exited with code {os.waitstatus_to_exitcode(status)}; restarting it."
+        )
+        time.sleep(RESTART_DELAY_SECONDS)
+        if not stopping:
+            workers.add(spawn_worker(sock, args))
+
+    sock.close()
+    shutil.rmtree(snapshot_dir, ignore_errors=True)
+
+
+def main_cli() -> None:
+    parser = argparse.ArgumentParser(description="Serve the API from several worker processes")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=default_workers(),
+        help="Worker processes (default: WEB_CONCURRENCY, else one per CPU)",
+    )
+    parser.add_argument("--log-level", default="warning")
+    parser.add_argument("--timeout-keep-alive", type=int, default=5)
+    args = parser.parse_args()
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+
+    serve(args)
+
+
+if __name__ == "__main__":
+    main_cli()
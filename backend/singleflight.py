@@ -0,0 +1,69 @@
+# backend/singleflight.py
+
+"""
+Single-flight Module
+
+Coalesces concurrent calls that share a key into one execution: the first
+caller starts the work, and callers arriving while it is still running
+await the same result instead of starting their own. Used in front of the
+BERT and LLM stages so a flood of identical (or identically templated) logs
+makes one set of external calls rather than one per request.
+
+The shared work runs as its own task, so a caller being cancelled (e.g. a
+hedged request hitting its deadline) does not cancel it for the others.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+def _consume_exception(task: "asyncio.Task") -> None:
+    # Nobody may be left awaiting the task; don't log "exception never retrieved"
+    if not task.cancelled():
+        task.exception()
+
+
+class SingleFlight:
+    """Run at most one ``func`` per key at a time, sharing its result"""
+
+    def __init__(self):
+        self._in_flight: Dict[Hashable, "asyncio.Task"] = {}
+
+        self.calls = 0
+        self.coalesced = 0
+
+    def __len__(self) -> int:
+        return len(self._in_flight)
+
+    async def run(
+        self, key: Hashable, func: Callable[[], Awaitable[Any]]
+    ) -> Tuple[Any, bool]:
+        """
+        Return ``(result, coalesced)``; ``coalesced`` is True when the result
+        came from a call another caller had already started.
+        """
+        task = self._in_flight.get(key)
+        coalesced = task is not None
+        if coalesced:
+            self.coalesced += 1
+        else:
+            self.calls += 1
+            task = asyncio.ensure_future(func())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+            task.add_done_callback(_consume_exception)
+
+        return await asyncio.shield(task), coalesced
+
+    def _forget(self, key: Hashable, task: "asyncio.Task") -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.calls + self.coalesced
+        return {
+            "in_flight": len(self._in_flight),
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "coalesced_rate": round(self.coalesced / total, 4) if total else 0.0,
+        }
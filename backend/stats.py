@@ -0,0 +1,243 @@
+# backend/stats.py
+
+"""
+Classification Statistics Module
+
+Running tallies of classified logs: per-stage counts and confidence sums,
+category counts (overall and per stage), error subcategories, confidence
+bands and a confidence histogram. ``record`` updates them in O(1) per log,
+so the API can keep them live for ``GET /api/stats`` and the dashboard never
+has to re-scan results; ``report`` turns them into a structured summary.
+
+Under ``serve.py`` each worker publishes its ``state``, and ``GET /api/stats``
+adds the other workers' states to its own with ``merge`` (see
+``worker_snapshots.py``).
+
+The offline analyser (``log_classification_system``'s data_sampling) feeds
+the same aggregator from a results DataFrame with ``record_frame``, so both
+report identical shapes.
+"""
+
+import math
+import time
+from collections import Counter, defaultdict
+from typing import Any, Dict, Optional
+
+# Categories counted as error subcategories
+ERROR_MARKERS = ("Error", "Timeout")
+
+# Lower bounds of the confidence bands reported for confidences above zero
+CONFIDENCE_BANDS = (("high", 0.8), ("medium", 0.7), ("low", 0.0))
+
+# Stage reported for results without one (e.g. empty cells in results files)
+UNCLASSIFIED_STAGE = "Unclassified"
+
+
+def is_error_category(category: str) -> bool:
+    return any(marker in category for marker in ERROR_MARKERS)
+
+
+def _confidence_band(confidence: float) -> str:
+    for band, lower in CONFIDENCE_BANDS:
+        if confidence >= lower:
+            return band
+    return CONFIDENCE_BANDS[-1][0]
+
+
+class StatsAggregator:
+    """O(1)-per-log running statistics over classification results"""
+
+    def __init__(self, histogram_bins: int = 10):
+        self.histogram_bins = max(1, histogram_bins)
+        self.clear()
+
+    def clear(self) -> None:
+        self.started_at = time.time()
+        self.total = 0
+        self.stage_counts: Counter = Counter()
+        self.stage_confidence_sums: Dict[str, float] = defaultdict(float)
+        self.category_counts: Counter = Counter()
+        self.stage_category_counts: Dict[str, Counter] = defaultdict(Counter)
+        self.error_counts: Counter = Counter()
+        self.label_counts: Counter = Counter()
+        self.band_counts: Counter = Counter()
+        self.histogram = [0] * self.histogram_bins
+        self.confidence_sum = 0.0
+        self.confident = 0
+
+    def record(
+        self,
+        stage: Optional[str],
+        category: Optional[str],
+        confidence: Optional[float],
+        label: Optional[str] = None,
+    ) -> None:
+        """Add one classified log"""
+        stage = stage or UNCLASSIFIED_STAGE
+        category = category or UNCLASSIFIED_STAGE
+        confidence = float(confidence or 0.0)
+        if math.isnan(confidence):
+            confidence = 0.0
+
+        self.total += 1
+        self.stage_counts[stage] += 1
+        self.stage_confidence_sums[stage] += confidence
+        self.category_counts[category] += 1
+        self.stage_category_counts[stage][category] += 1
+        if is_error_category(category):
+            self.error_counts[category] += 1
+        if label:
+            self.label_counts[label] += 1
+
+        bin_index = min(int(confidence * self.histogram_bins), self.histogram_bins - 1)
+        self.histogram[max(bin_index, 0)] += 1
+        if confidence > 0:
+            self.confident += 1
+            self.confidence_sum += confidence
+            self.band_counts[_confidence_band(confidence)] += 1
+
+    def record_result(self, result: Dict[str, Any]) -> None:
+        """Add a ``LogClassifier`` result (category / confidence / stage)"""
+        self.record(result["stage"], result["category"], result["confidence"])
+
+    def record_frame(
+        self,
+        df,
+        stage_column: str = "pipeline_stage",
+        category_column: str = "final_category",
+        confidence_column: str = "final_confidence",
+        label_column: Optional[str] = "label",
+    ) -> None:
+        """
+        Add every row of a results DataFrame. Equivalent to ``record`` per
+        row, but counted with one grouped pass instead of a Python loop.
+        """
+        import numpy as np
+        import pandas as pd
+
+        if len(df) == 0:
+            return
+
+        stages = df[stage_column].astype(object).where(df[stage_column].notna(), UNCLASSIFIED_STAGE)
+        categories = (
+            df[category_column]
+            .astype(object)
+            .where(df[category_column].notna(), UNCLASSIFIED_STAGE)
+        )
+        confidences = (
+            pd.to_numeric(df[confidence_column], errors="coerce").fillna(0.0).to_numpy(np.float64)
+        )
+        frame = pd.DataFrame(
+            {"stage": stages.to_numpy(), "category": categories.to_numpy(), "confidence": confidences}
+        )
+
+        self.total += len(frame)
+        grouped = frame.groupby(["stage", "category"], sort=False)["confidence"].agg(["size", "sum"])
+        for (stage, category), (count, confidence_sum) in grouped.iterrows():
+            count = int(count)
+            self.stage_counts[stage] += count
+            self.stage_confidence_sums[stage] += float(confidence_sum)
+            self.category_counts[category] += count
+            self.stage_category_counts[stage][category] += count
+            if is_error_category(category):
+                self.error_counts[category] += count
+
+        if label_column and label_column in df.columns:
+            for label, count in df[label_column].value_counts().items():
+                if label and count:
+                    self.label_counts[label] += int(count)
+
+        bins = np.clip((confidences * self.histogram_bins).astype(np.int64), 0, self.histogram_bins - 1)
+        for bin_index, count in enumerate(np.bincount(bins, minlength=self.histogram_bins)):
+            self.histogram[bin_index] += int(count)
+
+        positive = confidences[confidences > 0]
+        self.confident += len(positive)
+        self.confidence_sum += float(positive.sum())
+        upper = np.inf
+        for band, lower in CONFIDENCE_BANDS:
+            self.band_counts[band] += int(((positive >= lower) & (positive < upper)).sum())
+            upper = lower
+
+    def state(self) -> Dict[str, Any]:
+        """The running tallies as JSON-serialisable data, for ``merge``"""
+        return {
+            "started_at": self.started_at,
+            "total": self.total,
+            "stage_counts": dict(self.stage_counts),
+            "stage_confidence_sums": dict(self.stage_confidence_sums),
+            "category_counts": dict(self.category_counts),
+            "stage_category_counts": {
+                stage: dict(counts) for stage, counts in self.stage_category_counts.items()
+            },
+            "error_counts": dict(self.error_counts),
+            "label_counts": dict(self.label_counts),
+            "band_counts": dict(self.band_counts),
+            "histogram": list(self.histogram),
+            "confidence_sum": self.confidence_sum,
+            "confident": self.confident,
+        }
+
+    def merge(self, state: Dict[str, Any]) -> None:
+        """Add the tallies of another aggregator's ``state()`` (same histogram bins)"""
+        self.started_at = min(self.started_at, state["started_at"])
+        self.total += state["total"]
+        self.stage_counts.update(state["stage_counts"])
+        for stage, confidence_sum in state["stage_confidence_sums"].items():
+            self.stage_confidence_sums[stage] += confidence_sum
+        self.category_counts.update(state["category_counts"])
+        for stage, counts in state["stage_category_counts"].items():
+            self.stage_category_counts[stage].update(counts)
+        self.error_counts.update(state["error_counts"])
+        self.label_counts.update(state["label_counts"])
+        self.band_counts.update(state["band_counts"])
+        for bin_index, count in enumerate(state["histogram"]):
+            self.histogram[bin_index] += count
+        self.confidence_sum += state["confidence_sum"]
+        self.confident += state["confident"]
+
+    def report(self, top_n: int = 15, stage_top_n: int = 8) -> Dict[str, Any]:
+        """Structured summary of everything recorded so far"""
+
+        def percentage(count: int) -> float:
+            return round(count / self.total * 100, 1) if self.total else 0.0
+
+        error_total = sum(self.error_counts.values())
+        return {
+            "total": self.total,
+            "since": self.started_at,
+            "stages": {
+                stage: {
+                    "count": count,
+                    "percentage": percentage(count),
+                    "average_confidence": round(self.stage_confidence_sums[stage] / count, 3),
+                }
+                for stage, count in self.stage_counts.most_common()
+            },
+            "category_diversity": len(self.category_counts),
+            "top_categories": [
+                {"category": category, "count": count, "percentage": percentage(count)}
+                for category, count in self.category_counts.most_common(top_n)
+            ],
+            "errors": {
+                "total": error_total,
+                "percentage": percentage(error_total),
+                "categories": dict(self.error_counts.most_common()),
+            },
+            "stage_categories": {
+                stage: dict(counts.most_common(stage_top_n))
+                for stage, counts in self.stage_category_counts.items()
+            },
+            "confidence": {
+                "average": round(self.confidence_sum / self.confident, 3) if self.confident else 0.0,
+                "bands": {band: self.band_counts[band] for band, _ in CONFIDENCE_BANDS},
+                "histogram": {
+                    "bin_edges": [round(i / self.histogram_bins, 3) for i in range(self.histogram_bins + 1)],
+                    "counts": list(self.histogram),
+                },
+            },
+            "labels": {
+                label: {"count": count, "percentage": percentage(count)}
+                for label, count in self.label_counts.most_common()
+            },
+        }
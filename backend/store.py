@@ -0,0 +1,270 @@
+# backend/store.py
+
+"""
+Template Store Module
+
+Persists the template cache across restarts in a local SQLite file holding
+template -> (category, confidence, stage). The classifier loads it into the
+in-memory ``TemplateCache`` at startup, so a fresh deploy does not send
+every previously seen log back to BERT and the LLM.
+
+Writes never block a request: ``record`` only queues the entry, and a
+background task writes queued entries in one transaction every
+``flush_interval_seconds`` (sooner once ``batch_size`` entries are queued).
+``close`` flushes whatever is left. The store can be pre-seeded from a
+labelled CSV such as ``log_classification_system/data/dataset_sampling.csv``.
+Reads take a maximum age (the cache TTL); seeded entries never age out.
+
+Several worker processes can share one file (see ``serve.py``): ``get``
+reads through a separate WAL reader connection, so a worker sees results
+the others have flushed without waiting on their writes. Reads are blocking
+too (a lock or checkpoint can hold them up to ``read_timeout_seconds``), so
+callers run them in a worker thread.
+"""
+
+import asyncio
+import csv
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from cache import mask_log_template
+
+logger = logging.getLogger(__name__)
+
+# Only results the external stages produced are worth persisting
+PERSISTED_STAGES = ("BERT", "LLM")
+
+# updated_at of rows seeded from a labelled CSV: curated labels, which never
+# age out, and which live results overwrite
+SEEDED_AT = 0
+
+
+class TemplateStore:
+    """SQLite-backed template -> result store with batched background writes"""
+
+    def __init__(
+        self,
+        path: str,
+        flush_interval_seconds: float = 2.0,
+        batch_size: int = 500,
+        read_timeout_seconds: float = 1.0,
+    ):
+        self.path = Path(path)
+        self.read_timeout_seconds = read_timeout_seconds
+        self.flush_interval_seconds = flush_interval_seconds
+        self.batch_size = max(1, batch_size)
+
+        self._connection: sqlite3.Connection = None
+        self._reader: sqlite3.Connection = None
+        self._read_lock = threading.Lock()
+        self._pending: Dict[str, Tuple[Dict[str, Any], float]] = {}
+        self._wakeup: "asyncio.Event" = None
+        self._writer: "asyncio.Task" = None
+        self._closing = False
+
+        self.writes = 0
+        self.flushes = 0
+        self.reads = 0
+        self.read_hits = 0
+
+    def open(self) -> None:
+        """Open (creating if needed) the database - blocking"""
+        if self.path.parent != Path(""):
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS templates (
+                template TEXT PRIMARY KEY,
+                category TEXT NOT NULL,
+                confidence REAL NOT NULL,
+                stage TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        self._connection.commit()
+        # Used from whichever worker thread runs a read, one at a time; waits
+        # at most read_timeout_seconds on another process's lock
+        self._reader = sqlite3.connect(
+            self.path, timeout=self.read_timeout_seconds, check_same_thread=False
+        )
+
+    @staticmethod
+    def _fresh(max_age_seconds: Optional[float]) -> Tuple[str, Tuple]:
+        """
+        SQL condition (and its parameters) for entries that have not aged
+        out: seeded entries, and entries written within ``max_age_seconds``
+        """
+        if max_age_seconds is None:
+            return "1", ()
+        return "(updated_at = ? OR updated_at >= ?)", (SEEDED_AT, time.time() - max_age_seconds)
+
+    @staticmethod
+    def _entry(
+        category: str, confidence: float, stage: str, updated_at: float, now: float
+    ) -> Tuple[Dict[str, Any], float]:
+        age = 0.0 if updated_at == SEEDED_AT else max(0.0, now - updated_at)
+        return {"category": category, "confidence": confidence, "stage": stage}, age
+
+    def get(
+        self, template: str, max_age_seconds: Optional[float] = None
+    ) -> Optional[Tuple[Dict[str, Any], float]]:
+        """
+        Return (result, age in seconds) for one template, or None - blocking.
+        With ``max_age_seconds`` entries older than that count as missing;
+        seeded entries never age and are returned with age 0.
+        """
+        fresh, params = self._fresh(max_age_seconds)
+        query = (
+            "SELECT category, confidence, stage, updated_at FROM templates "
+            f"WHERE template = ? AND {fresh}"
+        )
+
+        with self._read_lock:
+            self.reads += 1
+            row = self._reader.execute(query, (template, *params)).fetchone()
+        if row is None:
+            return None
+        self.read_hits += 1
+        return self._entry(*row, now=time.time())
+
+    def get_many(
+        self, templates: List[str], max_age_seconds: Optional[float] = None
+    ) -> Dict[str, Tuple[Dict[str, Any], float]]:
+        """``get`` for several templates in one call, omitting the missing ones - blocking"""
+        found = {}
+        for template in templates:
+            stored = self.get(template, max_age_seconds)
+            if stored:
+                found[template] = stored
+        return found
+
+    def load(
+        self, limit: int = None, max_age_seconds: Optional[float] = None
+    ) -> List[Tuple[str, Dict[str, Any], float]]:
+        """
+        Return the ``limit`` most recently updated entries as (template,
+        result, age in seconds), oldest first - blocking. Entries age out
+        exactly as in ``get``.
+        """
+        fresh, params = self._fresh(max_age_seconds)
+        query = (
+            "SELECT template, category, confidence, stage, updated_at FROM templates "
+            f"WHERE {fresh} ORDER BY updated_at DESC"
+        )
+        if limit is not None:
+            query += " LIMIT ?"
+            params += (limit,)
+
+        rows = self._connection.execute(query, params).fetchall()
+        now = time.time()
+        return [(template, *self._entry(*row, now=now)) for template, *row in reversed(rows)]
+
+    def seed_from_csv(self, csv_path: str) -> int:
+        """
+        Add BERT/LLM results from a labelled CSV (dataset_sampling.csv
+        columns) without overwriting entries already stored - blocking.
+        Returns the number of rows inserted.
+        """
+        entries = {}
+        with open(csv_path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                if row.get("pipeline_stage") not in PERSISTED_STAGES:
+                    continue
+                try:
+                    confidence = float(row["final_confidence"])
+                except (KeyError, TypeError, ValueError):
+                    continue
+                if not row.get("final_category"):
+                    continue
+                entries[mask_log_template(row["raw_log_text"])] = (
+                    row["final_category"],
+                    confidence,
+                    row["pipeline_stage"],
+                )
+
+        # Seeded rows are older than anything recorded live
+        cursor = self._connection.executemany(
+            "INSERT OR IGNORE INTO templates VALUES (?, ?, ?, ?, ?)",
+            [(template, *value, SEEDED_AT) for template, value in entries.items()],
+        )
+        self._connection.commit()
+        return cursor.rowcount
+
+    def record(self, template: str, value: Dict[str, Any]) -> None:
+        """Queue a result for the next batched write"""
+        self._pending[template] = (value, time.time())
+        self._ensure_writer()
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+
+    def _ensure_writer(self) -> None:
+        if self._writer is None or self._writer.done():
+            self._wakeup = asyncio.Event()
+            self._writer = asyncio.create_task(self._write_loop())
+
+    async def _write_loop(self) -> None:
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Write all queued results in one transaction"""
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, {}
+        try:
+            await asyncio.to_thread(self._write, batch)
+        except Exception as e:
+            logger.error(f"Template store write of {len(batch)} entries failed: {e}")
+
+    def _write(self, batch: Dict[str, Tuple[Dict[str, Any], float]]) -> None:
+        self._connection.executemany(
+            "INSERT OR REPLACE INTO templates VALUES (?, ?, ?, ?, ?)",
+            [
+                (template, value["category"], value["confidence"], value["stage"], updated_at)
+                for template, (value, updated_at) in batch.items()
+            ],
+        )
+        self._connection.commit()
+        self.writes += len(batch)
+        self.flushes += 1
+
+    async def close(self) -> None:
+        """Stop the writer, flush queued results and close the database"""
+        # Let an in-progress write finish rather than cancelling it mid-commit
+        self._closing = True
+        if self._writer is not None:
+            self._wakeup.set()
+            await self._writer
+            self._writer = None
+        if self._connection is not None:
+            await self.flush()
+        self.disconnect()
+
+    def disconnect(self) -> None:
+        """Close the database without flushing, e.g. before forking workers"""
+        for connection in (self._connection, self._reader):
+            if connection is not None:
+                connection.close()
+        self._connection = self._reader = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": str(self.path),
+            "pending": len(self._pending),
+            "writes": self.writes,
+            "flushes": self.flushes,
+            "reads": self.reads,
+            "read_hits": self.read_hits,
+        }
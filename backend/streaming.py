@@ -0,0 +1,180 @@
+# backend/streaming.py
+
+"""
+Streaming Classification Module
+
+Classifies an unbounded stream of raw log lines with the same
+Regex -> BERT -> LLM routing as ``LogClassifier.classify_log``, producing
+result records while input is still arriving.
+
+Memory stays flat regardless of input size: lines are split incrementally
+(over-long lines are truncated), and at most ``max_in_flight`` lines are
+between "read" and "emitted" at any time, which also bounds the reorder
+buffer when input order is preserved. Reading pauses while the window is
+full, so backpressure reaches the uploader.
+"""
+
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Dict, Tuple
+
+from fastapi.responses import StreamingResponse
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_IN_FLIGHT = 64
+DEFAULT_MAX_LINE_BYTES = 16384
+
+
+async def iter_log_lines(
+    chunks: AsyncIterator[bytes], max_line_bytes: int = DEFAULT_MAX_LINE_BYTES
+) -> AsyncIterator[Tuple[int, str]]:
+    """
+    Split a byte stream into (line_number, text) pairs.
+
+    Line numbers are 1-based positions in the input; blank lines are skipped.
+    Bytes beyond ``max_line_bytes`` in a single line are discarded.
+    """
+    buffer = bytearray()
+    overflow = False
+    line_number = 0
+
+    def decode(raw: bytes) -> str:
+        return raw.decode("utf-8", errors="replace").rstrip("\r")
+
+    async for chunk in chunks:
+        start = 0
+        while True:
+            newline = chunk.find(b"\n", start)
+            end = len(chunk) if newline == -1 else newline
+
+            if not overflow:
+                buffer += chunk[start:end]
+                if len(buffer) > max_line_bytes:
+                    del buffer[max_line_bytes:]
+                    overflow = True
+
+            if newline == -1:
+                break
+
+            line_number += 1
+            text = decode(bytes(buffer))
+            if text.strip():
+                yield line_number, text
+            buffer.clear()
+            overflow = False
+            start = newline + 1
+
+    if buffer:
+        line_number += 1
+        text = decode(bytes(buffer))
+        if text.strip():
+            yield line_number, text
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse that can be sent while the request body is still read.
+
+    The stock response listens for client disconnects by consuming
+    ``receive`` in the background, which would swallow the request body
+    chunks the endpoint is still reading. Here ``receive`` is left to the body
+    reader, which raises ``ClientDisconnect`` if the client goes away.
+    """
+
+    async def __call__(self, scope, receive, send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+def _record(line_number: int, result: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "line": line_number,
+        "final_category": result["category"],
+        "pipeline_stage": result["stage"],
+        "final_confidence": result["confidence"],
+    }
+
+
+async def classify_stream(
+    classifier,
+    lines: AsyncIterator[Tuple[int, str]],
+    preserve_order: bool = False,
+    max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Classify (line_number, text) pairs and yield one record per line.
+
+    Regex hits are yielded as soon as they are read; BERT/LLM items are
+    yielded when they complete. With ``preserve_order`` records are released
+    strictly in input order instead.
+    """
+    results: asyncio.Queue = asyncio.Queue()
+    window = asyncio.Semaphore(max_in_flight)
+    tasks = set()
+    done = object()
+
+    async def classify_unmatched(sequence: int, line_number: int, log_text: str):
+        try:
+            result = await classifier._classify_unmatched(log_text, verbose=False)
+            classifier._record_result(result)
+            record = _record(line_number, result)
+        except Exception as e:
+            logger.error(f"Stream classification error on line {line_number}: {e}")
+            record = {"line": line_number, "error": f"Classification failed: {str(e)}"}
+        results.put_nowait((sequence, record))
+
+    async def produce():
+        sequence = 0
+        try:
+            async for line_number, log_text in lines:
+                await window.acquire()
+
+                # Stage 3 inline - regex hits never wait behind slower stages
+                regex_category, _ = classifier._classify_with_regex(log_text)
+                if regex_category:
+                    result = classifier._regex_result(regex_category, verbose=False)
+                    classifier._record_result(result)
+                    results.put_nowait((sequence, _record(line_number, result)))
+                else:
+                    task = asyncio.create_task(
+                        classify_unmatched(sequence, line_number, log_text)
+                    )
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+                sequence += 1
+
+            if tasks:
+                await asyncio.gather(*tasks)
+        finally:
+            results.put_nowait(done)
+
+    producer = asyncio.create_task(produce())
+    reorder_buffer = {}
+    next_sequence = 0
+
+    try:
+        while True:
+            item = await results.get()
+            if item is done:
+                break
+
+            sequence, record = item
+            if not preserve_order:
+                window.release()
+                yield record
+                continue
+
+            reorder_buffer[sequence] = record
+            while next_sequence in reorder_buffer:
+                window.release()
+                yield reorder_buffer.pop(next_sequence)
+                next_sequence += 1
+
+        # Surface errors from reading the input
+        await producer
+    finally:
+        producer.cancel()
+        for task in list(tasks):
+            task.cancel()
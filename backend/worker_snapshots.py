@@ -0,0 +1,104 @@
+# backend/worker_snapshots.py
+
+"""
+Worker Snapshots Module
+
+Under ``serve.py`` each request is served by whichever worker accepts it,
+``GET /metrics`` and ``GET /api/stats`` included, so numbers kept per
+process would jump between scrapes. Each worker therefore publishes a JSON
+snapshot of its metrics samples and statistics to ``<directory>/<pid>.json``
+every ``interval_seconds``, and those endpoints combine the serving
+worker's live numbers with the other workers' latest snapshots. Another
+worker's numbers are at most ``interval_seconds`` old.
+
+A snapshot is written to a temporary file and renamed into place, so a
+reader never sees half of one. ``serve.py`` creates a fresh directory per
+run, hands it to the workers in ``WORKER_SNAPSHOT_DIR``, deletes a
+worker's snapshot once the worker has exited and deletes the directory on
+shutdown. A single uvicorn process has no directory and nothing to combine.
+"""
+
+import asyncio
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+logger = logging.getLogger(__name__)
+
+
+def snapshot_path(directory: str, pid: int) -> Path:
+    return Path(directory) / f"{pid}.json"
+
+
+def remove_snapshot(directory: str, pid: int) -> None:
+    """Forget the snapshot of a worker that has exited"""
+    try:
+        snapshot_path(directory, pid).unlink()
+    except FileNotFoundError:
+        pass
+
+
+class WorkerSnapshots:
+    """Publishes this worker's snapshot periodically and reads the others'"""
+
+    def __init__(
+        self,
+        directory: str,
+        snapshot: Callable[[], Dict[str, Any]],
+        interval_seconds: float = 2.0,
+    ):
+        self.directory = Path(directory)
+        self.snapshot = snapshot
+        self.interval_seconds = interval_seconds
+        self.pid = os.getpid()
+        self.path = snapshot_path(directory, self.pid)
+        self._publisher: "asyncio.Task" = None
+
+    def publish(self) -> None:
+        """Write this worker's snapshot - blocking"""
+        temporary = self.path.with_suffix(".tmp")
+        temporary.write_bytes(json.dumps(self.snapshot()).encode("utf-8"))
+        os.replace(temporary, self.path)
+
+    def others(self) -> List[Dict[str, Any]]:
+        """The latest snapshot of every other worker - blocking"""
+        snapshots = []
+        for path in self.directory.glob("*.json"):
+            if path == self.path:
+                continue
+            try:
+                snapshots.append(json.loads(path.read_bytes()))
+            except FileNotFoundError:
+                # The worker exited and serve.py removed it meanwhile
+                continue
+            except (OSError, ValueError) as e:
+                logger.warning(f"Skipping unreadable worker snapshot {path.name}: {e}")
+        return snapshots
+
+    def start(self) -> None:
+        if self._publisher is None or self._publisher.done():
+            self._publisher = asyncio.create_task(self._publish_loop())
+
+    async def _publish_loop(self) -> None:
+        while True:
+            try:
+                await asyncio.to_thread(self.publish)
+            except Exception as e:
+                logger.error(f"Publishing the worker snapshot failed: {e}")
+            await asyncio.sleep(self.interval_seconds)
+
+    async def close(self) -> None:
+        """Stop publishing, after one final snapshot"""
+        if self._publisher is not None:
+            self._publisher.cancel()
+            try:
+                await self._publisher
+            except asyncio.CancelledError:
+                pass
+            self._publisher = None
+        try:
+            await asyncio.to_thread(self.publish)
+        except Exception as e:
+            logger.error(f"Publishing the final worker snapshot failed: {e}")
@@ -1,3 +1,53 @@
 """
 Core modules for the log classification system.
 """
+
+import builtins
+import sys
+from importlib.util import module_from_spec, spec_from_file_location
+from pathlib import Path
+from types import ModuleType
+
+# The pipeline stages (regex engine, BERT backends, LLM client) live in the
+# repository's backend/ directory as flat modules, run from that directory by
+# the service. The offline tooling in this package loads them through
+# load_backend_module() rather than putting backend/ on sys.path, which would
+# make names such as ``main``, ``cache`` and ``stats`` resolve to backend
+# modules everywhere.
+BACKEND_DIR = Path(__file__).resolve().parents[2] / "backend"
+BACKEND_PACKAGE = f"{__name__}.backend"
+
+
+def load_backend_module(name: str) -> ModuleType:
+    """
+    Import backend/<name>.py as ``<this package>.backend.<name>``
+
+    Backend modules import one another by bare name (``from cache import
+    ...``); while a backend module runs, such imports of backend modules are
+    loaded the same way, and every other import is left to Python.
+    """
+    qualified_name = f"{BACKEND_PACKAGE}.{name}"
+    module = sys.modules.get(qualified_name)
+    if module is not None:
+        return module
+
+    spec = spec_from_file_location(qualified_name, BACKEND_DIR / f"{name}.py")
+    if spec is None or not Path(spec.origin).is_file():
+        raise ModuleNotFoundError(f"No backend module named {name!r} in {BACKEND_DIR}")
+
+    module = module_from_spec(spec)
+    module.__builtins__ = dict(vars(builtins), __import__=_import_from_backend)
+    sys.modules[qualified_name] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        del sys.modules[qualified_name]
+        raise
+    return module
+
+
+def _import_from_backend(name, globals=None, locals=None, fromlist=(), level=0):
+    """``__import__`` for backend modules: bare backend names load via load_backend_module"""
+    if level == 0 and "." not in name and (BACKEND_DIR / f"{name}.py").is_file():
+        return load_backend_module(name)
+    return builtins.__import__(name, globals, locals, fromlist, level)
@@ -0,0 +1,7 @@
+"""
+Entry point for ``python -m log_classification_system.core``.
+"""
+
+from .main import main
+
+main()
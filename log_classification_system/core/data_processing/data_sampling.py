@@ -1,539 +1,550 @@
+import argparse
+import json
+
 import pandas as pd
 import numpy as np
 import os
 
-
-def create_production_demo_from_complete_results(df_complete, target_size=2000):
+try:
+    from .. import load_backend_module
+    from .results_io import iter_results, read_results, write_results
+except ImportError:
+    # Run as a script from this directory: take the backend loader from the
+    # core package's __init__.py by path
+    from importlib.util import module_from_spec, spec_from_file_location
+    from pathlib import Path
+
+    _core_spec = spec_from_file_location(
+        "log_classification_core", Path(__file__).resolve().parents[1] / "__init__.py"
+    )
+    _core = module_from_spec(_core_spec)
+    _core_spec.loader.exec_module(_core)
+    load_backend_module = _core.load_backend_module
+    from results_io import iter_results, read_results, write_results
+
+StatsAggregator = load_backend_module("stats").StatsAggregator
+
+
+# Quota spec for the production demo dataset. Stage shares are fractions of
+# the target size (a stage without a share gets the remainder); within a
+# stage (or a confidence band of it) "categories" pins exact counts, used to
+# cap dominant categories and boost rare ones, and the rest of the quota is
+# spread over the remaining categories in proportion to what is available.
+DEMO_SAMPLING_SPEC = {
+    "seed": 42,
+    # Lower bounds, highest first; anything below the last bound (or without
+    # a confidence) falls in the last band
+    "confidence_bands": {"high": 0.78, "medium": 0.7, "low": 0.0},
+    # Rows matching any of these are sampled as Unclassified whatever stage
+    # produced them
+    "unclassified": {
+        "pipeline_stages": ["None", "Unclassified"],
+        "final_categories": ["Unclassified"],
+        "zero_confidence": True,
+    },
+    "stages": {
+        "Regex": {
+            "share": 0.42,
+            "categories": {
+                "Instance_Management_Compute": 400,
+                "System_Operations_LibVirt": 300,
+                "Configuration_Errors": 30,
+                "File_System_Errors": 30,
+                "Resource_Management": 30,
+            },
+        },
+        "BERT": {
+            "share": 0.26,
+            "bands": {
+                "high": {
+                    "share": 0.7,
+                    "categories": {
+                        "Network_Operations": 120,
+                        "Scheduler_Operations": 130,
+                        "Instance_Management_Compute": 50,
+                        "Configuration_Errors": 20,
+                        "File_System_Errors": 20,
+                        "Network_Connection_Errors": 20,
+                        "Resource_Management": 20,
+                    },
+                },
+                "medium": {"share": 0.25},
+                "low": {"share": 0.05},
+            },
+        },
+        "LLM": {
+            "share": 0.21,
+            "categories": {
+                "Boot_Timeout_Errors": 25,
+                "Resource_Allocation_Errors": 25,
+                "Network_Connection_Errors": 20,
+                "File_System_Errors": 20,
+                "Configuration_Errors": 20,
+                "Network_Operations": 63,
+                "Resource_Management": 20,
+                "Instance_Management": 20,
+                "Instance_Management_Compute": 15,
+            },
+        },
+        "Unclassified": {},
+    },
+}
+
+
+def load_sampling_spec(path):
+    """Load a quota spec (same layout as DEMO_SAMPLING_SPEC) from a JSON file"""
+    with open(path) as f:
+        return json.load(f)
+
+
+def _split(total, shares):
+    """Split total by fractional shares; the last part takes the remainder"""
+    parts = [int(total * share) for share in shares[:-1]]
+    return parts + [total - sum(parts)]
+
+
+def _allocate(target, available):
     """
-    Create strategic 2k dataset showcasing the hybrid pipeline with proper stage and category distribution
-    Target distribution: Regex 40-45%, BERT 24-28%, LLM 20-22%, Unclassified ~8-12%
+    Spread target over strata in proportion to what each has available,
+    never giving a stratum more than it has (largest remainders get the
+    rounding slack)
+    """
+    available = np.asarray(available, dtype=np.int64)
+    quotas = np.zeros(len(available), dtype=np.int64)
+    target = min(int(target), int(available.sum()))
+    while target > 0:
+        spare = available - quotas
+        weights = spare / spare.sum()
+        exact = target * weights
+        share = np.minimum(np.floor(exact).astype(np.int64), spare)
+        if share.sum() == 0:
+            # Fewer units left than strata: hand them out one at a time
+            order = np.argsort(-(exact - share), kind="stable")
+            share[order[spare[order] > 0][:target]] = 1
+        quotas += share
+        target -= int(share.sum())
+    return quotas
+
+
+def _stratify(df, spec=DEMO_SAMPLING_SPEC):
     """
+    Group rows once by (sampling stage, final_category, confidence band).
 
-    demo_sample = []
+    Returns each row's stratum number and the strata table (stage /
+    category / band / available). The sampling stage is the row's
+    pipeline_stage, or Unclassified when it matches spec["unclassified"];
+    the band is the first of spec["confidence_bands"] whose lower bound the
+    confidence reaches, else the last one.
+    """
+    rules = spec["unclassified"]
+
+    # Missing stages/categories factorize to -1, i.e. the appended last label
+    stage_codes, stage_names = pd.factorize(df["pipeline_stage"])
+    stage_labels = np.append(np.asarray(stage_names, dtype=object), "Unclassified")
+    category_codes, category_names = pd.factorize(df["final_category"])
+    category_labels = np.append(np.asarray(category_names, dtype=object), None)
+
+    stage_unclassified = np.isin(stage_labels, rules.get("pipeline_stages", []))
+    stage_unclassified[-1] = True
+    category_unclassified = np.isin(category_labels, rules.get("final_categories", []))
+    unclassified = stage_unclassified[stage_codes] | category_unclassified[category_codes]
+    confidence = df["final_confidence"].to_numpy(dtype=np.float64, na_value=np.nan)
+    if rules.get("zero_confidence"):
+        unclassified |= confidence == 0.0
+    stage_codes = np.where(unclassified, list(stage_labels).index("Unclassified"), stage_codes)
+    category_codes = category_codes % len(category_labels)
+
+    band_labels = np.asarray(list(spec["confidence_bands"]), dtype=object)
+    band_codes = np.full(len(df), len(band_labels) - 1, dtype=np.int64)
+    bounds = list(spec["confidence_bands"].values())[:-1]
+    for code, bound in reversed(list(enumerate(bounds))):
+        band_codes[confidence >= bound] = code
+
+    combined = (stage_codes * len(category_labels) + category_codes) * len(band_labels) + band_codes
+    counts = np.bincount(
+        combined, minlength=len(stage_labels) * len(category_labels) * len(band_labels)
+    )
+    present = np.flatnonzero(counts)
+    stratum_of = np.full(len(counts), -1, dtype=np.int64)
+    stratum_of[present] = np.arange(len(present))
+
+    strata = pd.DataFrame(
+        {
+            "stage": stage_labels[present // (len(band_labels) * len(category_labels))],
+            "category": category_labels[(present // len(band_labels)) % len(category_labels)],
+            "band": band_labels[present % len(band_labels)],
+            "available": counts[present],
+        }
+    )
+    return stratum_of[combined], strata
 
-    # Calculate target sizes based on requirements
-    regex_target = int(target_size * 0.42)  # 42% = 840 logs
-    bert_target = int(target_size * 0.26)  # 26% = 520 logs
-    llm_target = int(target_size * 0.21)  # 21% = 420 logs
-    unclassified_target = (
-        target_size - regex_target - bert_target - llm_target
-    )  # Remaining = 220 logs
 
-    print(f"Target Distribution:")
-    print(f"  Regex: {regex_target} logs ({regex_target/target_size*100:.1f}%)")
-    print(f"  BERT: {bert_target} logs ({bert_target/target_size*100:.1f}%)")
-    print(f"  LLM: {llm_target} logs ({llm_target/target_size*100:.1f}%)")
-    print(
-        f"  Unclassified: {unclassified_target} logs ({unclassified_target/target_size*100:.1f}%)"
-    )
-    print("=" * 60)
+def sampling_stages(df, spec=DEMO_SAMPLING_SPEC):
+    """Stage each row is sampled under: its pipeline_stage, or Unclassified"""
+    inverse, strata = _stratify(df, spec)
+    return strata["stage"].to_numpy()[inverse]
 
-    # 1. REGEX SHOWCASE (840 logs - 42%)
-    # Demonstrate fast, rule-based classification with natural distribution
-    regex_classified = df_complete[df_complete["pipeline_stage"] == "Regex"]
-    if len(regex_classified) > 0:
-        regex_sample = []
-        regex_categories = regex_classified["final_category"].value_counts()
-
-        # Diversified distribution - reduce Instance_Management_Compute dominance
-        # Instance_Management_Compute should be significant but not overwhelming (limit to ~35% of total)
-        instance_mgmt = regex_classified[
-            regex_classified["final_category"] == "Instance_Management_Compute"
-        ]
-        if len(instance_mgmt) > 0:
-            # Limit to ~35% of total dataset (700 logs) with most coming from regex
-            regex_sample.append(
-                instance_mgmt.sample(n=min(400, len(instance_mgmt)), random_state=42)
-            )
 
-        # System_Operations_LibVirt (second most common - increase representation)
-        system_ops = regex_classified[
-            regex_classified["final_category"] == "System_Operations_LibVirt"
-        ]
-        if len(system_ops) > 0:
-            regex_sample.append(
-                system_ops.sample(n=min(300, len(system_ops)), random_state=42)
+def allocate_quotas(strata, target_size, spec=DEMO_SAMPLING_SPEC):
+    """
+    Quota per stratum for a strata table with stage / category / band /
+    available columns. Only the table is touched, so the cost depends on the
+    number of strata, not the number of rows.
+    """
+    stages = strata["stage"].to_numpy()
+    categories = strata["category"].to_numpy()
+    bands = strata["band"].to_numpy()
+    available = strata["available"].to_numpy(np.int64)
+    quotas = np.zeros(len(strata), dtype=np.int64)
+
+    stage_specs = spec["stages"]
+    stage_targets = {
+        name: int(target_size * stage_spec["share"])
+        for name, stage_spec in stage_specs.items()
+        if "share" in stage_spec
+    }
+    # Stages without a share split what is left
+    rest = [name for name in stage_specs if name not in stage_targets]
+    if rest:
+        leftover = target_size - sum(stage_targets.values())
+        stage_targets.update(zip(rest, _split(leftover, [1 / len(rest)] * len(rest))))
+
+    def fill_unit(mask, target, pinned):
+        unit_categories = pd.unique(categories[mask])
+        category_available = {
+            category: available[mask & (categories == category)].sum()
+            for category in unit_categories
+        }
+        category_quotas = {}
+        for category, count in pinned.items():
+            take = min(count, category_available.get(category, 0), target)
+            if take > 0:
+                category_quotas[category] = take
+                target -= take
+        free = [category for category in unit_categories if category not in pinned]
+        for category, quota in zip(free, _allocate(target, [category_available[c] for c in free])):
+            category_quotas[category] = quota
+        for category, quota in category_quotas.items():
+            cells = np.flatnonzero(mask & (categories == category))
+            quotas[cells] += _allocate(quota, available[cells])
+
+    for name, stage_spec in stage_specs.items():
+        in_stage = stages == name
+        if "bands" in stage_spec:
+            band_specs = stage_spec["bands"]
+            band_targets = _split(
+                stage_targets[name], [band_spec["share"] for band_spec in band_specs.values()]
             )
+            for (band, band_spec), band_target in zip(band_specs.items(), band_targets):
+                fill_unit(in_stage & (bands == band), band_target, band_spec.get("categories", {}))
+        else:
+            fill_unit(in_stage, stage_targets[name], stage_spec.get("categories", {}))
+
+    # Stages short of their target top up from their own spare rows first,
+    # then whatever is still missing comes from any stage
+    for name in stage_specs:
+        cells = np.flatnonzero(stages == name)
+        missing = stage_targets[name] - quotas[cells].sum()
+        if missing > 0:
+            quotas[cells] += _allocate(missing, available[cells] - quotas[cells])
+    missing = target_size - quotas.sum()
+    if missing > 0:
+        quotas += _allocate(missing, available - quotas)
+
+    return quotas
+
+
+def _smallest_keys(keys, inverse, quotas):
+    """Rows holding the quotas[s] smallest keys of each stratum s"""
+    available = np.maximum(np.bincount(inverse, minlength=len(quotas)), 1)
+    # Only keys under a generous per-stratum cut-off can be among the
+    # smallest, so only those are sorted; strata the cut-off leaves short
+    # are retried in full
+    fraction = quotas / available
+    cutoff = np.where(
+        quotas > 0,
+        fraction + 6 * np.sqrt(fraction * (1 - fraction) / available) + 20 / available,
+        0.0,
+    )
+    candidates = np.flatnonzero(keys < cutoff[inverse])
+    short = np.bincount(inverse[candidates], minlength=len(quotas)) < quotas
+    if short.any():
+        cutoff[short] = np.inf
+        candidates = np.flatnonzero(keys < cutoff[inverse])
+
+    order = candidates[np.lexsort((keys[candidates], inverse[candidates]))]
+    ordered_strata = inverse[order]
+    starts = np.cumsum(np.bincount(ordered_strata, minlength=len(quotas))) - np.bincount(
+        ordered_strata, minlength=len(quotas)
+    )
+    rank = np.arange(len(order)) - starts[ordered_strata]
+    return order[rank < quotas[ordered_strata]]
 
-        # Boost specific underrepresented categories in regex
-        boost_categories_regex = [
-            "Configuration_Errors",
-            "File_System_Errors",
-            "Resource_Management",
-        ]
-        for boost_cat in boost_categories_regex:
-            boost_logs = regex_classified[
-                regex_classified["final_category"] == boost_cat
-            ]
-            if len(boost_logs) > 0:
-                current_total = sum(len(s) for s in regex_sample)
-                if current_total < regex_target:
-                    boost_size = min(30, len(boost_logs), regex_target - current_total)
-                    regex_sample.append(
-                        boost_logs.sample(n=boost_size, random_state=42)
-                    )
-
-        # Fill remaining with other categories proportionally
-        remaining_categories = regex_classified[
-            ~regex_classified["final_category"].isin(
-                [
-                    "Instance_Management_Compute",
-                    "System_Operations_LibVirt",
-                    "Configuration_Errors",
-                    "File_System_Errors",
-                    "Resource_Management",
-                ]
-            )
-        ]
-        if len(remaining_categories) > 0:
-            remaining_needed = regex_target - sum(len(s) for s in regex_sample)
-            if remaining_needed > 0:
-                regex_sample.append(
-                    remaining_categories.sample(
-                        n=min(remaining_needed, len(remaining_categories)),
-                        random_state=42,
-                    )
-                )
-
-        regex_final = pd.concat(regex_sample).head(regex_target)
-        demo_sample.append(regex_final)
-        print(
-            f"Regex showcase: {len(regex_final)} logs from {len(regex_final['final_category'].unique())} categories"
-        )
 
-    # 2. BERT SHOWCASE (520 logs - 26%)
-    # Demonstrate ML classification with confidence stratification
-    bert_classified = df_complete[df_complete["pipeline_stage"] == "BERT"]
-    if len(bert_classified) > 0:
-        bert_sample = []
-
-        # High confidence classifications (70% of BERT samples)
-        high_conf = bert_classified[bert_classified["final_confidence"] >= 0.78]
-        if len(high_conf) > 0:
-            high_conf_categories = high_conf["final_category"].value_counts()
-            target_high = int(bert_target * 0.7)  # 364 logs
-
-            # Network_Operations (most common in BERT - reduce dominance)
-            network_ops = high_conf[high_conf["final_category"] == "Network_Operations"]
-            if len(network_ops) > 0:
-                bert_sample.append(
-                    network_ops.sample(n=min(120, len(network_ops)), random_state=42)
-                )
-
-            # Scheduler_Operations (increase representation)
-            scheduler_ops = high_conf[
-                high_conf["final_category"] == "Scheduler_Operations"
-            ]
-            if len(scheduler_ops) > 0:
-                bert_sample.append(
-                    scheduler_ops.sample(
-                        n=min(130, len(scheduler_ops)), random_state=42
-                    )
-                )
-
-            # Other high confidence categories (including some Instance_Management for diversity)
-            other_high_conf = high_conf[
-                ~high_conf["final_category"].isin(
-                    ["Network_Operations", "Scheduler_Operations"]
-                )
-            ]
-            if len(other_high_conf) > 0:
-                remaining_high = target_high - sum(len(s) for s in bert_sample)
-                if remaining_high > 0:
-                    # Add some Instance_Management_Compute if available in BERT
-                    instance_mgmt_bert = other_high_conf[
-                        other_high_conf["final_category"]
-                        == "Instance_Management_Compute"
-                    ]
-                    if len(instance_mgmt_bert) > 0 and remaining_high >= 50:
-                        bert_sample.append(
-                            instance_mgmt_bert.sample(
-                                n=min(50, len(instance_mgmt_bert)), random_state=42
-                            )
-                        )
-                        remaining_high -= 50
-
-                    # Boost underrepresented categories in BERT
-                    boost_categories_bert = [
-                        "Configuration_Errors",
-                        "File_System_Errors",
-                        "Network_Connection_Errors",
-                        "Resource_Management",
-                    ]
-                    for boost_cat in boost_categories_bert:
-                        boost_logs = other_high_conf[
-                            other_high_conf["final_category"] == boost_cat
-                        ]
-                        if len(boost_logs) > 0 and remaining_high >= 20:
-                            boost_size = min(20, len(boost_logs), remaining_high)
-                            bert_sample.append(
-                                boost_logs.sample(n=boost_size, random_state=42)
-                            )
-                            remaining_high -= boost_size
-
-                    # Fill rest with other categories
-                    other_cats = other_high_conf[
-                        ~other_high_conf["final_category"].isin(
-                            [
-                                "Instance_Management_Compute",
-                                "Configuration_Errors",
-                                "File_System_Errors",
-                                "Network_Connection_Errors",
-                                "Resource_Management",
-                            ]
-                        )
-                    ]
-                    if len(other_cats) > 0 and remaining_high > 0:
-                        bert_sample.append(
-                            other_cats.sample(
-                                n=min(remaining_high, len(other_cats)), random_state=42
-                            )
-                        )
-
-        # Medium confidence (25% of BERT samples)
-        med_conf = bert_classified[
-            (bert_classified["final_confidence"] >= 0.7)
-            & (bert_classified["final_confidence"] < 0.78)
-        ]
-        if len(med_conf) > 0:
-            target_med = int(bert_target * 0.25)  # 130 logs
-            bert_sample.append(
-                med_conf.sample(n=min(target_med, len(med_conf)), random_state=42)
-            )
+def sample_by_quota(df, target_size=2000, spec=DEMO_SAMPLING_SPEC, seed=None):
+    """
+    Draw a stratified sample of df following the quota spec.
 
-        # Lower confidence (5% of BERT samples) - shows system boundaries
-        low_conf = bert_classified[bert_classified["final_confidence"] < 0.7]
-        if len(low_conf) > 0:
-            target_low = bert_target - sum(len(s) for s in bert_sample)
-            if target_low > 0:
-                bert_sample.append(
-                    low_conf.sample(n=min(target_low, len(low_conf)), random_state=42)
-                )
-
-        bert_final = pd.concat(bert_sample).head(bert_target)
-        demo_sample.append(bert_final)
-        print(
-            f"BERT showcase: {len(bert_final)} logs with {len(bert_final['final_category'].unique())} categories"
-        )
+    Rows are grouped once into strata, quotas are allocated on the strata
+    table, and every stratum's quota is filled in one vectorised pass with
+    the rows holding its smallest seeded random keys. Rows come back grouped
+    by stage in spec order, in their original order within a stage.
+    """
+    seed = spec.get("seed", 42) if seed is None else seed
+    inverse, strata = _stratify(df, spec)
+    quotas = allocate_quotas(strata, target_size, spec)
 
-    # 3. LLM SHOWCASE (420 logs - 21%) - YOUR KEY INNOVATION
-    # Emphasize error subcategorization and complex log understanding
-    llm_classified = df_complete[df_complete["pipeline_stage"] == "LLM"]
-    if len(llm_classified) > 0:
-        llm_sample = []
+    # Same seed -> same keys -> same sample
+    keys = np.random.default_rng(seed).random(len(df))
+    selected = _smallest_keys(keys, inverse, quotas)
+
+    stage_rank = {name: position for position, name in enumerate(spec["stages"])}
+    strata_rank = np.array([stage_rank.get(name, len(stage_rank)) for name in strata["stage"]])
+    selected = selected[np.lexsort((selected, strata_rank[inverse[selected]]))]
+    return _drop_unused_categories(df.iloc[selected].reset_index(drop=True))
+
+
+def _drop_unused_categories(df):
+    """Keep value_counts() on categorical label columns to what was sampled"""
+    for column in df.columns:
+        if isinstance(df[column].dtype, pd.CategoricalDtype):
+            df[column] = df[column].cat.remove_unused_categories()
+    return df
 
-        # ERROR SUBCATEGORIZATION SHOWCASE (50% of LLM samples) - Your Innovation
-        error_subcats = llm_classified[
-            llm_classified["final_category"].str.contains("Error|Timeout", na=False)
-        ]
-        if len(error_subcats) > 0:
-            target_errors = int(
-                llm_target * 0.5
-            )  # Reduced to 210 logs to make room for other categories
-            error_categories = error_subcats["final_category"].value_counts()
-
-            # Prioritize underrepresented error categories
-            priority_errors = [
-                "Boot_Timeout_Errors",
-                "Resource_Allocation_Errors",
-                "Network_Connection_Errors",
-                "File_System_Errors",
-                "Configuration_Errors",
-            ]
-
-            # First, ensure minimum representation for priority error categories
-            for category in priority_errors:
-                category_logs = error_subcats[
-                    error_subcats["final_category"] == category
-                ]
-                if len(category_logs) > 0:
-                    # Boost these categories significantly
-                    min_samples = (
-                        25
-                        if category
-                        in ["Boot_Timeout_Errors", "Resource_Allocation_Errors"]
-                        else 20
-                    )
-                    sample_size = min(min_samples, len(category_logs))
-                    llm_sample.append(
-                        category_logs.sample(n=sample_size, random_state=42)
-                    )
-
-            # Then distribute remaining slots across all error categories
-            remaining_error_slots = target_errors - sum(len(s) for s in llm_sample)
-            other_errors = error_subcats[
-                ~error_subcats["final_category"].isin(priority_errors)
-            ]
-
-            if len(other_errors) > 0 and remaining_error_slots > 0:
-                for category in other_errors["final_category"].unique():
-                    category_logs = other_errors[
-                        other_errors["final_category"] == category
-                    ]
-                    proportion = len(category_logs) / len(other_errors)
-                    category_target = max(10, int(remaining_error_slots * proportion))
-                    sample_size = min(category_target, len(category_logs))
-                    if (
-                        sample_size > 0
-                        and sum(len(s) for s in llm_sample) < target_errors
-                    ):
-                        llm_sample.append(
-                            category_logs.sample(n=sample_size, random_state=42)
-                        )
-
-        # NETWORK OPERATIONS (15% of LLM samples)
-        network_ops_llm = llm_classified[
-            llm_classified["final_category"] == "Network_Operations"
-        ]
-        if len(network_ops_llm) > 0:
-            target_network = int(llm_target * 0.15)  # 63 logs
-            llm_sample.append(
-                network_ops_llm.sample(
-                    n=min(target_network, len(network_ops_llm)), random_state=42
-                )
-            )
 
-        # RESOURCE/SYSTEM OPERATIONS (35% of LLM samples) + Instance_Management diversity
-        other_llm_cats = llm_classified[
-            llm_classified["final_category"].isin(
-                [
-                    "Resource_Management",
-                    "System_Operations",
-                    "Instance_Management",
-                    "Service_Communication_Errors",
-                    "Configuration_Errors",
-                    "Instance_Management_Compute",
-                ]
+def stream_sample_by_quota(
+    input_file, target_size=2000, spec=DEMO_SAMPLING_SPEC, seed=None, chunk_size=200000
+):
+    """
+    sample_by_quota over a results CSV read in chunks, without loading it.
+
+    Each stratum keeps a reservoir of the target_size rows with the smallest
+    random keys seen so far (no stratum can be given more than that), plus
+    a running row count. Once the file is read, quotas are allocated from
+    the counts and filled from the reservoirs. Keys are drawn from the same
+    seeded stream as sample_by_quota, so the result is the same sample in
+    the same order; peak memory is a few reservoirs of target_size rows per
+    stratum plus one chunk, whatever the input size.
+    """
+    seed = spec.get("seed", 42) if seed is None else seed
+    rng = np.random.default_rng(seed)
+    counts = {}
+    kept = None
+    rows_read = 0
+
+    for chunk in iter_results(input_file, chunk_size):
+        chunk = chunk.reset_index(drop=True)
+        chunk["_key"] = rng.random(len(chunk))
+        chunk["_position"] = np.arange(rows_read, rows_read + len(chunk))
+        rows_read += len(chunk)
+
+        inverse, strata = _stratify(chunk, spec)
+        for stage, category, band, available in strata.itertuples(index=False):
+            label = (stage, category, band)
+            counts[label] = counts.get(label, 0) + available
+        reservoir = np.minimum(strata["available"].to_numpy(), target_size)
+        chunk = chunk.iloc[_smallest_keys(chunk["_key"].to_numpy(), inverse, reservoir)]
+
+        kept = chunk if kept is None else pd.concat([kept, chunk], ignore_index=True)
+        inverse, strata = _stratify(kept, spec)
+        reservoir = np.minimum(strata["available"].to_numpy(), target_size)
+        kept = kept.iloc[_smallest_keys(kept["_key"].to_numpy(), inverse, reservoir)]
+        kept = kept.reset_index(drop=True)
+
+    print(f"Streamed complete dataset: {rows_read:,} logs")
+    if kept is None:
+        return pd.DataFrame()
+
+    strata = pd.DataFrame(
+        [(*label, available) for label, available in counts.items()],
+        columns=["stage", "category", "band", "available"],
+    )
+    quotas = dict(zip(counts, allocate_quotas(strata, target_size, spec)))
+
+    inverse, kept_strata = _stratify(kept, spec)
+    kept_quotas = np.array(
+        [
+            quotas[label]
+            for label in kept_strata[["stage", "category", "band"]].itertuples(
+                index=False, name=None
             )
         ]
-        if len(other_llm_cats) > 0:
-            target_other = llm_target - sum(len(s) for s in llm_sample)
-            if target_other > 0:
-                # Boost specific underrepresented categories
-                boost_categories = [
-                    "Resource_Management",
-                    "Instance_Management",
-                    "Configuration_Errors",
-                ]
-                for boost_cat in boost_categories:
-                    boost_logs = other_llm_cats[
-                        other_llm_cats["final_category"] == boost_cat
-                    ]
-                    if len(boost_logs) > 0 and target_other >= 20:
-                        boost_size = min(20, len(boost_logs), target_other)
-                        llm_sample.append(
-                            boost_logs.sample(n=boost_size, random_state=42)
-                        )
-                        target_other -= boost_size
-
-                # Add some Instance_Management_Compute for category balance
-                instance_mgmt_llm = other_llm_cats[
-                    other_llm_cats["final_category"] == "Instance_Management_Compute"
-                ]
-                if len(instance_mgmt_llm) > 0 and target_other >= 15:
-                    llm_sample.append(
-                        instance_mgmt_llm.sample(
-                            n=min(15, len(instance_mgmt_llm)), random_state=42
-                        )
-                    )
-                    target_other -= 15
-
-                # Distribute across remaining categories
-                remaining_cats = other_llm_cats[
-                    ~other_llm_cats["final_category"].isin(
-                        [
-                            "Instance_Management_Compute",
-                            "Resource_Management",
-                            "Instance_Management",
-                            "Configuration_Errors",
-                        ]
-                    )
-                ]
-                if len(remaining_cats) > 0 and target_other > 0:
-                    other_categories = remaining_cats["final_category"].value_counts()
-                    for category in other_categories.index:
-                        category_logs = remaining_cats[
-                            remaining_cats["final_category"] == category
-                        ]
-                        category_proportion = len(category_logs) / len(remaining_cats)
-                        category_target = int(target_other * category_proportion)
-                        sample_size = min(category_target, len(category_logs))
-                        if sample_size > 0:
-                            llm_sample.append(
-                                category_logs.sample(n=sample_size, random_state=42)
-                            )
-
-        llm_final = pd.concat(llm_sample).head(llm_target)
-        demo_sample.append(llm_final)
-        print(
-            f"LLM showcase: {len(llm_final)} logs with {len(llm_final['final_category'].unique())} categories"
-        )
+    )
+    selected = _smallest_keys(kept["_key"].to_numpy(), inverse, kept_quotas)
+
+    stage_rank = {name: position for position, name in enumerate(spec["stages"])}
+    strata_rank = np.array([stage_rank.get(name, len(stage_rank)) for name in kept_strata["stage"]])
+    positions = kept["_position"].to_numpy()[selected]
+    selected = selected[np.lexsort((positions, strata_rank[inverse[selected]]))]
+    return _drop_unused_categories(
+        kept.iloc[selected].drop(columns=["_key", "_position"]).reset_index(drop=True)
+    )
 
-    # 4. UNCLASSIFIED SHOWCASE (220 logs - 11%)
-    # Show system limitations and edge cases
-    unclassified = df_complete[
-        (df_complete["pipeline_stage"].isin(["None", "Unclassified"]))
-        | (df_complete["final_category"] == "Unclassified")
-        | (df_complete["final_confidence"] == 0.0)
-    ]
-    if len(unclassified) > 0:
-        # Sample diverse unclassified logs to show different failure modes
-        unclassified_sample = unclassified.sample(
-            n=min(unclassified_target, len(unclassified)), random_state=42
-        )
-        demo_sample.append(unclassified_sample)
-        print(f"Unclassified showcase: {len(unclassified_sample)} logs")
-
-    # Combine all samples
-    final_demo_dataset = pd.concat(demo_sample, ignore_index=True)
-
-    # Ensure exactly target_size logs with proper stage distribution
-    if len(final_demo_dataset) > target_size:
-        final_demo_dataset = final_demo_dataset.sample(n=target_size, random_state=42)
-    elif len(final_demo_dataset) < target_size:
-        # Fill remaining with high-quality samples maintaining stage ratios
-        remaining_needed = target_size - len(final_demo_dataset)
-        available_logs = df_complete[~df_complete.index.isin(final_demo_dataset.index)]
-
-        # Check which stages need more logs to meet targets
-        current_stage_counts = final_demo_dataset["pipeline_stage"].value_counts()
-        regex_current = current_stage_counts.get("Regex", 0)
-        bert_current = current_stage_counts.get("BERT", 0)
-        llm_current = current_stage_counts.get("LLM", 0)
-
-        # Fill in order of priority to meet stage targets
-        if regex_current < regex_target:
-            regex_needed = min(regex_target - regex_current, remaining_needed)
-            regex_available = available_logs[
-                available_logs["pipeline_stage"] == "Regex"
-            ]
-            if len(regex_available) > 0:
-                additional_regex = regex_available.sample(
-                    n=min(regex_needed, len(regex_available)), random_state=42
-                )
-                final_demo_dataset = pd.concat([final_demo_dataset, additional_regex])
-                remaining_needed -= len(additional_regex)
-
-        if bert_current < bert_target and remaining_needed > 0:
-            bert_needed = min(bert_target - bert_current, remaining_needed)
-            bert_available = available_logs[available_logs["pipeline_stage"] == "BERT"]
-            if len(bert_available) > 0:
-                additional_bert = bert_available.sample(
-                    n=min(bert_needed, len(bert_available)), random_state=42
-                )
-                final_demo_dataset = pd.concat([final_demo_dataset, additional_bert])
-                remaining_needed -= len(additional_bert)
-
-        if llm_current < llm_target and remaining_needed > 0:
-            llm_needed = min(llm_target - llm_current, remaining_needed)
-            llm_available = available_logs[available_logs["pipeline_stage"] == "LLM"]
-            if len(llm_available) > 0:
-                additional_llm = llm_available.sample(
-                    n=min(llm_needed, len(llm_available)), random_state=42
-                )
-                final_demo_dataset = pd.concat([final_demo_dataset, additional_llm])
-                remaining_needed -= len(additional_llm)
-
-        # Fill any remaining with high-quality samples from any stage
-        if remaining_needed > 0:
-            remaining_available = available_logs[
-                ~available_logs.index.isin(final_demo_dataset.index)
-            ]
-            if len(remaining_available) > 0:
-                additional_sample = remaining_available.sample(
-                    n=min(remaining_needed, len(remaining_available)), random_state=42
-                )
-                final_demo_dataset = pd.concat([final_demo_dataset, additional_sample])
-
-    # Final trim to exact target size
-    final_demo_dataset = final_demo_dataset.head(target_size)
 
+def create_production_demo_from_complete_results(df_complete, target_size=2000, spec=None):
+    """
+    Create strategic 2k dataset showcasing the hybrid pipeline with proper stage and category distribution
+    Target distribution comes from the quota spec (DEMO_SAMPLING_SPEC by default):
+    Regex 42%, BERT 26% (by confidence band), LLM 21%, Unclassified remainder
+    """
+    spec = DEMO_SAMPLING_SPEC if spec is None else spec
+    _print_targets(target_size, spec)
+    final_demo_dataset = sample_by_quota(df_complete, target_size, spec)
+    _print_showcase(final_demo_dataset, spec)
+    return final_demo_dataset
+
+
+def create_production_demo_from_results_file(
+    input_file, target_size=2000, spec=None, chunk_size=200000
+):
+    """Streaming create_production_demo_from_complete_results for results too large to load"""
+    spec = DEMO_SAMPLING_SPEC if spec is None else spec
+    _print_targets(target_size, spec)
+    final_demo_dataset = stream_sample_by_quota(input_file, target_size, spec, chunk_size=chunk_size)
+    _print_showcase(final_demo_dataset, spec)
     return final_demo_dataset
 
 
+def _print_targets(target_size, spec):
+    print(f"Target Distribution:")
+    for stage, stage_spec in spec["stages"].items():
+        if "share" in stage_spec:
+            stage_target = int(target_size * stage_spec["share"])
+            print(f"  {stage}: {stage_target} logs ({stage_target/target_size*100:.1f}%)")
+        else:
+            print(f"  {stage}: remainder")
+    print("=" * 60)
+
+
+def _print_showcase(final_demo_dataset, spec):
+    if len(final_demo_dataset) == 0:
+        return
+    sampled_stages = sampling_stages(final_demo_dataset, spec)
+    for stage in spec["stages"]:
+        stage_rows = final_demo_dataset[sampled_stages == stage]
+        print(
+            f"{stage} showcase: {len(stage_rows)} logs from {stage_rows['final_category'].nunique()} categories"
+        )
+
+
 def analyze_demo_dataset(demo_dataset):
-    """Comprehensive analysis of the demo dataset"""
+    """
+    Structured analysis of a demo (or complete results) dataset: the same
+    report GET /api/stats serves for live traffic
+    """
+    stats = StatsAggregator()
+    stats.record_frame(demo_dataset)
+    return stats.report(top_n=15, stage_top_n=8)
+
+
+def print_analysis(report):
+    """Print an analyze_demo_dataset report"""
 
     print(f"\nPRODUCTION DEMO DATASET ANALYSIS")
     print("=" * 80)
-    print(f"Total logs: {len(demo_dataset):,}")
+    print(f"Total logs: {report['total']:,}")
 
-    stage_dist = demo_dataset["pipeline_stage"].value_counts()
     print(f"\nPipeline Stage Distribution:")
-    for stage, count in stage_dist.items():
-        percentage = count / len(demo_dataset) * 100
-        print(f"  {stage:12}: {count:4,} logs ({percentage:5.1f}%)")
+    for stage, stage_stats in report["stages"].items():
+        print(f"  {stage:12}: {stage_stats['count']:4,} logs ({stage_stats['percentage']:5.1f}%)")
 
-    unique_categories = demo_dataset["final_category"].nunique()
-    print(f"\nCategory Diversity: {unique_categories} unique categories")
+    print(f"\nCategory Diversity: {report['category_diversity']} unique categories")
 
-    cat_dist = demo_dataset["final_category"].value_counts().head(15)
     print(f"\nTop 15 Categories:")
-    for category, count in cat_dist.items():
-        percentage = count / len(demo_dataset) * 100
-        print(f"  {category:30}: {count:3} logs ({percentage:4.1f}%)")
-
-    error_cats = demo_dataset[
-        demo_dataset["final_category"].str.contains("Error|Timeout", na=False)
-    ]
-    if len(error_cats) > 0:
+    for entry in report["top_categories"]:
+        print(f"  {entry['category']:30}: {entry['count']:3} logs ({entry['percentage']:4.1f}%)")
+
+    errors = report["errors"]
+    if errors["total"] > 0:
         print(f"\nERROR SUBCATEGORIZATION INNOVATION:")
-        print(
-            f"   Total error logs: {len(error_cats)} ({len(error_cats)/len(demo_dataset)*100:.1f}%)"
-        )
-        error_dist = error_cats["final_category"].value_counts()
-        for category, count in error_dist.items():
+        print(f"   Total error logs: {errors['total']} ({errors['percentage']:.1f}%)")
+        for category, count in errors["categories"].items():
             print(f"     {category:30}: {count:2} logs")
 
     print(f"\nStage-wise Category Breakdown:")
     for stage in ["Regex", "BERT", "LLM"]:
-        stage_data = demo_dataset[demo_dataset["pipeline_stage"] == stage]
-        if len(stage_data) > 0:
-            print(f"\n  {stage} Categories ({len(stage_data)} logs):")
-            stage_cats = stage_data["final_category"].value_counts().head(8)
-            for category, count in stage_cats.items():
+        if stage in report["stages"]:
+            print(f"\n  {stage} Categories ({report['stages'][stage]['count']} logs):")
+            for category, count in report["stage_categories"][stage].items():
                 print(f"    {category:28}: {count:3} logs")
 
-    conf_logs = demo_dataset[demo_dataset["final_confidence"] > 0]
-    if len(conf_logs) > 0:
+    confidence = report["confidence"]
+    if sum(confidence["bands"].values()) > 0:
         print(f"\nConfidence Distribution:")
-        print(f"  Average confidence: {conf_logs['final_confidence'].mean():.3f}")
-        print(
-            f"  High confidence (≥0.8): {len(conf_logs[conf_logs['final_confidence'] >= 0.8]):3} logs"
-        )
-        print(
-            f"  Medium confidence (0.7-0.8): {len(conf_logs[(conf_logs['final_confidence'] >= 0.7) & (conf_logs['final_confidence'] < 0.8)]):3} logs"
-        )
-        print(
-            f"  Low confidence (<0.7): {len(conf_logs[conf_logs['final_confidence'] < 0.7]):3} logs"
-        )
+        print(f"  Average confidence: {confidence['average']:.3f}")
+        print(f"  High confidence (≥0.8): {confidence['bands']['high']:3} logs")
+        print(f"  Medium confidence (0.7-0.8): {confidence['bands']['medium']:3} logs")
+        print(f"  Low confidence (<0.7): {confidence['bands']['low']:3} logs")
 
-    if "label" in demo_dataset.columns:
+    if report["labels"]:
         print(f"\nOriginal Label Distribution:")
-        label_dist = demo_dataset["label"].value_counts()
-        for label, count in label_dist.items():
-            percentage = count / len(demo_dataset) * 100
-            print(f"  {label:15}: {count:4} logs ({percentage:5.1f}%)")
+        for label, label_stats in report["labels"].items():
+            print(f"  {label:15}: {label_stats['count']:4} logs ({label_stats['percentage']:5.1f}%)")
 
 
-def main():
-    os.makedirs("prod", exist_ok=True)
-
-    input_file = "../results/hybrid_pipeline_complete_results.csv"
-    df_complete = pd.read_csv(input_file)
+# Columns analyze_demo_dataset reads
+ANALYSIS_COLUMNS = ["pipeline_stage", "final_category", "final_confidence", "label"]
 
-    print(f"Loaded complete dataset: {len(df_complete):,} logs")
-    print(f"Creating strategic 2,000 log demonstration dataset...")
-    print()
 
-    demo_dataset = create_production_demo_from_complete_results(
-        df_complete, target_size=2000
+def main():
+    parser = argparse.ArgumentParser(description="Sample the production demo dataset")
+    parser.add_argument(
+        "--input",
+        default="../results/hybrid_pipeline_complete_results.parquet",
+        help="complete results, .parquet or .csv",
+    )
+    parser.add_argument(
+        "--output",
+        default="prod/dataset_sampling.csv",
+        help="demo dataset, .csv (export) or .parquet",
+    )
+    parser.add_argument("--target-size", type=int, default=2000)
+    parser.add_argument("--spec", help="JSON quota spec (defaults to DEMO_SAMPLING_SPEC)")
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="read the input in chunks instead of loading it (for results that do not fit in memory)",
     )
+    parser.add_argument("--chunk-size", type=int, default=200000)
+    parser.add_argument(
+        "--analyze-only",
+        action="store_true",
+        help="only print the analysis of --input (reads just the columns it needs)",
+    )
+    args = parser.parse_args()
+
+    if args.analyze_only:
+        print_analysis(analyze_demo_dataset(read_results(args.input, columns=ANALYSIS_COLUMNS)))
+        return
+
+    spec = load_sampling_spec(args.spec) if args.spec else DEMO_SAMPLING_SPEC
+    output_dir = os.path.dirname(args.output)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    input_file = args.input
+    if args.stream:
+        print(f"Streaming {input_file} in chunks of {args.chunk_size:,} logs")
+        print(f"Creating strategic {args.target_size:,} log demonstration dataset...")
+        print()
+        demo_dataset = create_production_demo_from_results_file(
+            input_file, target_size=args.target_size, spec=spec, chunk_size=args.chunk_size
+        )
+    else:
+        df_complete = read_results(input_file)
+
+        print(f"Loaded complete dataset: {len(df_complete):,} logs")
+        print(f"Creating strategic {args.target_size:,} log demonstration dataset...")
+        print()
+
+        demo_dataset = create_production_demo_from_complete_results(
+            df_complete, target_size=args.target_size, spec=spec
+        )
 
-    output_file = "prod/dataset_sampling.csv"
-    demo_dataset.to_csv(output_file, index=False)
+    output_file = args.output
+    write_results(demo_dataset, output_file)
 
-    analyze_demo_dataset(demo_dataset)
+    print_analysis(analyze_demo_dataset(demo_dataset))
 
     print(f"\n" + "=" * 80)
     print(f"Production dataset saved: {output_file}")
@@ -0,0 +1,241 @@
+"""
+Results file I/O.
+
+Reads and writes classified-log results (the dataset_sampling.csv columns)
+as Parquet or CSV, chosen by file extension:
+
+- Parquet (``.parquet``) is the working format. Label columns are stored
+  dictionary-encoded and come back as pandas categoricals, confidences are
+  float32, reads are memory-mapped and can be projected to the columns an
+  analysis needs. Requires pyarrow.
+- CSV (``.csv``, ``.csv.gz``) stays available for export and for older
+  result files; it is parsed with the same dtypes, and confidences are
+  written back as float64 so they keep their short decimal form.
+
+Convert an existing results CSV with:
+
+    python -m log_classification_system.core.data_processing.results_io results.csv results.parquet
+"""
+
+import argparse
+import csv
+import gzip
+import os
+from typing import Iterator, List, Optional
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+RESULT_COLUMNS = [
+    "log_id",
+    "raw_log_text",
+    "source_file",
+    "label",
+    "cluster_id",
+    "regex_label",
+    "regex_rule",
+    "bert_label",
+    "bert_confidence",
+    "bert_rule",
+    "llm_category",
+    "llm_confidence",
+    "final_category",
+    "pipeline_stage",
+    "final_confidence",
+]
+
+# Low-cardinality text columns, stored as categoricals
+LABEL_COLUMNS = [
+    "source_file",
+    "label",
+    "regex_label",
+    "regex_rule",
+    "bert_label",
+    "bert_rule",
+    "llm_category",
+    "final_category",
+    "pipeline_stage",
+]
+CONFIDENCE_COLUMNS = ["bert_confidence", "llm_confidence", "final_confidence"]
+INTEGER_COLUMNS = ["log_id", "cluster_id"]
+
+
+def is_parquet(path: str) -> bool:
+    return str(path).endswith((".parquet", ".pq"))
+
+
+def _require_pyarrow(path: str) -> None:
+    if pa is None:
+        raise ImportError(f"pyarrow is required to read or write Parquet ({path})")
+
+
+def optimise_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """Categorical label columns and float32 confidences, in place"""
+    for column in LABEL_COLUMNS:
+        if column in df.columns and not isinstance(df[column].dtype, pd.CategoricalDtype):
+            df[column] = df[column].astype("category")
+    for column in CONFIDENCE_COLUMNS:
+        if column in df.columns:
+            df[column] = pd.to_numeric(df[column], errors="coerce").astype("float32")
+    return df
+
+
+def csv_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    float32 confidences back as float64, for CSV
+
+    Each value keeps the float32's shortest decimal, so CSV has 0.85 rather
+    than 0.8500000238418579. Returns a new DataFrame when anything changes.
+    """
+    columns = [
+        column
+        for column in CONFIDENCE_COLUMNS
+        if column in df.columns and df[column].dtype == "float32"
+    ]
+    if not columns:
+        return df
+    return df.assign(**{column: df[column].astype(str).astype("float64") for column in columns})
+
+
+def read_results(path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """Load a results file, only ``columns`` if given"""
+    if is_parquet(path):
+        _require_pyarrow(path)
+        table = pq.read_table(path, columns=columns, memory_map=True)
+        return optimise_dtypes(table.to_pandas())
+    return optimise_dtypes(pd.read_csv(path, usecols=columns))
+
+
+def iter_results(
+    path: str, chunk_size: int = 200000, columns: Optional[List[str]] = None
+) -> Iterator[pd.DataFrame]:
+    """Yield a results file in chunks of at most ``chunk_size`` rows"""
+    if is_parquet(path):
+        _require_pyarrow(path)
+        parquet_file = pq.ParquetFile(path, memory_map=True)
+        for batch in parquet_file.iter_batches(batch_size=chunk_size, columns=columns):
+            yield optimise_dtypes(batch.to_pandas())
+    else:
+        for chunk in pd.read_csv(path, usecols=columns, chunksize=chunk_size):
+            yield optimise_dtypes(chunk)
+
+
+def write_results(df: pd.DataFrame, path: str) -> None:
+    """Save results as Parquet or CSV (gzip-compressed if it ends in .gz)"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    if is_parquet(path):
+        _require_pyarrow(path)
+        optimise_dtypes(df.copy()).to_parquet(path, index=False, compression="zstd")
+    else:
+        csv_dtypes(df).to_csv(path, index=False)
+
+
+def _arrow_schema(columns: List[str]) -> "pa.Schema":
+    fields = []
+    for column in columns:
+        if column in LABEL_COLUMNS:
+            fields.append(pa.field(column, pa.dictionary(pa.int32(), pa.string())))
+        elif column in CONFIDENCE_COLUMNS:
+            fields.append(pa.field(column, pa.float32()))
+        elif column in INTEGER_COLUMNS:
+            fields.append(pa.field(column, pa.int64()))
+        else:
+            fields.append(pa.field(column, pa.string()))
+    return pa.schema(fields)
+
+
+class ResultsWriter:
+    """
+    Incremental results writer for the bulk pipeline: each ``write_rows``
+    call appends a chunk of rows (lists in ``columns`` order, "" for
+    missing values) as a Parquet row group or as CSV lines.
+    """
+
+    def __init__(self, path: str, columns: List[str] = RESULT_COLUMNS):
+        self.path = path
+        self.columns = columns
+        self._file = None
+        self._csv_writer = None
+        self._parquet_writer = None
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        if is_parquet(path):
+            _require_pyarrow(path)
+            self.schema = _arrow_schema(columns)
+            self._parquet_writer = pq.ParquetWriter(path, self.schema, compression="zstd")
+        else:
+            if path.endswith(".gz"):
+                self._file = gzip.open(path, "wt", encoding="utf-8", newline="")
+            else:
+                self._file = open(path, "w", encoding="utf-8", newline="")
+            self._csv_writer = csv.writer(self._file)
+            self._csv_writer.writerow(columns)
+
+    def write_rows(self, rows: List[List]) -> None:
+        if self._csv_writer is not None:
+            self._csv_writer.writerows(rows)
+            return
+
+        arrays = []
+        for index, field in enumerate(self.schema):
+            values = [row[index] for row in rows]
+            if field.name != "raw_log_text":
+                # Blank cells are missing values outside the free text
+                values = [None if value == "" else value for value in values]
+            if pa.types.is_integer(field.type):
+                values = [None if value is None else int(value) for value in values]
+            if pa.types.is_dictionary(field.type):
+                arrays.append(pa.array(values, pa.string()).dictionary_encode())
+            else:
+                arrays.append(pa.array(values, field.type))
+        self._parquet_writer.write_table(pa.Table.from_arrays(arrays, schema=self.schema))
+
+    def write_frame(self, df: pd.DataFrame) -> None:
+        """Append a DataFrame chunk (missing columns are left blank)"""
+        if self._csv_writer is not None:
+            df = csv_dtypes(df)
+        df = df.reindex(columns=self.columns).astype(object)
+        self.write_rows(df.where(df.notna(), "").values.tolist())
+
+    def close(self) -> None:
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+        if self._file is not None:
+            self._file.close()
+
+    def __enter__(self) -> "ResultsWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Convert a results file between CSV and Parquet (by extension)"
+    )
+    parser.add_argument("input", help="results .csv / .csv.gz / .parquet")
+    parser.add_argument("output", help="results .parquet / .csv / .csv.gz")
+    parser.add_argument("--chunk-size", type=int, default=200000)
+    args = parser.parse_args()
+
+    rows = 0
+    with ResultsWriter(args.output) as writer:
+        for chunk in iter_results(args.input, args.chunk_size):
+            writer.write_frame(chunk)
+            rows += len(chunk)
+    print(f"Converted {rows:,} rows: {args.input} -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
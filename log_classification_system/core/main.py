@@ -1 +1,410 @@
-print("hello python")
+"""
+Hybrid Pipeline Command Line Tool
+
+Runs the Regex -> BERT -> LLM pipeline over raw OpenStack log files (plain
+or gzip) and writes one row per log line with the same columns as
+data/dataset_sampling.csv, e.g. to produce the
+results/hybrid_pipeline_complete_results.parquet read by data_sampling.main().
+Results are written as Parquet, one row group per chunk, or as CSV when the
+output path ends in .csv / .csv.gz.
+
+Input is processed in chunks so memory stays flat for multi-GB files:
+
+- The regex stage runs across a process pool, one chunk ahead of the rest.
+- Lines the regex stage leaves are grouped by log template; each template
+  is classified once per run, through the BERT and LLM backends configured
+  for the backend service (BERT_BACKEND, GROQ_API_KEY, ... in backend/.env).
+
+Usage (from the repository root):
+    python -m log_classification_system.core data/*.log.gz -o results/hybrid_pipeline_complete_results.parquet
+"""
+
+import argparse
+import asyncio
+import gzip
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from . import load_backend_module
+from .data_processing.results_io import RESULT_COLUMNS, ResultsWriter
+
+cache = load_backend_module("cache")
+regex_engine = load_backend_module("regex_engine")
+
+BERT_RULE = "DistilBERT_Classification"
+UNCLASSIFIED = "Unclassified"
+PIPELINE_STAGES = ["Regex", "BERT", "LLM", UNCLASSIFIED]
+
+
+def open_log_file(path: str):
+    """Open a plain or gzip-compressed log file for text reading"""
+    with open(path, "rb") as f:
+        compressed = f.read(2) == b"\x1f\x8b"
+    if compressed:
+        return gzip.open(path, "rt", encoding="utf-8", errors="replace")
+    return open(path, "r", encoding="utf-8", errors="replace")
+
+
+def read_log_chunks(
+    paths: List[str], chunk_size: int
+) -> Iterator[List[Tuple[str, str]]]:
+    """Yield lists of up to chunk_size (source_file, log_text) pairs, skipping blank lines"""
+    chunk = []
+    for path in paths:
+        with open_log_file(path) as f:
+            for line in f:
+                log_text = line.rstrip("\r\n")
+                if not log_text.strip():
+                    continue
+                chunk.append((path, log_text))
+                if len(chunk) >= chunk_size:
+                    yield chunk
+                    chunk = []
+    if chunk:
+        yield chunk
+
+
+# Regex stage - one compiled matcher per worker process
+_regex_matcher = None
+
+
+def _init_regex_worker() -> None:
+    global _regex_matcher
+    _regex_matcher = regex_engine.CompiledRegexMatcher(regex_engine.DEFAULT_REGEX_PATTERNS)
+
+
+def _regex_chunk(
+    log_texts: List[str],
+) -> List[Tuple[Optional[str], Optional[str], Optional[str]]]:
+    """(category, pattern, None) for regex hits, (None, None, template) otherwise"""
+    if _regex_matcher is None:
+        _init_regex_worker()
+
+    matches = []
+    for log_text in log_texts:
+        category, pattern = _regex_matcher.match(log_text)
+        # Masking is as costly as matching, so it runs in the worker too
+        matches.append((category, pattern, None if category else cache.mask_log_template(log_text)))
+    return matches
+
+
+class HybridPipelineRunner:
+    """
+    Classifies chunks of log lines and tracks per-stage counts.
+
+    BERT/LLM results are cached per log template for the whole run, so a
+    template that repeats across millions of lines costs one call. Results
+    left Unclassified by a failed or timed-out call are only reused within
+    their chunk, so the template is tried again in the next one.
+    """
+
+    def __init__(
+        self,
+        workers: int = os.cpu_count() or 1,
+        use_bert: bool = True,
+        use_llm: bool = True,
+        template_cache_size: int = 200000,
+    ):
+        self.workers = max(1, workers)
+        self.use_bert = use_bert
+        self.use_llm = use_llm
+        self.template_results = cache.TemplateCache(
+            max_size=template_cache_size, ttl_seconds=float("inf")
+        )
+
+        self.classifier = None
+        self.pool: Optional[ProcessPoolExecutor] = None
+        self.stage_counts = {stage: 0 for stage in PIPELINE_STAGES}
+        self.bert_calls = 0
+        self.llm_calls = 0
+
+    async def start(self) -> None:
+        if self.workers > 1:
+            self.pool = ProcessPoolExecutor(self.workers, initializer=_init_regex_worker)
+
+        if self.use_bert or self.use_llm:
+            # Imported here so regex-only runs do not need the LLM dependencies
+            classifier = load_backend_module("classifier")
+
+            self.classifier = classifier.LogClassifier()
+            self.classifier.template_store_path = ""
+            await self.classifier.initialize()
+            self.use_bert = self.use_bert and self.classifier.bert_loaded
+            self.use_llm = self.use_llm and self.classifier.llm_loaded
+
+        print(
+            f"Stages: Regex ({self.workers} processes), "
+            f"BERT {'on' if self.use_bert else 'off'}, LLM {'on' if self.use_llm else 'off'}",
+            file=sys.stderr,
+        )
+
+    async def close(self) -> None:
+        if self.pool:
+            self.pool.shutdown()
+        if self.classifier:
+            await self.classifier.shutdown()
+
+    def submit_regex(self, log_texts: List[str]) -> "asyncio.Future":
+        """Start the regex stage for a chunk, split across the process pool"""
+        loop = asyncio.get_running_loop()
+        if not self.pool:
+            future = loop.create_future()
+            future.set_result(_regex_chunk(log_texts))
+            return future
+
+        slice_size = -(-len(log_texts) // self.workers)
+        slices = [
+            loop.run_in_executor(self.pool, _regex_chunk, log_texts[start : start + slice_size])
+            for start in range(0, len(log_texts), slice_size)
+        ]
+
+        async def gather() -> List[Tuple[Optional[str], Optional[str], Optional[str]]]:
+            return [match for matches in await asyncio.gather(*slices) for match in matches]
+
+        return asyncio.ensure_future(gather())
+
+    async def _predict_bert(self, log_texts: List[str]) -> List[Tuple[Optional[str], float]]:
+        """Raw (label, confidence) per log from the configured BERT backend"""
+        classifier = self.classifier
+        self.bert_calls += len(log_texts)
+
+        if classifier.bert_backend == "local" or classifier.bert_batch_api_name:
+            try:
+                return await classifier._predict_bert_batch(log_texts)
+            except Exception as e:
+                print(f"BERT batch of {len(log_texts)} failed: {e}", file=sys.stderr)
+                return [(None, 0.0)] * len(log_texts)
+
+        # Single-item Space endpoint, bounded like the service's batch fan-out
+        async def predict(log_text: str) -> Tuple[Optional[str], float]:
+            if not classifier.bert_breaker.allow():
+                return None, 0.0
+            async with classifier.bert_semaphore:
+                try:
+                    result = await classifier._call_bert_space(log_text, api_name="/predict")
+                except Exception:
+                    return None, 0.0
+            return classifier._parse_bert_api_result(result)
+
+        return await asyncio.gather(*(predict(log_text) for log_text in log_texts))
+
+    async def _classify_templates(
+        self, log_texts: List[str]
+    ) -> Tuple[List[Dict[str, Any]], List[bool]]:
+        """
+        BERT, then LLM for the low-confidence remainder, one log per template
+
+        Returns the results and, per log, whether it is Unclassified because a
+        BERT or LLM call failed (as opposed to no stage being confident).
+        """
+        results = [
+            {
+                "bert_label": "",
+                "bert_confidence": "",
+                "bert_rule": "",
+                "llm_category": "",
+                "llm_confidence": "",
+                "final_category": UNCLASSIFIED,
+                "pipeline_stage": UNCLASSIFIED,
+                "final_confidence": 0.0,
+            }
+            for _ in log_texts
+        ]
+        call_failed = [False] * len(log_texts)
+
+        llm_pending = list(range(len(log_texts)))
+        if self.use_bert and log_texts:
+            llm_pending = []
+            outputs = await self._predict_bert(log_texts)
+            for index, (label, confidence) in enumerate(outputs):
+                result = results[index]
+                if label is None:
+                    # Failed, timed out or skipped by the open circuit breaker
+                    call_failed[index] = True
+                    llm_pending.append(index)
+                    continue
+
+                result["bert_confidence"] = confidence
+                category, _ = self.classifier._apply_bert_threshold(label, confidence)
+                if category:
+                    result.update(
+                        bert_label=category,
+                        bert_rule=BERT_RULE,
+                        final_category=category,
+                        pipeline_stage="BERT",
+                        final_confidence=confidence,
+                    )
+                else:
+                    llm_pending.append(index)
+
+        if self.use_llm and llm_pending:
+            self.llm_calls += len(llm_pending)
+            outputs = await self.classifier._classify_with_llm_batch(
+                [log_texts[index] for index in llm_pending]
+            )
+            for index, (category, confidence, _) in zip(llm_pending, outputs):
+                result = results[index]
+                result.update(llm_category=category, llm_confidence=confidence)
+                if category == "Processing_Error":
+                    call_failed[index] = True
+                else:
+                    result.update(
+                        final_category=category,
+                        pipeline_stage="LLM",
+                        final_confidence=confidence,
+                    )
+
+        failed = [
+            call_failed[index] and result["pipeline_stage"] == UNCLASSIFIED
+            for index, result in enumerate(results)
+        ]
+        return results, failed
+
+    async def classify_chunk(
+        self,
+        chunk: List[Tuple[str, str]],
+        regex_matches: List[Tuple[Optional[str], Optional[str], Optional[str]]],
+        first_log_id: int,
+    ) -> List[List[Any]]:
+        """Build result rows for a chunk whose regex stage has already run"""
+        uncached: Dict[str, int] = {}
+        for index, (category, _, template) in enumerate(regex_matches):
+            if category:
+                continue
+            if template not in uncached and self.template_results.get(template) is None:
+                uncached[template] = index
+
+        outputs, failed = await self._classify_templates(
+            [chunk[index][1] for index in uncached.values()]
+        )
+        # Failures only answer the rest of this chunk; the template is retried
+        # in later chunks instead of staying Unclassified for the whole run
+        chunk_failures: Dict[str, Dict[str, Any]] = {}
+        for template, result, call_failed in zip(uncached, outputs, failed):
+            if call_failed:
+                chunk_failures[template] = result
+            else:
+                self.template_results.put(template, result)
+
+        rows = []
+        for index, ((source_file, log_text), (regex_category, regex_rule, template)) in enumerate(
+            zip(chunk, regex_matches)
+        ):
+            if regex_category:
+                result = {
+                    "regex_label": regex_category,
+                    "regex_rule": regex_rule,
+                    "final_category": regex_category,
+                    "pipeline_stage": "Regex",
+                    "final_confidence": 1.0,
+                }
+            else:
+                result = chunk_failures.get(template) or self.template_results.get(template)
+                if result is None:
+                    # Evicted within this chunk - classify it on its own
+                    result = (await self._classify_templates([log_text]))[0][0]
+
+            self.stage_counts[result["pipeline_stage"]] += 1
+            row = {"log_id": first_log_id + index, "raw_log_text": log_text, "source_file": source_file}
+            row.update(result)
+            rows.append([row.get(column, "") for column in RESULT_COLUMNS])
+        return rows
+
+
+async def run_pipeline(
+    paths: List[str],
+    output_path: str,
+    runner: HybridPipelineRunner,
+    chunk_size: int = 20000,
+) -> Dict[str, Any]:
+    """Classify every non-blank line of the input files and write the results file"""
+    await runner.start()
+    start_time = time.perf_counter()
+    total_lines = 0
+    total_bytes = 0
+
+    try:
+        with ResultsWriter(output_path) as writer:
+            chunks = read_log_chunks(paths, chunk_size)
+            chunk = next(chunks, None)
+            regex_future = runner.submit_regex([text for _, text in chunk]) if chunk else None
+
+            while chunk:
+                # Start the regex stage of the next chunk while this one finishes
+                next_chunk = next(chunks, None)
+                matches = await regex_future
+                if next_chunk:
+                    regex_future = runner.submit_regex([text for _, text in next_chunk])
+
+                writer.write_rows(await runner.classify_chunk(chunk, matches, total_lines))
+                total_lines += len(chunk)
+                total_bytes += sum(len(text) + 1 for _, text in chunk)
+                chunk = next_chunk
+
+                elapsed = time.perf_counter() - start_time
+                counts = " ".join(f"{stage}={count:,}" for stage, count in runner.stage_counts.items())
+                print(
+                    f"{total_lines:,} lines | {total_lines / elapsed:,.0f} lines/s | "
+                    f"{total_bytes / elapsed / 1e6:.1f} MB/s | {counts}",
+                    file=sys.stderr,
+                )
+    finally:
+        await runner.close()
+
+    elapsed = time.perf_counter() - start_time
+    return {
+        "lines": total_lines,
+        "seconds": round(elapsed, 2),
+        "lines_per_second": round(total_lines / elapsed, 1) if elapsed else 0.0,
+        "stage_counts": dict(runner.stage_counts),
+        "bert_calls": runner.bert_calls,
+        "llm_calls": runner.llm_calls,
+    }
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(
+        prog="python -m log_classification_system.core",
+        description="Run the hybrid Regex -> BERT -> LLM pipeline over log files.",
+    )
+    parser.add_argument("inputs", nargs="+", help="Log files, plain or gzip-compressed")
+    parser.add_argument(
+        "-o",
+        "--output",
+        default="results/hybrid_pipeline_complete_results.parquet",
+        help="Results file (dataset_sampling.csv columns): .parquet, or .csv / .csv.gz to export CSV",
+    )
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Regex processes")
+    parser.add_argument("--chunk-size", type=int, default=20000, help="Lines per chunk")
+    parser.add_argument("--no-bert", action="store_true", help="Skip the BERT stage")
+    parser.add_argument("--no-llm", action="store_true", help="Skip the LLM stage")
+    parser.add_argument(
+        "--template-cache-size",
+        type=int,
+        default=200000,
+        help="Templates whose BERT/LLM result is kept for the run",
+    )
+    args = parser.parse_args(argv)
+
+    runner = HybridPipelineRunner(
+        workers=args.workers,
+        use_bert=not args.no_bert,
+        use_llm=not args.no_llm,
+        template_cache_size=args.template_cache_size,
+    )
+    summary = asyncio.run(run_pipeline(args.inputs, args.output, runner, args.chunk_size))
+
+    print("=" * 60)
+    print(f"Classified {summary['lines']:,} logs in {summary['seconds']}s ({summary['lines_per_second']:,.0f} logs/s)")
+    for stage, count in summary["stage_counts"].items():
+        percentage = count / summary["lines"] * 100 if summary["lines"] else 0.0
+        print(f"  {stage:12}: {count:10,} logs ({percentage:5.1f}%)")
+    print(f"  BERT calls: {summary['bert_calls']:,}, LLM calls: {summary['llm_calls']:,}")
+    print(f"Results saved: {args.output}")
+
+
+if __name__ == "__main__":
+    main()